@@ -3,6 +3,7 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from data_mcp.client import YahooFinanceClient
+from data_mcp.fundamentals_store import get_fundamentals
 
 class AntiGravityAnalyzer:
     def __init__(self):
@@ -15,8 +16,8 @@ class AntiGravityAnalyzer:
         Returns: (bool [Pass/Fail], str [Reason/Details])
         """
         try:
-            info = self.client.get_info(ticker)
-            financials = self.client.get_financials(ticker)
+            # Local fundamentals store (nightly batch refresh) instead of a fresh Yahoo call per check
+            info, _ = get_fundamentals(ticker)
             
             # 1. Debt to Equity
             debt_to_equity = info.get('debtToEquity', None)
@@ -0,0 +1,72 @@
+import calendar
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = list(calendar.month_name)[1:]
+WEEKDAY_NAMES = list(calendar.day_name)
+
+
+def week_of_month(day):
+    """
+    Week of Month (1-5) from day of month using integer arithmetic:
+    Week 1: Days 1-7, Week 2: 8-14, Week 3: 15-21, Week 4: 22-28, Week 5: 29-End.
+    Works on scalars and arrays.
+    """
+    return (np.asarray(day) - 1) // 7 + 1
+
+
+def trading_day_of_month(index):
+    """
+    N-th trading session of the month (1-based) for a sorted DatetimeIndex of trading days.
+    Computed with a running group-start offset instead of a groupby().cumcount().
+    """
+    if len(index) == 0:
+        return np.empty(0, dtype=np.int8)
+    key = index.year.values.astype(np.int32) * 12 + index.month.values
+    pos = np.arange(len(index))
+    new_month = np.r_[True, key[1:] != key[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_month, pos, 0))
+    return (pos - group_start + 1).astype(np.int8)
+
+
+def calendar_codes(index):
+    """
+    Integer calendar features for a DatetimeIndex, all derived with vectorized arithmetic.
+
+    Columns: Year (int16), Month (1-12), Day (1-31), Weekday (0=Mon), Week (week of month 1-5),
+    Trading_Day (N-th session of the month, counting only dates present in the index).
+    Group on these integer keys and map to names (month_names) only for display.
+    """
+    day = index.day.values.astype(np.int8)
+    return pd.DataFrame({
+        'Year': index.year.values.astype(np.int16),
+        'Month': index.month.values.astype(np.int8),
+        'Day': day,
+        'Weekday': index.dayofweek.values.astype(np.int8),
+        'Week': week_of_month(day).astype(np.int8),
+        'Trading_Day': trading_day_of_month(index),
+    }, index=index)
+
+
+def add_calendar_codes(df):
+    """Returns a copy of df with the calendar_codes columns joined on."""
+    codes = calendar_codes(df.index)
+    out = df.copy()
+    for col in codes.columns:
+        out[col] = codes[col].values
+    return out
+
+
+def month_names(obj):
+    """
+    Display helper: reindexes an object keyed by month number 1-12 to January..December
+    (all 12 months, in calendar order).
+    """
+    out = obj.reindex(range(1, 13)).set_axis(MONTH_NAMES, axis=0)
+    out.index.name = obj.index.name
+    return out
+
+
+def month_number(name):
+    """'November' -> 11."""
+    return MONTH_NAMES.index(name) + 1
@@ -0,0 +1,63 @@
+class ComputationGraph:
+    """
+    A small lazy DAG of named computations.
+
+    Each node is a function of its dependencies' values. Nothing runs until a node
+    is requested with get(); the result is then memoized so every consumer shares
+    the same object. invalidate() drops a node and everything downstream of it.
+
+    Example:
+        g = ComputationGraph()
+        g.add("prices", lambda: df)
+        g.add("returns", lambda p: p.pct_change().dropna(), deps=("prices",))
+        g.get("returns")  # computes prices -> returns once
+    """
+    def __init__(self):
+        self._nodes = {}   # name -> (func, deps)
+        self._cache = {}   # name -> computed value
+
+    def add(self, name, func, deps=()):
+        """Registers (or replaces) a node. Dependencies must already be registered."""
+        missing = [d for d in deps if d not in self._nodes]
+        if missing:
+            raise KeyError(f"Unknown dependencies for '{name}': {missing}")
+        self._nodes[name] = (func, tuple(deps))
+        self.invalidate(name)
+
+    def get(self, name):
+        """Returns the node value, computing it (and any uncomputed dependencies) on first access."""
+        if name in self._cache:
+            return self._cache[name]
+        if name not in self._nodes:
+            raise KeyError(f"Unknown node '{name}'")
+
+        func, deps = self._nodes[name]
+        value = func(*[self.get(d) for d in deps])
+        self._cache[name] = value
+        return value
+
+    def has_node(self, name):
+        return name in self._nodes
+
+    def is_computed(self, name):
+        return name in self._cache
+
+    def invalidate(self, name=None):
+        """
+        Clears the memoized value of a node and all of its dependents.
+        With no name, clears the whole graph (e.g. after new data is fetched).
+        """
+        if name is None:
+            self._cache.clear()
+            return
+
+        stale = {name}
+        changed = True
+        while changed:
+            changed = False
+            for node, (_, deps) in self._nodes.items():
+                if node not in stale and stale.intersection(deps):
+                    stale.add(node)
+                    changed = True
+        for node in stale:
+            self._cache.pop(node, None)
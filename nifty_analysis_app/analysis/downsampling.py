@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+# Roughly the pixel width of a full-width chart in the wide layout.
+# Sending more points than this to the browser adds payload without adding visible detail.
+DEFAULT_MAX_POINTS = 1500
+
+
+def _to_numeric_x(index):
+    """Converts a (Datetime)Index to float64 so that triangle areas can be computed."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    return np.asarray(index, dtype=np.float64)
+
+
+def minmax_indices(y, n_out):
+    """
+    Min-Max downsampling: splits y into n_out // 2 equal buckets and keeps the
+    position of the minimum and maximum of each bucket.
+    Preserves every spike, which matters for return / drawdown traces.
+    Returns sorted integer positions.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+
+    # Buckets that are entirely padding (only possible at the tail) are dropped
+    valid = ~np.all(np.isnan(blocks), axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    blocks = blocks[valid]
+
+    lo = offsets + np.nanargmin(blocks, axis=1)
+    hi = offsets + np.nanargmax(blocks, axis=1)
+    return np.unique(np.concatenate([[0], lo, hi, [n - 1]]))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson, 2013).
+    Keeps the first and last point and, for every bucket in between, the point that
+    forms the largest triangle with the previously kept point and the average of
+    the next bucket. Visually the closest n_out-point approximation of a line.
+    Returns sorted integer positions.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        xs = x[start:end]
+        ys = y[start:end]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
+
+
+def downsample_indices(x, y, n_out=DEFAULT_MAX_POINTS, method="lttb"):
+    """
+    Returns positions of the points to keep.
+
+    method:
+        'lttb'   - MinMax-preselected LTTB. A min-max pass first shrinks very long series
+                   to 4 * n_out candidates so the LTTB loop only runs over small buckets.
+        'minmax' - Plain min-max buckets (best for spiky series such as daily returns).
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+
+    if n > 4 * n_out:
+        pre = minmax_indices(y, 4 * n_out)
+        return pre[lttb_indices(np.asarray(x)[pre], np.asarray(y)[pre], n_out)]
+    return lttb_indices(x, y, n_out)
+
+
+def downsample_series(series, n_out=DEFAULT_MAX_POINTS, method="lttb"):
+    """
+    Downsamples a pandas Series for plotting. NaNs (e.g. indicator warm-up periods)
+    are dropped first. Series at or below n_out points are returned unchanged.
+    """
+    s = series.dropna()
+    if len(s) <= n_out:
+        return s
+    idx = downsample_indices(_to_numeric_x(s.index), s.values, n_out, method)
+    return s.iloc[idx]
+
+
+def downsample_ohlc(df, n_out=DEFAULT_MAX_POINTS):
+    """
+    Aggregates an OHLC(V) frame into at most n_out bars of equal row count.
+    Open = first, High = max, Low = min, Close = last, Volume = sum; any other
+    column (indicators) takes the last value. Bars are stamped with the first date of the bucket.
+    Candles keep their true high/low, unlike point-picking methods.
+    """
+    n = len(df)
+    if n <= n_out:
+        return df
+
+    size = int(np.ceil(n / n_out))
+    bucket = np.arange(n) // size
+    agg = {col: "last" for col in df.columns}
+    ohlc_rules = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    agg.update({col: rule for col, rule in ohlc_rules.items() if col in df.columns})
+
+    out = df.groupby(bucket).agg(agg)
+    out.index = df.index[::size]
+    return out
+
+
+def slice_window(obj, window):
+    """
+    Restricts a Series/DataFrame with a DatetimeIndex to window = (start, end).
+    Used to serve full-resolution detail for the zoomed-in range; None returns obj unchanged.
+    """
+    if window is None:
+        return obj
+    start, end = pd.Timestamp(window[0]), pd.Timestamp(window[1])
+    # yfinance histories are tz-aware (Asia/Kolkata); slider values are naive dates
+    tz = getattr(obj.index, "tz", None)
+    if tz is not None:
+        start, end = start.tz_localize(tz), end.tz_localize(tz)
+    # Include the whole end day
+    return obj.loc[start:end + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)]
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+FLOW_SERIES = ["FII Net", "DII Net", "Total Net"]
+DEFAULT_WINDOWS = (20, 60, 250)        # ~1 month, 1 quarter, 1 year of sessions
+DEFAULT_LAGS = np.arange(-10, 11)      # lag > 0: flow today vs Nifty return `lag` sessions later
+
+
+def prepare_flows(daily):
+    """Daily store rows -> Date-indexed FII Net, DII Net, Total Net and Nifty Return (close-to-close)."""
+    df = daily.set_index("Date").sort_index()
+    out = df[["FII Net", "DII Net"]].astype(float)
+    out["Total Net"] = out["FII Net"] + out["DII Net"]
+    out["Nifty Return"] = df["Nifty Price"].astype(float).pct_change()
+    return out
+
+
+def _rolling_sums(values, window):
+    """Trailing window sums along axis 0 via one cumulative sum (NaN where the window is incomplete)."""
+    c = np.cumsum(np.vstack([np.zeros((1,) + values.shape[1:]), values]), axis=0)
+    out = np.full(values.shape, np.nan)
+    out[window - 1:] = c[window:] - c[:-window]
+    return out
+
+
+def flow_zscores(flows, windows=DEFAULT_WINDOWS, columns=FLOW_SERIES):
+    """
+    Rolling z-score of each flow series against its trailing window, for every window at once.
+    Returns a DataFrame with columns '<series> Z<window>' (e.g. 'FII Net Z60').
+    """
+    x = flows[columns].to_numpy(dtype=float)
+    # Gaps are treated as zero flow so the cumulative sums stay defined
+    x = np.nan_to_num(x)
+    x2 = x * x
+    out = {}
+    for w in windows:
+        s1, s2 = _rolling_sums(x, w), _rolling_sums(x2, w)
+        mean = s1 / w
+        std = np.sqrt(np.maximum(s2 / w - mean ** 2, 0) * w / (w - 1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(std > 0, (x - mean) / std, np.nan)
+        for j, col in enumerate(columns):
+            out[f"{col} Z{w}"] = z[:, j]
+    return pd.DataFrame(out, index=flows.index)
+
+
+def flow_streaks(flows, columns=FLOW_SERIES):
+    """
+    Consecutive same-sign sessions for each flow series: streak length (signed: +n buying,
+    -n selling) and the cumulative flow since the streak began. Columns '<series> Streak'
+    and '<series> Streak Flow'.
+    """
+    out = pd.DataFrame(index=flows.index)
+    for col in columns:
+        x = flows[col].fillna(0).to_numpy()
+        sign = np.sign(x)
+        # A new streak starts whenever the sign changes
+        starts = np.r_[True, sign[1:] != sign[:-1]]
+        streak_id = np.cumsum(starts)
+        first = np.flatnonzero(starts)[streak_id - 1]
+        position = np.arange(len(x)) - first + 1
+        csum = np.cumsum(x)
+        out[f"{col} Streak"] = (position * sign).astype(int)
+        out[f"{col} Streak Flow"] = csum - np.r_[0, csum][first]
+    return out
+
+
+def _lag_matrix(y, lags):
+    """(T, L) matrix whose column l is y shifted so row t holds y[t + lags[l]] (NaN outside the range)."""
+    T = len(y)
+    idx = np.arange(T)[:, None] + np.asarray(lags)[None, :]
+    valid = (idx >= 0) & (idx < T)
+    return np.where(valid, y[np.clip(idx, 0, T - 1)], np.nan)
+
+
+def lagged_cross_correlation(flows, flow_col="FII Net", lags=DEFAULT_LAGS, return_col="Nifty Return"):
+    """
+    Pearson correlation between flow on day t and the Nifty return on day t + lag, for every
+    lag in one pass over a (T x lags) matrix. Positive lags: flows leading returns;
+    negative lags: returns leading flows. Returns a Series indexed by lag.
+    """
+    x = flows[flow_col].to_numpy(dtype=float)[:, None]
+    Y = _lag_matrix(flows[return_col].to_numpy(dtype=float), lags)
+    X = np.broadcast_to(x, Y.shape)
+    mask = np.isfinite(X) & np.isfinite(Y)
+    n = mask.sum(axis=0)
+    Xm, Ym = np.where(mask, X, 0.0), np.where(mask, Y, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx, my = Xm.sum(axis=0) / n, Ym.sum(axis=0) / n
+        cov = (Xm * Ym).sum(axis=0) / n - mx * my
+        vx = (Xm * Xm).sum(axis=0) / n - mx ** 2
+        vy = (Ym * Ym).sum(axis=0) / n - my ** 2
+        corr = cov / np.sqrt(vx * vy)
+    return pd.Series(np.where(n > 2, corr, np.nan), index=pd.Index(lags, name="Lag"), name=flow_col)
+
+
+def rolling_lagged_correlation(flows, flow_col="FII Net", lags=DEFAULT_LAGS, window=250,
+                               return_col="Nifty Return"):
+    """
+    Trailing-window correlation between flow(t) and return(t + lag) for every date and lag:
+    all five running moments come from cumulative sums over the (T x lags) matrix, so years of
+    data x dozens of lags is a handful of array operations. Returns a DataFrame (dates x lags).
+    Windows containing missing values are NaN.
+    """
+    x = flows[flow_col].to_numpy(dtype=float)[:, None]
+    Y = _lag_matrix(flows[return_col].to_numpy(dtype=float), lags)
+    X = np.broadcast_to(x, Y.shape)
+    valid = (np.isfinite(X) & np.isfinite(Y)).astype(float)
+    X, Y = np.where(valid > 0, X, 0.0), np.where(valid > 0, Y, 0.0)
+
+    n = _rolling_sums(valid, window)
+    sx, sy = _rolling_sums(X, window), _rolling_sums(Y, window)
+    sxx, syy, sxy = _rolling_sums(X * X, window), _rolling_sums(Y * Y, window), _rolling_sums(X * Y, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / window
+        var = (sxx - sx ** 2 / window) * (syy - sy ** 2 / window)
+        corr = np.where((n == window) & (var > 0), cov / np.sqrt(var), np.nan)
+    return pd.DataFrame(corr, index=flows.index, columns=pd.Index(lags, name="Lag"))
+
+
+def flow_summary(flows, windows=DEFAULT_WINDOWS):
+    """Latest z-scores and streaks per flow series: one row per series."""
+    if flows.empty:
+        return pd.DataFrame()
+    z = flow_zscores(flows, windows).iloc[-1]
+    streaks = flow_streaks(flows).iloc[-1]
+    rows = {}
+    for col in FLOW_SERIES:
+        row = {"Latest (₹ Cr)": flows[col].iloc[-1]}
+        row.update({f"Z ({w}d)": z[f"{col} Z{w}"] for w in windows})
+        row["Streak (days)"] = streaks[f"{col} Streak"]
+        row["Streak Flow (₹ Cr)"] = streaks[f"{col} Streak Flow"]
+        rows[col] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,132 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from analysis.option_chain import OptionChainAnalyzer
+from analysis.option_greeks import implied_volatility, time_to_expiry, RISK_FREE_RATE, IST
+from data_mcp.store import get_store_path
+
+# One ATM IV reading per symbol per day, used for IV percentiles
+IV_HISTORY_PATH = get_store_path("fno_scanner", "atm_iv_history.csv")
+IV_MIN_HISTORY = 20   # days of history before an IV percentile is reported
+IV_LOOKBACK_DAYS = 365
+
+DEFAULT_WORKERS = 8
+
+SCAN_COLUMNS = ["Symbol", "Spot", "Expiry", "PCR", "Max Pain", "Max Pain Dist %", "Call Wall", "Put Wall",
+                "Total OI", "CE Change OI", "PE Change OI", "ATM IV"]
+
+
+def summarize_chain(symbol, chain, now=None):
+    """
+    Reduces a parsed chain (OptionChainAnalyzer.parse_chain output) to one scanner row for
+    its nearest unsettled expiry. Only the arrays of that expiry are touched and the chain can be
+    discarded afterwards, so a full F&O sweep keeps one row per underlying in memory.
+    """
+    if chain.empty:
+        return None
+    expiries = OptionChainAnalyzer.get_expiry_dates(chain)
+    if not expiries:
+        return None
+    # After 15:30 IST on expiry day the nearest contract has settled: use the next live one
+    # (time_to_expiry floors T at 300 s, which would report an IV for a dead contract)
+    years = time_to_expiry(expiries, now)
+    live = np.flatnonzero(years > 300 / (365 * 86400))
+    if not len(live):
+        return None
+    expiry, T = expiries[live[0]], years[live[0]]
+    df, pcr, total_ce, total_pe, max_pain, spot = OptionChainAnalyzer.process_option_chain(chain, expiry)
+    if df.empty or not spot:
+        return None
+
+    strikes = df['Strike'].values
+    atm = int(np.argmin(np.abs(strikes - spot)))
+    prices = np.array([df['CE LTP'].values[atm], df['PE LTP'].values[atm]])
+    iv = implied_volatility(prices, spot, strikes[atm], T, RISK_FREE_RATE, np.array([True, False]))
+    atm_iv = np.nanmean(iv) if np.isfinite(iv).any() else np.nan
+    if np.isnan(atm_iv):
+        # Fall back to the exchange-published IV when prices are stale/zero
+        nse_iv = np.array([df['CE IV'].values[atm], df['PE IV'].values[atm]])
+        atm_iv = nse_iv[nse_iv > 0].mean() / 100 if (nse_iv > 0).any() else np.nan
+
+    return {
+        "Symbol": symbol,
+        "Spot": spot,
+        "Expiry": expiry,
+        "PCR": pcr,
+        "Max Pain": max_pain,
+        "Max Pain Dist %": (max_pain - spot) / spot * 100,
+        "Call Wall": strikes[int(np.argmax(df['CE OI'].values))],
+        "Put Wall": strikes[int(np.argmax(df['PE OI'].values))],
+        "Total OI": total_ce + total_pe,
+        "CE Change OI": df['CE Change OI'].sum(),
+        "PE Change OI": df['PE Change OI'].sum(),
+        "ATM IV": atm_iv,
+    }
+
+
+def _scan_one(symbol, now):
+    payload = OptionChainAnalyzer.fetch_live_chain(symbol)
+    if not payload:
+        return None
+    return summarize_chain(symbol, OptionChainAnalyzer.parse_chain(payload), now)
+
+
+def update_iv_history(scan, now=None):
+    """Stores today's ATM IV per symbol (replacing earlier readings from the same day)."""
+    today = (pd.Timestamp.now(tz=IST) if now is None else pd.Timestamp(now)).strftime("%Y-%m-%d")
+    fresh = pd.DataFrame({"Date": today, "Symbol": scan["Symbol"], "ATM IV": scan["ATM IV"]}).dropna()
+    try:
+        history = pd.read_csv(IV_HISTORY_PATH) if os.path.exists(IV_HISTORY_PATH) else pd.DataFrame(columns=fresh.columns)
+        history = pd.concat([history, fresh], ignore_index=True).drop_duplicates(["Date", "Symbol"], keep="last")
+        cutoff = (pd.Timestamp(today) - pd.Timedelta(days=IV_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        history = history[history["Date"] >= cutoff]
+        history.to_csv(IV_HISTORY_PATH, index=False)
+        return history
+    except Exception as e:
+        print(f"Error updating IV history: {e}")
+        return fresh
+
+
+def iv_percentiles(scan, history):
+    """
+    IV Percentile: share of the symbol's stored daily ATM IVs at or below today's reading
+    (NaN until IV_MIN_HISTORY days exist). Computed for all symbols with one merge + groupby.
+    """
+    if history.empty:
+        return pd.Series(np.nan, index=scan.index)
+    merged = history.merge(scan[["Symbol", "ATM IV"]].rename(columns={"ATM IV": "Current"}), on="Symbol")
+    merged["Below"] = merged["ATM IV"] <= merged["Current"]
+    stats = merged.groupby("Symbol")["Below"].agg(["mean", "count"])
+    pct = (stats["mean"] * 100).where(stats["count"] >= IV_MIN_HISTORY)
+    return scan["Symbol"].map(pct)
+
+
+def scan_fno(symbols, max_workers=DEFAULT_WORKERS, now=None, progress=None):
+    """
+    Fetches option chains for many underlyings concurrently (every request goes through the
+    shared NSE rate limiter) and returns one row per symbol:
+    SCAN_COLUMNS plus IV Percentile (vs own history) and IV Rank (Universe) (vs today's peers).
+    progress: Optional callback(done, total).
+    """
+    rows = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_scan_one, s, now): s for s in symbols}
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                row = future.result()
+                if row:
+                    rows.append(row)
+            except Exception as e:
+                print(f"Error scanning {futures[future]}: {e}")
+            if progress:
+                progress(i, len(futures))
+
+    if not rows:
+        return pd.DataFrame(columns=SCAN_COLUMNS + ["IV Percentile", "IV Rank (Universe)"])
+
+    scan = pd.DataFrame(rows, columns=SCAN_COLUMNS)
+    history = update_iv_history(scan, now)
+    scan["IV Percentile"] = iv_percentiles(scan, history)
+    scan["IV Rank (Universe)"] = scan["ATM IV"].rank(pct=True) * 100
+    return scan.sort_values("Total OI", ascending=False).reset_index(drop=True)
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+PILLARS = ["Growth", "Profitability", "Health", "Valuation"]
+MIN_PEERS = 3  # Stocks with a PE needed before an industry median PE is used as the benchmark
+
+# Metrics ranked within each industry; False = lower is better
+PEER_METRICS = {
+    "Revenue Growth": True,
+    "ROE": True,
+    "Net Margin": True,
+    "Debt/Equity": False,
+    "Current Ratio": True,
+    "PE": False,
+    "Total Score": True,
+}
+
+
+def _col(table, name, default=0.0):
+    """Numeric column with missing values replaced by default (the memo's info.get(x, default))."""
+    if name not in table.columns:
+        return pd.Series(default, index=table.index, dtype=float)
+    return pd.to_numeric(table[name], errors="coerce").fillna(default)
+
+
+def _ratio(num, den, default):
+    """num / den where den is non-zero, default elsewhere."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.Series(np.where(den != 0, num / den, default), index=num.index)
+
+
+def _points(conditions, points):
+    """First matching condition's points per row (0 when none match), like the memo's if/elif chains."""
+    return pd.Series(np.select(conditions, points, default=0), index=conditions[0].index)
+
+
+def compute_metrics(table):
+    """
+    Ratios behind the four pillars for every row of a fundamentals table
+    (data_mcp.fundamentals_store.load_table() layout), with the memo's fallbacks for missing data.
+    """
+    rev, prev_rev = _col(table, "Revenue"), _col(table, "Prev Revenue")
+    ni, prev_ni = _col(table, "Net Income"), _col(table, "Prev Net Income")
+    debt = _col(table, "Total Debt")
+    equity = _col(table, "Stockholders Equity", 1.0)
+    ocf = _col(table, "Operating Cash Flow")
+
+    m = pd.DataFrame(index=table.index)
+    m["Revenue Growth"] = np.where((rev != 0) & (prev_rev != 0), _ratio(rev - prev_rev, prev_rev, 0),
+                                   _col(table, "revenueGrowth"))
+    m["Net Income Growth"] = _ratio(ni - prev_ni, prev_ni.abs(), 0)
+    m["Long Term Growth"] = _col(table, "revenueGrowth")
+    m["ROE"] = _col(table, "returnOnEquity")
+    m["Net Margin"] = _ratio(ni, rev, 0)
+    m["Debt/Equity"] = _ratio(debt, equity, 100)
+    m["Current Ratio"] = _ratio(_col(table, "Current Assets"), _col(table, "Current Liabilities"), 0)
+    m["OCF Coverage"] = ocf > debt * 0.2
+    m["Earnings Quality"] = _ratio(ocf, ni, 0)
+    m["PE"] = _col(table, "trailingPE", np.nan).replace(0, np.nan)
+    m["PEG"] = _col(table, "pegRatio", np.nan)
+    return m
+
+
+def pillar_scores(table, sector_pe=None):
+    """
+    The investment memo's four pillar scores (0-10 each) for every stock at once.
+
+    table: Fundamentals table indexed by symbol (fundamentals_store.load_table()).
+    sector_pe: Optional Series of benchmark PEs aligned to table's index (e.g. industry medians);
+        where missing, valuation falls back to the memo's absolute PE bands.
+    Returns the metrics plus Growth, Profitability, Health, Valuation, Total Score, Red Flags and Verdict.
+    """
+    m = compute_metrics(table)
+
+    growth = _points([m["Revenue Growth"] > 0.15, m["Revenue Growth"] > 0.05, m["Revenue Growth"] < 0], [4, 2, -2])
+    growth += _points([m["Net Income Growth"] > 0.20, m["Net Income Growth"] > 0.10], [4, 2])
+
+    profit = _points([m["ROE"] > 0.20, m["ROE"] > 0.15, m["ROE"] < 0.05], [4, 3, -1])
+    profit += _points([m["Net Margin"] > 0.15, m["Net Margin"] > 0.08], [3, 1])
+
+    health = _points([m["Debt/Equity"] < 0.5, m["Debt/Equity"] < 1.0, m["Debt/Equity"] > 2.0], [4, 2, -2])
+    health += _points([m["Current Ratio"] > 1.5, m["Current Ratio"] < 1.0], [2, -2])
+    health += np.where(m["OCF Coverage"], 2, 0)
+
+    pe = m["PE"]
+    bench = pd.Series(np.nan, index=table.index) if sector_pe is None else sector_pe.reindex(table.index)
+    has_bench = pe.notna() & bench.notna() & (bench != 0)
+    discount = _ratio(pe - bench, bench, np.nan)
+    value = _points([
+        has_bench & (discount < -0.2), has_bench & (discount > 0.2), has_bench,
+        pe.notna() & (pe < 15), pe.notna() & (pe < 25), pe.notna(),
+    ], [4, -2, 2, 4, 2, -2])
+    value += np.where((m["PEG"] != 0) & (m["PEG"] < 1.0), 3, 0)
+
+    out = m.copy()
+    out["Sector PE"] = bench
+    out["Growth"] = (growth + 2).clip(0, 10).astype(int)
+    out["Profitability"] = (profit + 2).clip(0, 10).astype(int)
+    out["Health"] = (health + 2).clip(0, 10).astype(int)
+    out["Valuation"] = (value + 3).clip(0, 10).astype(int)
+    out["Total Score"] = out[PILLARS].sum(axis=1)
+
+    # Quantitative red flags (the memo's delivery-volume flag needs live NSE data and is left out)
+    flags = (m["Earnings Quality"] < 0.7).astype(int) + (m["Debt/Equity"] > 2.5).astype(int)
+    flags += ((m["Revenue Growth"] < -0.05) & (m["Long Term Growth"] > 0.05)).astype(int)
+    out["Red Flags"] = flags
+
+    pct = out["Total Score"] / 40
+    verdict = pd.Series(np.select([pct > 0.75, pct > 0.5, pct > 0.3],
+                                  ["STRONG BUY 🟢", "ACCUMULATE 🟡", "HOLD 🟠"], "AVOID 🔴"), index=out.index)
+    out["Verdict"] = verdict.mask((verdict == "STRONG BUY 🟢") & (flags > 0), "ACCUMULATE (Risks Present) 🟡")
+    return out
+
+
+def attach_industry(table, universe):
+    """Adds Company Name and Industry from the Nifty 500 list (tools.get_nifty500()) by symbol."""
+    lookup = universe.drop_duplicates("Symbol").set_index("Symbol")[["Company Name", "Industry"]]
+    out = table.join(lookup, how="left")
+    out["Industry"] = out["Industry"].fillna("Unknown")
+    return out
+
+
+def industry_percentiles(scores, industry, metrics=None):
+    """
+    Percentile rank (0-100) of each stock within its industry for the given metrics
+    (default PEER_METRICS), oriented so that 100 is always best. One grouped rank per metric.
+    """
+    metrics = metrics or PEER_METRICS
+    grouped = scores[list(metrics)].groupby(industry.reindex(scores.index))
+    pct = pd.DataFrame(index=scores.index)
+    for metric, higher_is_better in metrics.items():
+        pct[f"{metric} Pctl"] = grouped[metric].rank(pct=True, ascending=higher_is_better) * 100
+    return pct
+
+
+def screen_universe(table, universe):
+    """
+    Pillar scores, verdicts and industry-relative percentiles for the whole fundamentals table.
+    Valuation benchmarks each stock against its industry's median PE (peers from nifty500.csv).
+    Returns one row per symbol sorted by Total Score.
+    """
+    if table.empty or "trailingPE" not in table.columns:
+        return pd.DataFrame()
+    data = attach_industry(table, universe)
+    pe = pd.to_numeric(data["trailingPE"], errors="coerce").where(lambda x: x > 0)
+    grouped = pe.groupby(data["Industry"])
+    # Too few peers (or no industry) -> absolute PE bands, as in the memo without NSE sector PE
+    sector_pe = grouped.transform("median").where(
+        (grouped.transform("count") >= MIN_PEERS) & (data["Industry"] != "Unknown"))
+
+    scores = pillar_scores(data, sector_pe)
+    scores.insert(0, "Industry", data["Industry"])
+    scores.insert(0, "Company Name", data["Company Name"])
+    scores = scores.join(industry_percentiles(scores, scores["Industry"]))
+    return scores.sort_values("Total Score", ascending=False)
+
+
+def apply_screen(scores, min_scores=None, max_red_flags=None, industries=None):
+    """
+    Filters screen_universe() output in one boolean mask.
+    min_scores: {column: minimum}, e.g. {"Profitability": 7, "Health": 6, "ROE Pctl": 75}.
+    """
+    mask = pd.Series(True, index=scores.index)
+    for column, minimum in (min_scores or {}).items():
+        mask &= scores[column] >= minimum
+    if max_red_flags is not None:
+        mask &= scores["Red Flags"] <= max_red_flags
+    if industries:
+        mask &= scores["Industry"].isin(industries)
+    return scores[mask]
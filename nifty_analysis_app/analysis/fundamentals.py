@@ -1,21 +1,201 @@
+import os
+import re
+import glob
+import json
+import pickle
+import hashlib
 import pandas as pd
 import numpy as np
 import math
 from data_mcp.nse_client import NSEClient
+from data_mcp.store import STORE_DIR, get_store_path
+from data_mcp.ttl_cache import TTLCache
 
-def generate_investment_memo(ticker, info, financials):
+IST = "Asia/Kolkata"
+
+# Bump when the memo logic/layout changes so cached memos are not reused
+MEMO_VERSION = 1
+STATEMENT_NAMES = ("income_statement", "balance_sheet", "cash_flow")
+
+# Keys are content hashes, so entries never go stale in memory; the bounds only cap size
+_memo_cache = TTLCache(ttl=float("inf"), max_entries=256)
+_parsed_cache = TTLCache(ttl=float("inf"), max_entries=1024)
+MEMO_DIR = os.path.join(STORE_DIR, "memo_cache")
+# Marks that files from the flat <fingerprint>.pkl layout have been removed
+MEMO_LAYOUT_MARKER = os.path.join(MEMO_DIR, ".layout_v2")
+
+
+def fetch_nse_context(ticker):
+    """Live NSE inputs of the memo: sector PE, industry and delivery %. {} if NSE is unavailable."""
+    nse_data = NSEClient.get_peer_comparison_data(ticker)
+    if not nse_data:
+        return {}
+    delivery_pct, _ = NSEClient.get_delivery_metrics(ticker)
+    return {
+        "sector_pe": float(nse_data.get('sector_pe')) if nse_data.get('sector_pe') else None,
+        "industry": nse_data.get('industry', 'Unknown'),
+        "delivery_pct": delivery_pct,
+    }
+
+
+def _nse_context_path(ticker):
+    return get_store_path("nse_context", f"{_ticker_prefix(ticker)}.json")
+
+
+def load_nse_context(ticker):
+    """
+    NSE context for the memo, fetched live at most once per IST day per ticker and kept in
+    the local store, so repeat memos (in any session or process) skip the NSE call.
+    When the live fetch fails, the last stored context is used; {} if there is none.
+    """
+    today = pd.Timestamp.now(tz=IST).strftime("%Y-%m-%d")
+    path = _nse_context_path(ticker)
+    stored = None
+    if os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except Exception as e:
+            print(f"Error reading NSE context for {ticker}: {e}")
+    if stored and stored.get("date") == today:
+        return stored["context"]
+
+    context = fetch_nse_context(ticker)
+    if not context:
+        return stored["context"] if stored else {}
+    try:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"date": today, "context": context}, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error saving NSE context for {ticker}: {e}")
+    return context
+
+
+def _statement_hash(df):
+    """Content hash of one statement (values, line items and period labels)."""
+    h = hashlib.sha1(str(list(df.columns)).encode())
+    if not df.empty:
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def memo_fingerprint(ticker, info, financials, nse_context):
+    """Hash of everything the memo depends on: ticker, info, the statements and the NSE context."""
+    h = hashlib.sha1(f"{MEMO_VERSION}|{ticker}".encode())
+    h.update(json.dumps(info or {}, sort_keys=True, default=str).encode())
+    for name in STATEMENT_NAMES:
+        df = (financials or {}).get(name, pd.DataFrame())
+        h.update(f"{name}:{_statement_hash(df)}".encode())
+    h.update(json.dumps(nse_context, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def parse_statement(df):
+    """Statement with date columns sorted oldest -> latest, memoized on its content hash."""
+    if df.empty:
+        return df
+    key = _statement_hash(df)
+    parsed = _parsed_cache.get(key)
+    if parsed is None:
+        parsed = df.set_axis(pd.to_datetime(df.columns), axis=1).sort_index(axis=1)
+        _parsed_cache.set(key, parsed)
+    return parsed
+
+
+def _ticker_prefix(ticker):
+    return re.sub(r"[^A-Za-z0-9&_.-]+", "_", ticker.upper())
+
+
+def _memo_path(ticker, key):
+    # One file per (ticker, fingerprint): store/memo_cache/<TICKER>__<fingerprint>.pkl
+    return get_store_path("memo_cache", f"{_ticker_prefix(ticker)}__{key}.pkl")
+
+
+def _load_cached_memo(ticker, key):
+    memo = _memo_cache.get(key)
+    if memo is not None:
+        return memo
+    path = _memo_path(ticker, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            memo = pickle.load(f)
+    except Exception as e:
+        print(f"Error reading cached memo {key}: {e}")
+        return None
+    _memo_cache.set(key, memo)
+    return memo
+
+
+def prune_memo_cache(ticker, key):
+    """Deletes the ticker's on-disk memos other than the current fingerprint (built from older data)."""
+    current = _memo_path(ticker, key)
+    for path in glob.glob(os.path.join(MEMO_DIR, f"{glob.escape(_ticker_prefix(ticker))}__*.pkl")):
+        if path == current:
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Error pruning cached memo {path}: {e}")
+
+
+def migrate_memo_cache():
+    """One-time cleanup of memos from the flat <fingerprint>.pkl layout (no ticker prefix)."""
+    if os.path.exists(MEMO_LAYOUT_MARKER):
+        return
+    for path in glob.glob(os.path.join(MEMO_DIR, "*.pkl")):
+        if "__" not in os.path.basename(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Error removing legacy memo {path}: {e}")
+    open(get_store_path("memo_cache", ".layout_v2"), "w").close()
+
+
+def _save_cached_memo(ticker, key, memo):
+    _memo_cache.set(key, memo)
+    try:
+        migrate_memo_cache()
+        with open(_memo_path(ticker, key), "wb") as f:
+            pickle.dump(memo, f)
+        prune_memo_cache(ticker, key)
+    except Exception as e:
+        print(f"Error caching memo {key}: {e}")
+
+
+def generate_investment_memo(ticker, info, financials, nse_context=None):
     """
     Generates a comprehensive investment memo acting as a Senior Equity Research Analyst.
     Output is formatted as a Markdown Dashboard.
+    Memos are cached (in memory and in the local store) on a fingerprint of
+    (info, statements, NSE context), and the NSE context is stored per day, so repeat
+    requests for unchanged data are instant. Only the latest fingerprint per ticker is
+    kept on disk. Memos built without NSE context are neither cached nor allowed to
+    replace a stored memo.
     """
     if not info: info = {}
-    
-    # --- Fetch NSE Context (Live) ---
-    nse_data = NSEClient.get_peer_comparison_data(ticker)
-    delivery_pct, delivery_qty = NSEClient.get_delivery_metrics(ticker)
-    
-    sector_pe = float(nse_data.get('sector_pe')) if nse_data.get('sector_pe') else None
-    industry_name = nse_data.get('industry', 'Unknown')
+    if nse_context is None:
+        nse_context = load_nse_context(ticker)
+
+    key = memo_fingerprint(ticker, info, financials, nse_context)
+    memo = _load_cached_memo(ticker, key)
+    if memo is None:
+        memo = build_investment_memo(ticker, info, financials, nse_context)
+        # Error strings and memos missing the NSE inputs are not cached, so a retry can
+        # pick up fixed data
+        if isinstance(memo, dict) and nse_context:
+            _save_cached_memo(ticker, key, memo)
+    return memo
+
+
+def build_investment_memo(ticker, info, financials, nse_context):
+    """Builds the memo dashboard (uncached; see generate_investment_memo)."""
+    sector_pe = nse_context.get('sector_pe')
+    industry_name = nse_context.get('industry', 'Unknown')
+    delivery_pct = nse_context.get('delivery_pct', 0)
     
     if not financials:
         return "Insufficient data to generate report. Financial statements are missing."
@@ -30,14 +210,9 @@ def generate_investment_memo(ticker, info, financials):
 
     # Pre-processing
     try:
-        def clean_df(df):
-            if df.empty: return df
-            df.columns = pd.to_datetime(df.columns)
-            return df.sort_index(axis=1)
-
-        income_stmt = clean_df(income_stmt)
-        balance_sheet = clean_df(balance_sheet)
-        cash_flow = clean_df(cash_flow)
+        income_stmt = parse_statement(income_stmt)
+        balance_sheet = parse_statement(balance_sheet)
+        cash_flow = parse_statement(cash_flow)
     except Exception as e:
         return f"Error processing financial dates: {e}"
 
@@ -1,21 +1,111 @@
 
+import hashlib
+import json
+import re
+import numpy as np
 import pandas as pd
 from textblob import TextBlob
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 from duckduckgo_search import DDGS
 import time
+from concurrent.futures import ThreadPoolExecutor
+from data_mcp.ttl_cache import TTLCache
+from data_mcp.rate_limiter import SEARCH_LIMITER
+
+SOCIAL_SITES = {
+    "twitter": "site:twitter.com",
+    "youtube": "site:youtube.com",
+    "reddit": "site:reddit.com",
+    "facebook": "site:facebook.com",
+    "instagram": "site:instagram.com",
+    "linkedin": "site:linkedin.com"
+}
+SOCIAL_TTL = 900      # seconds a platform's search results are reused
+SOCIAL_WORKERS = 6
+
+# (ticker, platform, limit) -> search results, shared by all sessions
+_social_cache = TTLCache(ttl=SOCIAL_TTL, max_entries=2000)
+
+# Small finance-news lexicon for the vectorized scorer (word -> polarity in [-1, 1])
+FINANCE_LEXICON = {
+    "surge": 0.7, "surges": 0.7, "soar": 0.8, "soars": 0.8, "rally": 0.6, "rallies": 0.6, "jump": 0.5,
+    "jumps": 0.5, "gain": 0.4, "gains": 0.4, "rise": 0.4, "rises": 0.4, "high": 0.3, "record": 0.4,
+    "beat": 0.5, "beats": 0.5, "upgrade": 0.6, "upgrades": 0.6, "outperform": 0.6, "buy": 0.4,
+    "bullish": 0.7, "growth": 0.4, "profit": 0.4, "profits": 0.4, "strong": 0.4, "positive": 0.4,
+    "dividend": 0.3, "order": 0.2, "orders": 0.2, "expansion": 0.3, "approval": 0.3, "wins": 0.4,
+    "fall": -0.4, "falls": -0.4, "drop": -0.4, "drops": -0.4, "slump": -0.7, "slumps": -0.7,
+    "plunge": -0.8, "plunges": -0.8, "crash": -0.9, "decline": -0.4, "declines": -0.4, "low": -0.3,
+    "miss": -0.5, "misses": -0.5, "downgrade": -0.6, "downgrades": -0.6, "underperform": -0.6,
+    "sell": -0.4, "bearish": -0.7, "loss": -0.5, "losses": -0.5, "weak": -0.4, "negative": -0.4,
+    "fraud": -0.9, "probe": -0.5, "penalty": -0.5, "default": -0.8, "debt": -0.2, "cut": -0.3,
+    "cuts": -0.3, "warning": -0.5, "resigns": -0.4, "lawsuit": -0.5, "pledge": -0.3,
+}
+
+_TOKEN = re.compile(r"[a-z]+")
+
+# Scores keyed by (scorer, text) content hash; headlines never change, so entries only age out by LRU
+_sentiment_cache = TTLCache(ttl=float("inf"), max_entries=50000)
+
+
+def score_textblob(texts):
+    """TextBlob polarity/subjectivity, one blob per text (the default scorer)."""
+    scores = np.empty((len(texts), 2))
+    for i, t in enumerate(texts):
+        sentiment = TextBlob(t).sentiment
+        scores[i] = sentiment.polarity, sentiment.subjectivity
+    return scores
+
+
+def score_lexicon(texts, lexicon=None):
+    """
+    Vectorized lexicon scorer: all texts are tokenized into one long Series, mapped through
+    the lexicon and averaged per text with one groupby. Polarity = mean score of matched words,
+    subjectivity = share of words that matched.
+    """
+    lexicon = lexicon or FINANCE_LEXICON
+    tokens = pd.Series([_TOKEN.findall(t.lower()) for t in texts]).explode()
+    hits = tokens.map(lexicon)
+    grouped = hits.groupby(level=0)
+    polarity = grouped.mean().reindex(range(len(texts))).fillna(0.0)
+    coverage = (grouped.count() / tokens.groupby(level=0).size()).reindex(range(len(texts))).fillna(0.0)
+    return np.column_stack([polarity.values, coverage.values])
+
+
+SCORERS = {"textblob": score_textblob, "lexicon": score_lexicon}
+
 
 class NewsAnalyzer:
-    def __init__(self):
-        self.ddgs = DDGS()
+    def __init__(self, scorer="textblob", lexicon=None, scorer_name=None):
+        """
+        scorer: Name in SCORERS ("textblob", or "lexicon" for the fast vectorized scorer),
+            or a callable taking a list of texts and returning an (n, 2) array of polarity, subjectivity.
+        lexicon: Optional word -> polarity dict for the lexicon scorer (defaults to FINANCE_LEXICON).
+        scorer_name: Stable name for a callable scorer, used in the sentiment cache key. Without it
+            the key includes the callable's id, so scores are only reused within this process.
+
+        One analyzer is shared by every session (and the background ingestor), so it holds no
+        DuckDuckGo client: each search opens its own.
+        """
+        self.lexicon = lexicon
+        if callable(scorer):
+            # Distinct lambdas/partials share a __name__, so never key on that alone
+            self.scorer = scorer
+            self.scorer_key = scorer_name or (f"{getattr(scorer, '__module__', None)}."
+                                              f"{getattr(scorer, '__qualname__', type(scorer).__name__)}:{id(scorer)}")
+        else:
+            self.scorer, self.scorer_key = SCORERS[scorer], scorer
+        if self.scorer is score_lexicon and lexicon:
+            lexicon_hash = hashlib.sha1(json.dumps(lexicon, sort_keys=True).encode()).hexdigest()[:8]
+            self.scorer_key = f"lexicon:{lexicon_hash}"
 
     def fetch_news(self, ticker, limit=10):
         """Fetches news specifically using the 'news' backend of DuckDuckGo."""
         query = f"{ticker} stock news India"
         try:
             # timelimit='w' for past week to cover yesterday and today + buffer
-            results = self.ddgs.news(query, max_results=limit, timelimit="w")
+            SEARCH_LIMITER.acquire()
+            results = DDGS().news(query, max_results=limit, timelimit="w")
             return results
         except Exception as e:
             print(f"Error fetching news: {e}")
@@ -26,15 +116,11 @@ class NewsAnalyzer:
         Fetches 'social' content by searching for the ticker on specific platforms.
         Note: This is a search-based approximation since direct scraping is blocked.
         """
-        site_map = {
-            "twitter": "site:twitter.com",
-            "youtube": "site:youtube.com",
-            "reddit": "site:reddit.com",
-            "facebook": "site:facebook.com",
-            "instagram": "site:instagram.com",
-            "linkedin": "site:linkedin.com"
-        }
-        site_query = site_map.get(platform, "")
+        return self._search_social(DDGS(), ticker, platform, limit)
+
+    @staticmethod
+    def _search_social(ddgs, ticker, platform, limit):
+        site_query = SOCIAL_SITES.get(platform, "")
         if not site_query:
             # Fallback if platform not in map
             site_query = f'site:{platform}.com'
@@ -44,32 +130,82 @@ class NewsAnalyzer:
         try:
             # using 'text' backend for general web search with time limit
             # timelimit='w' (past week) ensures we get recent discussions including yesterday/today
-            results = self.ddgs.text(query, max_results=limit, timelimit="w")
+            SEARCH_LIMITER.acquire()
+            results = ddgs.text(query, max_results=limit, timelimit="w")
             return results
         except Exception as e:
             print(f"Error fetching social for {platform}: {e}")
             return []
 
+    def fetch_social_all(self, ticker, platforms=None, limit=5):
+        """
+        Searches every platform (default: all of SOCIAL_SITES) in parallel and returns one merged
+        feed: a list of result dicts tagged with 'platform', deduplicated by URL and title.
+        Each platform's results are cached for SOCIAL_TTL seconds, so repeat calls and
+        platform switches are served from memory; empty results are not cached. Searches
+        share SEARCH_LIMITER, so the parallel fan-out stays within DuckDuckGo's request budget.
+        """
+        platforms = list(platforms or SOCIAL_SITES)
+
+        def _one(platform):
+            # DDGS sessions are not shared across threads: one client per worker call
+            return _social_cache.get_or_fetch(
+                (ticker, platform, limit), lambda: self._search_social(DDGS(), ticker, platform, limit))
+
+        with ThreadPoolExecutor(max_workers=min(SOCIAL_WORKERS, len(platforms))) as pool:
+            results = dict(zip(platforms, pool.map(_one, platforms)))
+
+        feed, seen = [], set()
+        for platform in platforms:
+            for item in results[platform] or []:
+                url = (item.get('href') or '').split('?')[0].rstrip('/').lower()
+                title = ' '.join((item.get('title') or '').lower().split())
+                if (url and url in seen) or (title and title in seen):
+                    continue
+                seen.update(k for k in (url, title) if k)
+                feed.append({**item, "platform": platform})
+        return feed
+
+    def _score(self, texts):
+        if self.scorer is score_lexicon:
+            return score_lexicon(texts, self.lexicon)
+        return np.asarray(self.scorer(texts), dtype=float)
+
+    def _cache_key(self, text):
+        return hashlib.sha1(f"{self.scorer_key}\x00{text}".encode()).hexdigest()
+
     def analyze_sentiment(self, texts):
         """
         Analyzes sentiment of a list of text strings.
         Returns a DataFrame with polarity and subjectivity.
+        Scores are cached by content hash; only unseen texts are scored, in one batch.
         """
+        texts = [t for t in (texts or []) if t]
         if not texts:
             return pd.DataFrame()
-            
-        data = []
-        for t in texts:
-            if not t: continue
-            blob = TextBlob(t)
-            data.append({
-                "text": t,
-                "polarity": blob.sentiment.polarity,
-                "subjectivity": blob.sentiment.subjectivity,
-                "verdict": self._get_verdict(blob.sentiment.polarity)
-            })
-            
-        return pd.DataFrame(data)
+
+        keys = [self._cache_key(t) for t in texts]
+        scores = np.empty((len(texts), 2))
+        missing = []
+        for i, key in enumerate(keys):
+            cached = _sentiment_cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+        if missing:
+            fresh = self._score([texts[i] for i in missing])
+            scores[missing] = fresh
+            for i, row in zip(missing, fresh):
+                _sentiment_cache.set(keys[i], (float(row[0]), float(row[1])))
+
+        polarity = scores[:, 0]
+        return pd.DataFrame({
+            "text": texts,
+            "polarity": polarity,
+            "subjectivity": scores[:, 1],
+            "verdict": np.select([polarity > 0.1, polarity < -0.1], ["Bullish", "Bearish"], "Neutral"),
+        })
 
     def _get_verdict(self, polarity):
         if polarity > 0.1: return "Bullish"
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
-import nsepython as nse
 import streamlit as st
+from data_mcp.nse_session import nse_fetch
 
 class OptionChainAnalyzer:
     @staticmethod
@@ -46,111 +46,146 @@ class OptionChainAnalyzer:
         }
 
     @staticmethod
-    @st.cache_data(ttl=60) # Cache for 1 minute as options change fast
-    def fetch_option_chain(symbol):
+    def fetch_live_chain(symbol):
         """
-        Fetches option chain data for a symbol.
+        Fetches the option chain payload from NSE without caching or mock fallback.
+        Returns None on failure (used by background recorders that must not store mock data).
         """
         try:
             # Handle indices
-            if symbol in ["NIFTY", "BANKNIFTY", "FINNIFTY"]:
+            if symbol in ["NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY"]:
                 url = f"https://www.nseindia.com/api/option-chain-indices?symbol={symbol}"
             else:
                 # Stock symbols need .NS removed if present
                 clean_symbol = symbol.replace('.NS', '')
                 url = f"https://www.nseindia.com/api/option-chain-equities?symbol={clean_symbol}"
             
-            data = nse.nsefetch(url)
-            if not data:
-                print(f"Warning: Empty data for {symbol}, using mock.")
-                return OptionChainAnalyzer._generate_mock_payload(symbol)
-            return data
+            data = nse_fetch(url)
+            return data if data else None
         except Exception as e:
             print(f"Error fetching option chain for {symbol}: {e}")
+            return None
+
+    @staticmethod
+    @st.cache_data(ttl=60) # Cache for 1 minute as options change fast
+    def fetch_option_chain(symbol):
+        """
+        Fetches option chain data for a symbol.
+        """
+        data = OptionChainAnalyzer.fetch_live_chain(symbol)
+        if not data:
+            print(f"Warning: Empty data for {symbol}, using mock.")
             return OptionChainAnalyzer._generate_mock_payload(symbol)
+        return data
 
     @staticmethod
     def get_expiry_dates(payload):
+        if payload is None: return []
+        if isinstance(payload, pd.DataFrame):
+            return list(payload['Expiry'].unique())
         if not payload: return []
         return payload.get('records', {}).get('expiryDates', [])
 
+    # Raw NSE field -> chain column, for each side of the strike
+    _LEG_FIELDS = {
+        'openInterest': 'OI',
+        'changeinOpenInterest': 'Change OI',
+        'lastPrice': 'LTP',
+        'impliedVolatility': 'IV',
+        'totalTradedVolume': 'Volume',
+    }
+
+    @staticmethod
+    def parse_chain(payload):
+        """
+        Parses the raw payload once into a columnar DataFrame covering every expiry:
+        Expiry, Strike, CE OI, CE Change OI, CE LTP, CE IV, CE Volume and the same PE columns.
+        Spot is stored in df.attrs['spot']. Sorted by expiry then strike.
+        Selecting an expiry afterwards is an array mask, not another pass over the JSON.
+        """
+        if not payload: return pd.DataFrame()
+        records = payload.get('records', {})
+        data = records.get('data', [])
+        if not data: return pd.DataFrame()
+
+        columns = {
+            'Expiry': [rec.get('expiryDate') for rec in data],
+            'Strike': np.array([rec.get('strikePrice', 0) for rec in data], dtype=float),
+        }
+        for side in ('CE', 'PE'):
+            legs = [rec.get(side) or {} for rec in data]
+            for field, name in OptionChainAnalyzer._LEG_FIELDS.items():
+                columns[f'{side} {name}'] = np.array([leg.get(field, 0) or 0 for leg in legs], dtype=float)
+
+        chain = pd.DataFrame(columns)
+        # Keep the payload's expiry order (nearest first) and sort strikes within each expiry
+        expiry_order = {e: i for i, e in enumerate(records.get('expiryDates', []))}
+        chain['_order'] = chain['Expiry'].map(expiry_order).fillna(len(expiry_order))
+        chain = chain.sort_values(['_order', 'Strike'], kind='stable').drop(columns='_order').reset_index(drop=True)
+        chain.attrs['spot'] = records.get('underlyingValue', 0)
+        return chain
+
+    @staticmethod
+    @st.cache_data(ttl=60)
+    def fetch_chain_frame(symbol):
+        """Fetches and parses the option chain once per refresh; every expiry is sliced from this frame."""
+        return OptionChainAnalyzer.parse_chain(OptionChainAnalyzer.fetch_option_chain(symbol))
+
+    @staticmethod
+    def writer_pain(strikes, ce_oi, pe_oi):
+        """
+        Total option-writer payout if the underlying settles at each strike, by broadcasting
+        settlement prices (rows) against strikes (columns):
+        pain[j] = sum_k max(0, S_j - K_k) * CE_OI_k + max(0, K_k - S_j) * PE_OI_k
+        """
+        strikes = np.asarray(strikes, dtype=float)
+        diff = strikes[:, None] - strikes[None, :]
+        return np.maximum(diff, 0) @ np.asarray(ce_oi, dtype=float) + np.maximum(-diff, 0) @ np.asarray(pe_oi, dtype=float)
+
+    @staticmethod
+    def max_pain(strikes, ce_oi, pe_oi):
+        """Strike where option writers pay out the least (first such strike on ties)."""
+        if len(strikes) == 0: return 0
+        pain = OptionChainAnalyzer.writer_pain(strikes, ce_oi, pe_oi)
+        return np.asarray(strikes)[int(np.argmin(pain))]
+
+    @staticmethod
+    def select_expiry(chain, expiry_date):
+        """Rows of a parsed chain for one expiry, with strike-wise aggregate columns added."""
+        if chain.empty: return chain
+        df = chain[chain['Expiry'].values == expiry_date].reset_index(drop=True)
+        df['Total OI'] = df['CE OI'] + df['PE OI']
+        df['Net Change OI'] = df['PE Change OI'] - df['CE Change OI']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            df['Strike PCR'] = np.where(df['CE OI'] > 0, df['PE OI'] / df['CE OI'], 0.0)
+        return df
+
     @staticmethod
     def process_option_chain(payload, expiry_date):
         """
-        Processes raw payload to get a DataFrame for a specific expiry.
+        Processes the chain for a specific expiry.
+        payload: Raw NSE payload, or a frame from parse_chain / fetch_chain_frame (preferred:
+                 no re-parsing when the expiry changes).
         Calculates PCR and identifies Max Pain.
+        Returns (df, pcr, total_ce_oi, total_pe_oi, max_pain_strike, current_price).
         """
-        if not payload: return pd.DataFrame(), 0, 0, 0, 0
+        chain = payload if isinstance(payload, pd.DataFrame) else OptionChainAnalyzer.parse_chain(payload)
+        if chain.empty: return pd.DataFrame(), 0, 0, 0, 0, 0
 
-        data = payload.get('records', {}).get('data', [])
-        current_price = payload.get('records', {}).get('underlyingValue', 0)
-        
-        # Filter by expiry
-        filtered_data = [rec for rec in data if rec['expiryDate'] == expiry_date]
-        
-        chain_list = []
-        total_pe_oi = 0
-        total_ce_oi = 0
-        
-        # Max Pain Calculation Helpers
-        strikes = []
-        ce_oi_map = {}
-        pe_oi_map = {}
+        current_price = chain.attrs.get('spot', 0)
+        df = OptionChainAnalyzer.select_expiry(chain, expiry_date)
+        if df.empty: return df, 0, 0, 0, 0, current_price
 
-        for rec in filtered_data:
-            strike = rec.get('strikePrice')
-            strikes.append(strike)
-            
-            ce = rec.get('CE', {})
-            pe = rec.get('PE', {})
-            
-            ce_oi = ce.get('openInterest', 0)
-            pe_oi = pe.get('openInterest', 0)
-            
-            ce_oi_chg = ce.get('changeinOpenInterest', 0)
-            pe_oi_chg = pe.get('changeinOpenInterest', 0)
-            
-            total_ce_oi += ce_oi
-            total_pe_oi += pe_oi
-            
-            ce_oi_map[strike] = ce_oi
-            pe_oi_map[strike] = pe_oi
-            
-            chain_list.append({
-                'Strike': strike,
-                'CE OI': ce_oi,
-                'CE Change OI': ce_oi_chg,
-                'CE LTP': ce.get('lastPrice', 0),
-                'PE LTP': pe.get('lastPrice', 0),
-                'PE Change OI': pe_oi_chg,
-                'PE OI': pe_oi,
-            })
-            
-        df = pd.DataFrame(chain_list)
-        pcr = total_pe_oi / total_ce_oi if total_ce_oi > 0 else 0
-        
-        # Max Pain Calculation
-        # Max Pain is the strike where option writers (sellers) lose the least money.
-        # Loss for CE writer at Strike K = Max(0, Spot - K) * OI
-        # Loss for PE writer at Strike K = Max(0, K - Spot) * OI
-        # We simulate "Spot" landing at each strike price.
+        strikes = df['Strike'].values
+        ce_oi = df['CE OI'].values
+        pe_oi = df['PE OI'].values
         
-        min_loss = float('inf')
-        max_pain_strike = 0
+        total_ce_oi = ce_oi.sum()
+        total_pe_oi = pe_oi.sum()
+        pcr = total_pe_oi / total_ce_oi if total_ce_oi > 0 else 0
         
-        for assumption_strike in strikes:
-            total_loss = 0
-            for k in strikes:
-                # Call Writers Loss if market ends at assumption_strike
-                if assumption_strike > k:
-                    total_loss += (assumption_strike - k) * ce_oi_map.get(k, 0)
-                
-                # Put Writers Loss if market ends at assumption_strike
-                if assumption_strike < k:
-                    total_loss += (k - assumption_strike) * pe_oi_map.get(k, 0)
-            
-            if total_loss < min_loss:
-                min_loss = total_loss
-                max_pain_strike = assumption_strike
+        # Max Pain is the strike where option writers (sellers) lose the least money,
+        # simulating "Spot" landing at each strike price.
+        max_pain_strike = OptionChainAnalyzer.max_pain(strikes, ce_oi, pe_oi)
                 
         return df, pcr, total_ce_oi, total_pe_oi, max_pain_strike, current_price
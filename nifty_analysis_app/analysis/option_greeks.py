@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+# Annualized risk-free rate (approx. 91-day T-bill yield) used for pricing NSE options
+RISK_FREE_RATE = 0.065
+# NSE F&O contracts settle at the 15:30 IST close of the expiry day
+EXPIRY_CUTOFF = pd.Timedelta(hours=15, minutes=30)
+IST = "Asia/Kolkata"
+
+IV_LOWER = 1e-4
+IV_UPPER = 5.0
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def _pdf(x):
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _d1_d2(S, K, T, r, sigma, q):
+    vol_t = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t
+
+
+def bs_price(S, K, T, r, sigma, is_call, q=0.0):
+    """Black-Scholes price of European options. All inputs broadcast; is_call is a bool array."""
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    disc_s = S * np.exp(-q * T)
+    disc_k = K * np.exp(-r * T)
+    call = disc_s * ndtr(d1) - disc_k * ndtr(d2)
+    put = disc_k * ndtr(-d2) - disc_s * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_vega(S, K, T, r, sigma, q=0.0):
+    """dPrice/dSigma (per 1.00 of volatility)."""
+    d1, _ = _d1_d2(S, K, T, r, sigma, q)
+    return S * np.exp(-q * T) * _pdf(d1) * np.sqrt(T)
+
+
+def implied_volatility(price, S, K, T, r, is_call, q=0.0, tol=1e-6, max_iter=100):
+    """
+    Vectorized implied volatility for arrays of option prices.
+
+    Safeguarded Newton: every contract keeps a [lo, hi] bracket that is tightened with the
+    sign of the pricing error. A Newton step that leaves the bracket (or has vanishing vega)
+    is replaced by bisection, so deep ITM/OTM contracts still converge. All contracts are
+    updated together each iteration; converged ones are frozen.
+    Prices outside the no-arbitrage bounds return NaN.
+    """
+    price, S, K, T, is_call = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in (price, S, K, T)],
+                                                   np.asarray(is_call, dtype=bool))
+    price, S, K, T, is_call = price.ravel(), S.ravel(), K.ravel(), T.ravel(), is_call.ravel()
+    disc_s = S * np.exp(-q * T)
+    disc_k = K * np.exp(-r * T)
+    lower_bound = np.where(is_call, np.maximum(disc_s - disc_k, 0), np.maximum(disc_k - disc_s, 0))
+    upper_bound = np.where(is_call, disc_s, disc_k)
+    valid = (price > lower_bound) & (price < upper_bound) & (T > 0) & (S > 0) & (K > 0)
+
+    sigma = np.full(price.shape, np.nan)
+    if not valid.any():
+        return sigma
+
+    p, s, k, t, c = price[valid], S[valid], K[valid], T[valid], is_call[valid]
+    # Converge on the time value: deep ITM prices are mostly intrinsic and barely move with vol
+    time_value = p - lower_bound[valid]
+    # Brenner-Subrahmanyam style starting point, clipped into the bracket
+    vol = np.clip(np.sqrt(2 * np.pi / t) * p / s, 0.05, 2.0)
+    lo = np.full(p.shape, IV_LOWER)
+    hi = np.full(p.shape, IV_UPPER)
+    active = np.ones(p.shape, dtype=bool)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        v = vol[idx]
+        diff = bs_price(s[idx], k[idx], t[idx], r, v, c[idx], q) - p[idx]
+        done = np.abs(diff) < tol * np.maximum(time_value[idx], 1e-8)
+        # Price is increasing in vol: too expensive -> upper bound, too cheap -> lower bound
+        hi[idx] = np.where(diff > 0, v, hi[idx])
+        lo[idx] = np.where(diff < 0, v, lo[idx])
+
+        vega = bs_vega(s[idx], k[idx], t[idx], r, v, q)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = v - diff / vega
+        use_newton = np.isfinite(newton) & (newton > lo[idx]) & (newton < hi[idx])
+        vol[idx] = np.where(done, v, np.where(use_newton, newton, 0.5 * (lo[idx] + hi[idx])))
+        active[idx[done | (hi[idx] - lo[idx] < 1e-10)]] = False
+
+    sigma[valid] = vol
+    return sigma
+
+
+def bs_greeks(S, K, T, r, sigma, is_call, q=0.0):
+    """
+    Greeks for arrays of contracts:
+    Delta, Gamma, Vega (per 1 vol point), Theta (per calendar day), Rho (per 1% rate move).
+    """
+    d1, d2 = _d1_d2(S, K, T, r, sigma, q)
+    sqrt_t = np.sqrt(T)
+    disc_q = np.exp(-q * T)
+    disc_r = np.exp(-r * T)
+    pdf_d1 = _pdf(d1)
+
+    delta = np.where(is_call, disc_q * ndtr(d1), disc_q * (ndtr(d1) - 1))
+    gamma = disc_q * pdf_d1 / (S * sigma * sqrt_t)
+    vega = S * disc_q * pdf_d1 * sqrt_t / 100
+    decay = -S * disc_q * pdf_d1 * sigma / (2 * sqrt_t)
+    theta_call = decay - r * K * disc_r * ndtr(d2) + q * S * disc_q * ndtr(d1)
+    theta_put = decay + r * K * disc_r * ndtr(-d2) - q * S * disc_q * ndtr(-d1)
+    theta = np.where(is_call, theta_call, theta_put) / 365
+    rho = np.where(is_call, K * T * disc_r * ndtr(d2), -K * T * disc_r * ndtr(-d2)) / 100
+    return {"Delta": delta, "Gamma": gamma, "Vega": vega, "Theta": theta, "Rho": rho}
+
+
+def time_to_expiry(expiries, now=None):
+    """
+    Year fractions to the 15:30 IST settlement of NSE expiry strings such as '30-Oct-2025'.
+    Floored at a few minutes so contracts on expiry day stay solvable.
+    """
+    now = pd.Timestamp.now(tz=IST) if now is None else pd.Timestamp(now)
+    if now.tz is None:
+        now = now.tz_localize(IST)
+    expiry_ts = pd.to_datetime(pd.Series(expiries), format="%d-%b-%Y", errors="coerce").dt.tz_localize(IST) + EXPIRY_CUTOFF
+    seconds = (expiry_ts - now).dt.total_seconds().values
+    return np.maximum(seconds, 300) / (365 * 86400)
+
+
+def chain_greeks(chain, spot=None, r=RISK_FREE_RATE, now=None):
+    """
+    Implied volatility and Greeks for every call and put in a parsed chain
+    (OptionChainAnalyzer.parse_chain output, all expiries), solved in a single vectorized pass.
+
+    Returns a long DataFrame: Expiry, Strike, Type (CE/PE), LTP, Days, IV, NSE IV,
+    Delta, Gamma, Vega, Theta, Rho. Contracts without a traded price are dropped.
+    """
+    if chain.empty:
+        return pd.DataFrame()
+    spot = chain.attrs.get("spot", 0) if spot is None else spot
+    if not spot:
+        return pd.DataFrame()
+
+    n = len(chain)
+    expiry = np.concatenate([chain["Expiry"].values, chain["Expiry"].values])
+    strike = np.concatenate([chain["Strike"].values, chain["Strike"].values])
+    ltp = np.concatenate([chain["CE LTP"].values, chain["PE LTP"].values])
+    nse_iv = np.concatenate([chain["CE IV"].values, chain["PE IV"].values]) if "CE IV" in chain else np.zeros(2 * n)
+    is_call = np.r_[np.ones(n, dtype=bool), np.zeros(n, dtype=bool)]
+
+    keep = ltp > 0
+    expiry, strike, ltp, nse_iv, is_call = expiry[keep], strike[keep], ltp[keep], nse_iv[keep], is_call[keep]
+
+    # One year fraction per distinct expiry, broadcast back to contracts
+    unique_exp, exp_code = np.unique(expiry, return_inverse=True)
+    T = time_to_expiry(unique_exp, now)[exp_code]
+
+    iv = implied_volatility(ltp, spot, strike, T, r, is_call)
+    greeks = bs_greeks(spot, strike, T, r, iv, is_call)
+
+    out = pd.DataFrame({
+        "Expiry": expiry,
+        "Strike": strike,
+        "Type": np.where(is_call, "CE", "PE"),
+        "LTP": ltp,
+        "Days": T * 365,
+        "IV": iv,
+        "NSE IV": np.where(nse_iv > 0, nse_iv / 100, np.nan),
+        **greeks,
+    })
+    out.attrs["spot"] = spot
+    return out
+
+
+def iv_smile(greeks_df, expiry):
+    """
+    IV by strike for one expiry. 'Smile IV' uses the out-of-the-money side
+    (puts below spot, calls at/above), which is the more liquid and reliable quote.
+    """
+    if greeks_df.empty:
+        return pd.DataFrame()
+    spot = greeks_df.attrs.get("spot", 0)
+    data = greeks_df[greeks_df["Expiry"] == expiry]
+    smile = data.pivot_table(index="Strike", columns="Type", values="IV")
+    smile = smile.reindex(columns=["CE", "PE"]).rename(columns={"CE": "Call IV", "PE": "Put IV"})
+    otm_call = smile.index.values >= spot
+    smile["Smile IV"] = np.where(otm_call, smile["Call IV"], smile["Put IV"])
+    smile["Smile IV"] = smile["Smile IV"].fillna(smile["Call IV"]).fillna(smile["Put IV"])
+    smile["Moneyness"] = smile.index.values / spot if spot else np.nan
+    return smile
+
+
+def iv_term_structure(greeks_df):
+    """
+    At-the-money IV per expiry: average of call and put IV at the strike nearest spot.
+    Returns DataFrame indexed by expiry (nearest first) with Days and ATM IV.
+    """
+    if greeks_df.empty:
+        return pd.DataFrame()
+    spot = greeks_df.attrs.get("spot", 0)
+    data = greeks_df.dropna(subset=["IV"])
+    if data.empty:
+        return pd.DataFrame()
+    dist = (data["Strike"] - spot).abs()
+    nearest = dist.groupby(data["Expiry"]).transform("min")
+    atm = data[dist == nearest]
+    term = atm.groupby("Expiry").agg(Days=("Days", "first"), **{"ATM IV": ("IV", "mean"), "ATM Strike": ("Strike", "first")})
+    return term.sort_values("Days")
@@ -0,0 +1,219 @@
+import os
+import glob
+import hashlib
+import threading
+import time
+import numpy as np
+import pandas as pd
+from analysis.option_chain import OptionChainAnalyzer
+from data_mcp.store import STORE_DIR
+from data_mcp.trading_calendar import is_trading_day
+
+# Snapshots are stored per symbol and session date:
+#   store/option_snapshots/<SYMBOL>/<YYYY-MM-DD>/<HHMMSS>_<hash>.npz
+SNAPSHOT_ROOT = os.path.join(STORE_DIR, "option_snapshots")
+DEFAULT_SYMBOLS = ["NIFTY", "BANKNIFTY"]
+DEFAULT_INTERVAL = 180  # seconds between polls
+
+# Numeric chain columns kept in each snapshot (float64, one row per expiry x strike):
+# index OI runs into the crores and premiums need paise precision, beyond float32's 24-bit mantissa
+SNAPSHOT_COLUMNS = ['Strike', 'CE OI', 'CE Change OI', 'CE LTP', 'CE IV', 'CE Volume',
+                    'PE OI', 'PE Change OI', 'PE LTP', 'PE IV', 'PE Volume']
+
+IST = "Asia/Kolkata"
+MARKET_OPEN = pd.Timedelta(hours=9, minutes=15)
+MARKET_CLOSE = pd.Timedelta(hours=15, minutes=30)
+
+
+def _symbol_dir(symbol, session):
+    path = os.path.join(SNAPSHOT_ROOT, symbol.replace('.NS', '').upper(), session)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _chain_hash(values, spot):
+    """Content hash of a snapshot, used to skip writing when nothing changed since the last poll."""
+    h = hashlib.sha1(np.ascontiguousarray(values).tobytes())
+    h.update(np.float64(spot).tobytes())
+    return h.hexdigest()[:12]
+
+
+def market_is_open(now=None):
+    """Within NSE session hours on a trading day (weekends and exchange holidays excluded)."""
+    now = pd.Timestamp.now(tz=IST) if now is None else now
+    offset = now - now.normalize()
+    return MARKET_OPEN <= offset <= MARKET_CLOSE and is_trading_day(now)
+
+
+def save_snapshot(symbol, chain, now=None):
+    """
+    Writes a parsed chain (OptionChainAnalyzer.parse_chain output) as one compressed
+    columnar .npz file. Returns the path, or None if it matches the previous snapshot.
+    """
+    if chain.empty:
+        return None
+    now = pd.Timestamp.now(tz=IST) if now is None else now
+    folder = _symbol_dir(symbol, now.strftime("%Y-%m-%d"))
+
+    expiries, expiry_code = np.unique(chain['Expiry'].to_numpy(dtype=str), return_inverse=True)
+    values = chain.reindex(columns=SNAPSHOT_COLUMNS).fillna(0).values.astype(np.float64)
+    spot = float(chain.attrs.get('spot', 0))
+    digest = _chain_hash(np.column_stack([expiry_code, values]), spot)
+
+    existing = sorted(glob.glob(os.path.join(folder, "*.npz")))
+    if existing and existing[-1].endswith(f"_{digest}.npz"):
+        return None
+
+    path = os.path.join(folder, f"{now.strftime('%H%M%S')}_{digest}.npz")
+    np.savez_compressed(path, expiries=expiries, expiry_code=expiry_code.astype(np.int16),
+                        values=values, spot=np.float64(spot))
+    return path
+
+
+def record_snapshot(symbol, now=None):
+    """Fetches the live chain for symbol and stores it. Returns the saved path or None."""
+    payload = OptionChainAnalyzer.fetch_live_chain(symbol)
+    if not payload:
+        return None
+    return save_snapshot(symbol, OptionChainAnalyzer.parse_chain(payload), now)
+
+
+def list_sessions(symbol):
+    """Session dates (YYYY-MM-DD) that have recorded snapshots for symbol, newest first."""
+    folder = os.path.join(SNAPSHOT_ROOT, symbol.replace('.NS', '').upper())
+    if not os.path.isdir(folder):
+        return []
+    return sorted((d for d in os.listdir(folder) if glob.glob(os.path.join(folder, d, "*.npz"))), reverse=True)
+
+
+def load_snapshots(symbol, session):
+    """
+    Loads one session's snapshots as a single long DataFrame:
+    Time, Spot, Expiry plus SNAPSHOT_COLUMNS (one row per snapshot x expiry x strike).
+    """
+    folder = os.path.join(SNAPSHOT_ROOT, symbol.replace('.NS', '').upper(), session)
+    frames = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.npz"))):
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                frame = pd.DataFrame(f['values'].astype(np.float64), columns=SNAPSHOT_COLUMNS)
+                frame.insert(0, 'Expiry', f['expiries'][f['expiry_code']])
+                frame.insert(0, 'Spot', float(f['spot']))
+        except Exception as e:
+            print(f"Error reading snapshot {path}: {e}")
+            continue
+        stamp = os.path.basename(path).split('_')[0]
+        frame.insert(0, 'Time', pd.Timestamp(f"{session} {stamp[:2]}:{stamp[2:4]}:{stamp[4:6]}").tz_localize(IST))
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _nearest_expiry(snapshots):
+    expiries = snapshots['Expiry'].unique()
+    dates = pd.DatetimeIndex(pd.to_datetime(expiries, format="%d-%b-%Y", errors="coerce"))
+    return expiries[dates.argmin()] if dates.notna().any() else expiries[0]
+
+
+def chain_timeseries(snapshots, expiry=None):
+    """
+    Evolution of one expiry over the session, one row per snapshot:
+    Spot, Total CE OI, Total PE OI, PCR, Max Pain, CE Change OI, PE Change OI.
+    expiry defaults to the nearest expiry in the data.
+    """
+    if snapshots.empty:
+        return pd.DataFrame()
+    expiry = expiry or _nearest_expiry(snapshots)
+    data = snapshots[snapshots['Expiry'] == expiry]
+
+    grouped = data.groupby('Time')
+    series = grouped.agg(**{
+        'Spot': ('Spot', 'first'),
+        'Total CE OI': ('CE OI', 'sum'),
+        'Total PE OI': ('PE OI', 'sum'),
+        'CE Change OI': ('CE Change OI', 'sum'),
+        'PE Change OI': ('PE Change OI', 'sum'),
+    })
+    series['PCR'] = np.where(series['Total CE OI'] > 0, series['Total PE OI'] / series['Total CE OI'], 0.0)
+    series['Max Pain'] = [OptionChainAnalyzer.max_pain(g['Strike'].values, g['CE OI'].values, g['PE OI'].values)
+                          for _, g in grouped]
+    return series
+
+
+def strike_oi_timeseries(snapshots, expiry=None, side='CE', strikes=None):
+    """OI per strike over the session for one side (CE or PE): DataFrame (Time x Strike)."""
+    if snapshots.empty:
+        return pd.DataFrame()
+    expiry = expiry or _nearest_expiry(snapshots)
+    data = snapshots[snapshots['Expiry'] == expiry]
+    if strikes is not None:
+        data = data[data['Strike'].isin(strikes)]
+    return data.pivot_table(index='Time', columns='Strike', values=f'{side} OI', aggfunc='sum')
+
+
+class SnapshotRecorder:
+    """
+    Background thread that polls option chains for a list of symbols on a fixed interval
+    during market hours and stores deduplicated snapshots. One instance per server process.
+    """
+    def __init__(self, symbols=None, interval=DEFAULT_INTERVAL, market_hours_only=True):
+        self.symbols = list(symbols or DEFAULT_SYMBOLS)
+        self.interval = interval
+        self.market_hours_only = market_hours_only
+        self.last_run = None
+        self.saved = 0
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def record_once(self):
+        """Polls every symbol once. Returns {symbol: path or None}."""
+        results = {}
+        for symbol in self.symbols:
+            path = record_snapshot(symbol)
+            results[symbol] = path
+            if path:
+                self.saved += 1
+            else:
+                self.skipped += 1
+            # Space out NSE requests
+            time.sleep(1)
+        self.last_run = pd.Timestamp.now(tz=IST)
+        return results
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if not self.market_hours_only or market_is_open():
+                try:
+                    self.record_once()
+                except Exception as e:
+                    print(f"Snapshot recorder error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="option-snapshot-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    # Standalone recorder: python -m analysis.option_snapshots NIFTY BANKNIFTY (run from the app folder)
+    import sys
+    recorder = SnapshotRecorder(sys.argv[1:] or DEFAULT_SYMBOLS)
+    print(f"Recording {recorder.symbols} every {recorder.interval}s during market hours. Ctrl+C to stop.")
+    recorder.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        recorder.stop()
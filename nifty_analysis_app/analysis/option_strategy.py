@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from analysis.option_greeks import bs_price, implied_volatility, time_to_expiry, RISK_FREE_RATE
+
+# Contract multipliers for index options (NSE revises these periodically; editable in the UI)
+INDEX_LOT_SIZES = {"NIFTY": 75, "BANKNIFTY": 35, "FINNIFTY": 65, "MIDCPNIFTY": 140}
+
+# Leg templates: (option type, strike offset in strike steps from ATM, quantity in lots; + buy / - sell)
+STRATEGY_TEMPLATES = {
+    "Long Call": [("CE", 0, 1)],
+    "Long Put": [("PE", 0, 1)],
+    "Long Straddle": [("CE", 0, 1), ("PE", 0, 1)],
+    "Short Straddle": [("CE", 0, -1), ("PE", 0, -1)],
+    "Long Strangle": [("CE", 1, 1), ("PE", -1, 1)],
+    "Short Strangle": [("CE", 1, -1), ("PE", -1, -1)],
+    "Bull Call Spread": [("CE", 0, 1), ("CE", 1, -1)],
+    "Bear Put Spread": [("PE", 0, 1), ("PE", -1, -1)],
+    "Iron Condor": [("PE", -2, 1), ("PE", -1, -1), ("CE", 1, -1), ("CE", 2, 1)],
+    "Iron Butterfly": [("PE", -1, 1), ("PE", 0, -1), ("CE", 0, -1), ("CE", 1, 1)],
+}
+
+LEG_COLUMNS = ["Type", "Strike", "Qty", "Premium", "IV"]
+
+
+def build_strategy(name, df, spot, width=1, expiry=None, now=None):
+    """
+    Legs for a template from one expiry's chain (process_option_chain output).
+    width: Strike steps per template offset (e.g. 2 -> wings two strikes further out).
+    Premiums are the chain LTPs; IVs are solved from them (falling back to 20%).
+    Returns a DataFrame with LEG_COLUMNS.
+    """
+    if df.empty or name not in STRATEGY_TEMPLATES:
+        return pd.DataFrame(columns=LEG_COLUMNS)
+    strikes = df['Strike'].values
+    atm = int(np.argmin(np.abs(strikes - spot)))
+
+    rows = []
+    for opt_type, offset, qty in STRATEGY_TEMPLATES[name]:
+        i = int(np.clip(atm + offset * width, 0, len(strikes) - 1))
+        rows.append({"Type": opt_type, "Strike": strikes[i], "Qty": qty,
+                     "Premium": df[f'{opt_type} LTP'].values[i]})
+    legs = pd.DataFrame(rows, columns=LEG_COLUMNS[:-1])
+
+    T = time_to_expiry([expiry], now)[0] if expiry else 30 / 365
+    iv = implied_volatility(legs['Premium'].values, spot, legs['Strike'].values, T, RISK_FREE_RATE,
+                            legs['Type'].values == "CE")
+    legs['IV'] = np.where(np.isfinite(iv), iv, 0.20)
+    return legs
+
+
+def _leg_arrays(legs):
+    return (legs['Strike'].values.astype(float), legs['Qty'].values.astype(float),
+            legs['Premium'].values.astype(float), legs['Type'].values == "CE")
+
+
+def expiry_payoff(legs, prices, lot_size=1):
+    """
+    Profit/loss at expiry for each underlying price: one (prices x legs) broadcast of
+    intrinsic values, net of premiums, summed over legs with the leg quantities.
+    """
+    strikes, qty, premium, is_call = _leg_arrays(legs)
+    S = np.asarray(prices, dtype=float)[:, None]
+    intrinsic = np.where(is_call, np.maximum(S - strikes, 0), np.maximum(strikes - S, 0))
+    return (intrinsic - premium) @ qty * lot_size
+
+
+def pnl_grid(legs, prices, days_forward, vol_shifts, days_to_expiry, r=RISK_FREE_RATE, lot_size=1):
+    """
+    Black-Scholes mark-to-model P&L over a price x time x volatility grid.
+
+    prices: Underlying prices (P,).
+    days_forward: Calendar days from today (D,); values at/after expiry use intrinsic value.
+    vol_shifts: Absolute IV shifts added to every leg's IV (V,), e.g. -0.05 .. +0.05.
+    days_to_expiry: Days from today to expiry.
+    Returns an array (P, D, V), evaluated in one broadcast over (P, D, V, legs).
+    """
+    strikes, qty, premium, is_call = _leg_arrays(legs)
+    iv = legs['IV'].values.astype(float)
+
+    S = np.asarray(prices, dtype=float)[:, None, None, None]
+    T = np.maximum(days_to_expiry - np.asarray(days_forward, dtype=float), 0)[None, :, None, None] / 365
+    sigma = np.maximum(iv[None, None, None, :] + np.asarray(vol_shifts, dtype=float)[None, None, :, None], 0.01)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = bs_price(S, strikes, T, r, sigma, is_call)
+    intrinsic = np.where(is_call, np.maximum(S - strikes, 0), np.maximum(strikes - S, 0))
+    value = np.where(T > 0, value, intrinsic)
+    return ((value - premium) * qty).sum(axis=-1) * lot_size
+
+
+def strategy_metrics(legs, prices, lot_size=1):
+    """
+    Net premium, max profit/loss and breakevens from the expiry payoff on a price grid.
+    Max profit/loss also cover the payoff at every strike and at S = 0, so downside
+    extremes below the grid are reported as bounded values. Only the slope beyond the
+    highest price/strike can make profit or loss unlimited.
+    """
+    strikes, qty, premium, _ = _leg_arrays(legs)
+    prices = np.asarray(prices, dtype=float)
+    payoff = expiry_payoff(legs, prices, lot_size)
+    sign = np.sign(payoff)
+    cross = np.flatnonzero(sign[:-1] * sign[1:] < 0)
+    # Linear interpolation between the grid points around each sign change
+    p0, p1 = prices[cross], prices[cross + 1]
+    y0, y1 = payoff[cross], payoff[cross + 1]
+    breakevens = p0 - y0 * (p1 - p0) / (y1 - y0)
+
+    # The payoff is piecewise linear with kinks at the strikes: its extremes on [0, inf) are at
+    # S = 0, a strike or a grid point, plus the slope past the last kink
+    top = max(prices.max(), strikes.max())
+    extra = expiry_payoff(legs, np.r_[0.0, strikes, top, top + 1], lot_size)
+    upper_slope = extra[-1] - extra[-2]
+    points = np.r_[payoff, extra[:-1]]
+    return {
+        "net_premium": float(-(premium * qty).sum() * lot_size),  # + credit received, - debit paid
+        "max_profit": float(points.max()),
+        "max_loss": float(points.min()),
+        "breakevens": [float(b) for b in breakevens],
+        "unbounded_profit": bool(upper_slope > 1e-9),
+        "unbounded_loss": bool(upper_slope < -1e-9),
+    }
@@ -4,13 +4,22 @@ import pandas as pd
 import numpy as np
 import scipy.optimize as sco
 import plotly.graph_objects as go
+from analysis.risk_parity import risk_parity_weights, hrp_weights
+from analysis.downsampling import DEFAULT_MAX_POINTS, downsample_series, slice_window
+from analysis.compute_graph import ComputationGraph
+from analysis.rolling_correlation import rolling_correlation, correlation_regimes
+from analysis.rebalancer import integer_allocation, DEFAULT_COST_BPS
 try:
-    from pypfopt import expected_returns, risk_models, EfficientFrontier, objective_functions
+    from pypfopt import expected_returns, EfficientFrontier, objective_functions
     HAS_PYPFOPT = True
 except ImportError:
     HAS_PYPFOPT = False
     print("PyPortfolioOpt not found. Using fallback methods.")
 
+# Allocation methods offered in the Portfolio Study tab.
+# Risk Parity / HRP only need the covariance matrix and work without PyPortfolioOpt.
+ALLOCATION_METHODS = ["Mean-Variance", "Risk Parity", "Hierarchical Risk Parity"]
+
 class PortfolioManager:
     """
     A class to manage portfolio analysis, risk metric calculation, and capital allocation.
@@ -23,6 +32,27 @@ class PortfolioManager:
         self.data = pd.DataFrame()
         self.limiting_tickers = []
         self.risk_free_rate = 0.04 # Approximation for India 10Y or US 10Y depending on context, using constant for now
+        self.graph = self._build_graph()
+
+    def _build_graph(self):
+        """
+        Shared analytics as a lazy DAG. Every metric and chart reads from these nodes,
+        so a full Portfolio Study render computes each one at most once per fetch:
+
+            prices -> returns -> covariance
+                              -> correlation
+            prices -> wealth -> running_max -> drawdown
+        """
+        g = ComputationGraph()
+        g.add("prices", lambda: self.data)
+        g.add("returns", lambda prices: prices.pct_change().dropna(), deps=("prices",))
+        # Wealth index: growth of 1 unit invested on the first day (== cumprod of 1 + returns)
+        g.add("wealth", lambda prices: prices / prices.iloc[0], deps=("prices",))
+        g.add("running_max", lambda wealth: wealth.cummax(), deps=("wealth",))
+        g.add("drawdown", lambda wealth, peak: wealth / peak - 1, deps=("wealth", "running_max"))
+        g.add("covariance", lambda returns: returns.cov() * 252, deps=("returns",))
+        g.add("correlation", lambda returns: returns.corr(), deps=("returns",))
+        return g
 
     def fetch_data(self, period="2y"):
         """
@@ -63,6 +93,7 @@ class PortfolioManager:
 
             # Drop missing data
             self.data = self.data.dropna()
+            self.graph.invalidate()
             return self.data
         except Exception as e:
             print(f"Error fetching data: {e}")
@@ -76,8 +107,9 @@ class PortfolioManager:
         if self.data.empty:
             return pd.DataFrame()
 
-        # Daily Returns
-        daily_returns = self.data.pct_change().dropna()
+        # Daily Returns / Drawdowns (shared graph nodes)
+        daily_returns = self.graph.get("returns")
+        drawdowns = self.graph.get("drawdown")
         
         metrics = {}
         
@@ -103,10 +135,7 @@ class PortfolioManager:
                 sortino = 0.0
                 
             # Max Drawdown
-            cumulative = (1 + r).cumprod()
-            peak = cumulative.cummax()
-            drawdown = (cumulative - peak) / peak
-            max_drawdown = drawdown.min()
+            max_drawdown = drawdowns[ticker].min()
             
             # Calmar Ratio
             # Annualized Return / Abs(Max Drawdown)
@@ -167,15 +196,48 @@ class PortfolioManager:
         
         return pd.DataFrame(metrics).T, years_val, self.data.index[0], self.data.index[-1]
 
-    def allocate_capital(self, total_capital, risk_profile):
+    def get_rolling_correlation(self, window, step=1):
+        """
+        Rolling correlation matrices (dates, ndarray K x N x N) for a window, emitted every `step` rows.
+        Registered lazily as a graph node per (window, step) so reruns with the same
+        settings reuse the result and a re-fetch invalidates it with everything else.
+        """
+        name = f"rolling_corr_{window}_{step}"
+        if not self.graph.has_node(name):
+            self.graph.add(name, lambda returns: rolling_correlation(returns, window, step), deps=("returns",))
+        return self.graph.get(name)
+
+    def get_covariance(self):
+        """
+        Returns the annualized sample covariance of daily returns.
+        Computed once and reused by every allocator until data is re-fetched.
+        """
+        return self.graph.get("covariance")
+
+    def allocate_capital(self, total_capital, risk_profile, method="Mean-Variance"):
         """
         Allocates capital based on risk profile using Mean-Variance Optimization or Heuristics.
         
         risk_profile: 'Conservative', 'Moderate', 'Aggressive'
+        method: One of ALLOCATION_METHODS. 'Risk Parity' and 'Hierarchical Risk Parity'
+                are risk-based and ignore risk_profile.
         """
         if self.data.empty:
             return {}
 
+        if method in ("Risk Parity", "Hierarchical Risk Parity"):
+            try:
+                S = self.get_covariance()
+                if method == "Risk Parity":
+                    weights = risk_parity_weights(S)
+                else:
+                    weights = hrp_weights(S, corr=self.graph.get("correlation"))
+                return {ticker: round(w * total_capital, 2) for ticker, w in weights.items() if w > 0}
+            except Exception as e:
+                print(f"{method} allocation failed: {e}. Using equal weights.")
+                n = len(self.data.columns)
+                equal_weight = 1.0 / n
+                return {ticker: round(equal_weight * total_capital, 2) for ticker in self.data.columns}
     
         if not HAS_PYPFOPT:
             # Custom Score-Based Allocation
@@ -242,8 +304,8 @@ class PortfolioManager:
                 return {ticker: round(equal_weight * total_capital, 2) for ticker in self.data.columns}
 
         # Calculate expected returns and sample covariance
-        mu = expected_returns.mean_historical_return(self.data)
-        S = risk_models.sample_cov(self.data)
+        mu = expected_returns.mean_historical_return(self.graph.get("returns"), returns_data=True)
+        S = self.get_covariance()
 
         # Optimize for Maximal Sharpe Ratio
         ef = EfficientFrontier(mu, S)
@@ -279,6 +341,63 @@ class PortfolioManager:
             equal_weight = 1.0 / n
             return {ticker: round(equal_weight * total_capital, 2) for ticker in self.data.columns}
 
+    def allocate_shares(self, allocation, total_capital, holdings=None, lot_sizes=None,
+                        cost_bps=DEFAULT_COST_BPS, fee_per_order=0.0):
+        """
+        Turns the rupee allocation from allocate_capital into whole-lot share orders
+        at the latest prices, trading off tracking error (on the cached covariance) against costs.
+        
+        holdings: Optional {ticker: shares} already held; orders are the difference.
+            Holdings outside the portfolio are priced live and sold down (target weight 0).
+        lot_sizes: Optional {ticker: market lot}.
+        Returns (orders DataFrame, summary dict); see analysis.rebalancer.integer_allocation.
+        Raises ValueError if a held ticker has no price.
+        """
+        if self.data.empty or not allocation:
+            return pd.DataFrame(), {}
+        
+        weights = pd.Series(allocation, dtype=float)
+        weights = weights / weights.sum()
+        prices = self.data.ffill().iloc[-1]
+        
+        # Map holdings keyed by bare NSE symbols (RELIANCE) onto portfolio tickers (RELIANCE.NS);
+        # symbols outside the portfolio become Yahoo tickers so they can be priced
+        if holdings:
+            bare = {t.upper().replace('.NS', ''): t for t in weights.index}
+            mapped = {}
+            for symbol, shares in holdings.items():
+                ticker = symbol if symbol in weights.index else bare.get(symbol)
+                if ticker is None:
+                    ticker = symbol if symbol.endswith(('.NS', '.BO')) or symbol.startswith('^') else f"{symbol}.NS"
+                mapped[ticker] = mapped.get(ticker, 0) + shares
+            holdings = mapped
+            extra = [t for t, shares in holdings.items() if shares > 0 and t not in prices.index]
+            if extra:
+                prices = pd.concat([prices, self._latest_prices(extra)])
+        
+        return integer_allocation(
+            weights,
+            prices,
+            total_capital,
+            lot_sizes=lot_sizes,
+            holdings=holdings,
+            cov=self.get_covariance(),
+            cost_bps=cost_bps,
+            fee_per_order=fee_per_order
+        )
+
+    @staticmethod
+    def _latest_prices(tickers):
+        """Latest close for tickers outside the fetched portfolio (e.g. stale holdings)."""
+        try:
+            data = yf.download(tickers, period="5d", auto_adjust=True, progress=False)['Close']
+            if isinstance(data, pd.Series):
+                data = data.to_frame(tickers[0])
+            return data.ffill().iloc[-1].reindex(tickers)
+        except Exception as e:
+            print(f"Error fetching prices for holdings {tickers}: {e}")
+            return pd.Series(np.nan, index=tickers)
+
     def plot_portfolio(self, allocation, current_metrics, ticker_map=None):
         """
         Returns Plotly figures for Allocation (Donut) and Comparison (Bar).
@@ -311,10 +430,12 @@ class PortfolioManager:
         
         return fig_donut, fig_bar
 
-    def plot_performance_charts(self, ticker_map=None):
+    def plot_performance_charts(self, ticker_map=None, window=None, max_points=DEFAULT_MAX_POINTS):
         """
         Returns two Plotly figures: Normalized Performance and Raw Prices.
         ticker_map: Dictionary mapping ticker symbols to human-readable names.
+        window: Optional (start, end) zoom range; traces are sliced to it before downsampling.
+        max_points: Per-trace point budget sent to the browser.
         """
         if self.data.empty:
             return None, None
@@ -326,11 +447,14 @@ class PortfolioManager:
             return ticker_map.get(ticker, ticker)
 
         # 1. Normalized Chart (Base 100)
-        normalized_data = self.data / self.data.iloc[0] * 100
+        normalized_data = self.graph.get("wealth") * 100
+        
+        normalized_data = slice_window(normalized_data, window)
         
         fig_norm = go.Figure()
         for col in normalized_data.columns:
-            fig_norm.add_trace(go.Scatter(x=normalized_data.index, y=normalized_data[col], mode='lines', name=get_name(col)))
+            trace = downsample_series(normalized_data[col], max_points)
+            fig_norm.add_trace(go.Scatter(x=trace.index, y=trace, mode='lines', name=get_name(col)))
             
         fig_norm.update_layout(
             title="Portfolio Components Performance (Rebased to 100)",
@@ -341,14 +465,15 @@ class PortfolioManager:
         
         
         # 2. Daily Returns Chart (replacing Raw Prices)
-        daily_returns = self.data.pct_change() * 100
-        daily_returns = daily_returns.dropna() # First row will be NaN
+        daily_returns = slice_window(self.graph.get("returns"), window) * 100
         
         fig_raw = go.Figure() # Variable name kept same to avoid breaking UI unpacking for now, but logic changed
         for col in daily_returns.columns:
+            # Min-max keeps every spike, which is the point of a volatility view
+            trace = downsample_series(daily_returns[col], max_points, method="minmax")
             fig_raw.add_trace(go.Scatter(
-                x=daily_returns.index, 
-                y=daily_returns[col], 
+                x=trace.index, 
+                y=trace, 
                 mode='lines', 
                 name=get_name(col), 
                 visible='legendonly',
@@ -365,9 +490,10 @@ class PortfolioManager:
         
         return fig_norm, fig_raw
 
-    def plot_drawdown_chart(self, ticker_map=None):
+    def plot_drawdown_chart(self, ticker_map=None, window=None, max_points=DEFAULT_MAX_POINTS):
         """
         Returns a Plotly figure showing historical drawdowns (%).
+        window / max_points: Zoom range and per-trace point budget, as in plot_performance_charts.
         """
         if self.data.empty:
             return None
@@ -378,16 +504,16 @@ class PortfolioManager:
         def get_name(ticker):
             return ticker_map.get(ticker, ticker)
 
-        # Calculate Drawdown
         # Drawdown = (Price - Rolling Max) / Rolling Max
-        rolling_max = self.data.cummax()
-        drawdown = (self.data - rolling_max) / rolling_max * 100
+        drawdown = slice_window(self.graph.get("drawdown"), window) * 100
         
         fig_dd = go.Figure()
         for col in drawdown.columns:
+            # Min-max so the trough of every drawdown survives downsampling
+            trace = downsample_series(drawdown[col], max_points, method="minmax")
             fig_dd.add_trace(go.Scatter(
-                x=drawdown.index, 
-                y=drawdown[col], 
+                x=trace.index, 
+                y=trace, 
                 mode='lines', 
                 name=get_name(col),
                 hovertemplate='%{y:.2f}%'
@@ -415,9 +541,8 @@ class PortfolioManager:
         def get_name(ticker):
             return ticker_map.get(ticker, ticker)
             
-        # Calculate Correlation of Daily Returns
-        returns = self.data.pct_change().dropna()
-        corr_matrix = returns.corr()
+        # Correlation of Daily Returns
+        corr_matrix = self.graph.get("correlation")
         
         # Rename index/columns for display
         display_labels = [get_name(t) for t in corr_matrix.index]
@@ -441,3 +566,87 @@ class PortfolioManager:
         )
         
         return fig
+
+    def plot_rolling_correlation(self, window=120, ticker_map=None, frame_step=21, regime_step=5):
+        """
+        Returns two Plotly figures for the rolling correlation study:
+        1. Diversification regime view: average pairwise correlation and effective number
+           of independent bets over time, coloured by regime.
+        2. Animated correlation heatmap with one frame every `frame_step` trading days (~monthly).
+        window: Rolling window in trading days.
+        """
+        if self.data.empty or len(self.data.columns) < 2:
+            return None, None
+            
+        if ticker_map is None:
+            ticker_map = {}
+            
+        def get_name(ticker):
+            return ticker_map.get(ticker, ticker)
+        
+        # 1. Regime View
+        dates, corr = self.get_rolling_correlation(window, regime_step)
+        if len(dates) == 0:
+            return None, None
+        regimes = correlation_regimes(dates, corr)
+        
+        regime_colors = {"Diversified": "green", "Normal": "orange", "High Correlation": "red"}
+        fig_regime = go.Figure()
+        fig_regime.add_trace(go.Scatter(
+            x=regimes.index, y=regimes["Avg Correlation"], mode='lines',
+            name="Avg Pairwise Correlation", line=dict(color='gray', width=1)
+        ))
+        for regime, color in regime_colors.items():
+            part = regimes[regimes["Regime"] == regime]
+            fig_regime.add_trace(go.Scatter(
+                x=part.index, y=part["Avg Correlation"], mode='markers',
+                name=regime, marker=dict(color=color, size=4)
+            ))
+        fig_regime.add_trace(go.Scatter(
+            x=regimes.index, y=regimes["Effective Bets"], mode='lines',
+            name="Effective Bets", line=dict(color='purple', dash='dot'), yaxis='y2'
+        ))
+        fig_regime.update_layout(
+            title=f"Diversification Regimes ({window}-Day Rolling Correlation)",
+            xaxis_title="Date",
+            yaxis=dict(title="Avg Correlation"),
+            yaxis2=dict(title="Effective Independent Bets", overlaying='y', side='right'),
+            hovermode="x unified",
+            legend=dict(orientation="h", y=1.1)
+        )
+        
+        # 2. Animated Heatmap
+        frame_dates, frame_corr = self.get_rolling_correlation(window, frame_step)
+        labels = [get_name(t) for t in self.data.columns]
+        frame_corr = np.round(frame_corr, 2) # Trim payload; 2 decimals is all the colour scale can show
+        frame_names = [d.strftime('%Y-%m-%d') for d in frame_dates]
+        
+        def heatmap(z):
+            return go.Heatmap(z=z, x=labels, y=labels, colorscale='RdBu', zmin=-1, zmax=1)
+        
+        fig_anim = go.Figure(
+            data=[heatmap(frame_corr[-1])],
+            frames=[go.Frame(data=[heatmap(z)], name=name) for z, name in zip(frame_corr, frame_names)]
+        )
+        fig_anim.update_layout(
+            title=f"Rolling Correlation Matrix ({window}-Day Window)",
+            height=650,
+            updatemenus=[dict(
+                type="buttons", showactive=False, x=0, y=-0.08, xanchor="left",
+                buttons=[
+                    dict(label="▶ Play", method="animate",
+                         args=[None, dict(frame=dict(duration=150, redraw=True), fromcurrent=True)]),
+                    dict(label="⏸ Pause", method="animate",
+                         args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")])
+                ]
+            )],
+            sliders=[dict(
+                active=len(frame_names) - 1, x=0.15, len=0.85, y=-0.05,
+                currentvalue=dict(prefix="Window ending: "),
+                steps=[dict(method="animate", label=name,
+                            args=[[name], dict(mode="immediate", frame=dict(duration=0, redraw=True))])
+                       for name in frame_names]
+            )]
+        )
+        
+        return fig_regime, fig_anim
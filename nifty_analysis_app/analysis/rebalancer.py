@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+# Approximate round-trip-agnostic cost of an NSE delivery trade, in basis points of traded value
+# (STT 0.1% + exchange, SEBI and stamp charges). Brokerage is modelled separately per order.
+DEFAULT_COST_BPS = 12.0
+
+# Annualized variance used when no covariance is supplied (~20% volatility, uncorrelated)
+_DEFAULT_VARIANCE = 0.04
+
+
+def load_holdings(file):
+    """
+    Reads an existing holdings CSV (path or uploaded file buffer).
+    Accepts a symbol column named Symbol / SYMBOL / Ticker and a share count column
+    named Shares / Quantity / Qty. Returns {symbol: shares}.
+    """
+    df = pd.read_csv(file)
+    df.columns = [c.strip() for c in df.columns]
+
+    symbol_col = next((c for c in df.columns if c.lower() in ("symbol", "ticker")), None)
+    shares_col = next((c for c in df.columns if c.lower() in ("shares", "quantity", "qty")), None)
+    if symbol_col is None or shares_col is None:
+        raise ValueError("Holdings file needs a Symbol/Ticker column and a Shares/Quantity column.")
+
+    df[symbol_col] = df[symbol_col].astype(str).str.strip().str.upper()
+    df[shares_col] = pd.to_numeric(df[shares_col], errors="coerce").fillna(0)
+    return df.groupby(symbol_col)[shares_col].sum().to_dict()
+
+
+def integer_allocation(target_weights, prices, capital, lot_sizes=None, holdings=None, cov=None,
+                       cost_bps=DEFAULT_COST_BPS, fee_per_order=0.0, cost_aversion=1.0, max_iter=None):
+    """
+    Converts target weights into whole-lot share counts, trading off tracking error against costs.
+
+    Minimizes   TE + cost_aversion * cost / budget,   TE = sqrt((w - w*)' Σ (w - w*))
+    subject to  sum(shares * price) + cost <= budget,  shares >= 0,  shares a multiple of the lot size.
+
+    w are the weights implied by the share counts, w* the targets, and
+    cost = cost_bps * |traded value| + fee_per_order * number of orders.
+    Both terms are in return units: a trade is only worth its cost if it cuts
+    annualized tracking error by more than the cost as a fraction of the budget.
+    budget = capital + market value of every existing holding.
+
+    Holdings outside the target basket are included with a target weight of 0, so they
+    get sell orders (and their sale costs count) unless keeping a lot is cheaper.
+
+    Solved by rounding the continuous targets down to lots and then running greedy
+    one-lot buy/sell moves, picking the best improvement each step. Each step scores
+    every asset at once in O(N) with an incrementally maintained Σ(w - w*),
+    so 100+ asset baskets finish in milliseconds without a MIP solver.
+
+    target_weights: Series/dict {ticker: weight}.
+    prices: Series/dict of latest prices, including any held tickers outside the basket.
+    lot_sizes: Optional {ticker: lot}; missing tickers trade in lots of 1.
+    holdings: Optional {ticker: shares currently held}.
+    cov: Optional annualized covariance DataFrame; a diagonal 20%-vol proxy is used otherwise
+        (and for tickers missing from cov).
+    Returns (orders DataFrame indexed by ticker, summary dict).
+    """
+    w_target = pd.Series(target_weights, dtype=float)
+    held_all = pd.Series(holdings or {}, dtype=float)
+    off_basket = held_all.index[(held_all > 0).values & ~held_all.index.isin(w_target.index)]
+    tickers = w_target.index.append(off_basket)
+    w_target = w_target.reindex(tickers).fillna(0.0)
+    p = pd.Series(prices, dtype=float).reindex(tickers).values
+    lots = pd.Series(lot_sizes or {}, dtype=float).reindex(tickers).fillna(1).clip(lower=1).values
+    held = pd.Series(holdings or {}, dtype=float).reindex(tickers).fillna(0).values
+
+    if np.any(~np.isfinite(p) | (p <= 0)):
+        bad = list(tickers[~np.isfinite(p) | (p <= 0)])
+        raise ValueError(f"Missing or invalid prices for: {bad}")
+
+    if cov is not None:
+        # Tickers without history in cov get the proxy variance and no correlation
+        sigma = np.asarray(cov.reindex(index=tickers, columns=tickers), dtype=float)
+        missing = np.isnan(np.diag(sigma))
+        sigma = np.nan_to_num(sigma)
+        sigma[missing, missing] = _DEFAULT_VARIANCE
+    else:
+        sigma = np.eye(len(tickers)) * _DEFAULT_VARIANCE
+    sigma_diag = np.diag(sigma)
+
+    budget = float(capital) + float(held @ p)
+    rate = cost_bps / 10000.0
+    w_star = w_target.values / w_target.values.sum()
+
+    def order_cost(q):
+        traded = np.abs(q - held)
+        return rate * traded * p + fee_per_order * (traded > 0)
+
+    # 1. Continuous targets rounded down to whole lots
+    q = np.floor(w_star * budget / p / lots) * lots
+    costs = order_cost(q)
+    # Shrink proportionally if costs push the starting point over budget
+    while q @ p + costs.sum() > budget and q.sum() > 0:
+        i = int(np.argmax(q * p))
+        q[i] -= lots[i]
+        costs = order_cost(q)
+
+    d = q * p / budget - w_star
+    grad = sigma @ d  # Σ(w - w*), kept in sync with rank-1 updates
+    var = float(d @ grad)
+    spent = q @ p + costs.sum()
+
+    lot_value = lots * p
+    delta_w = lot_value / budget
+    n_iter = max_iter if max_iter is not None else 20 * len(tickers) + 1000
+
+    # 2. Greedy one-lot moves
+    for _ in range(n_iter):
+        te = np.sqrt(max(var, 0.0))
+
+        # Buy one lot of each asset: change in variance is 2 g_i δ_i + Σ_ii δ_i^2
+        buy_var = 2 * grad * delta_w + sigma_diag * delta_w ** 2
+        buy_cost = order_cost(q + lots) - costs
+        buy_gain = np.sqrt(np.clip(var + buy_var, 0, None)) - te + cost_aversion * buy_cost / budget
+        buy_gain[spent + lot_value + buy_cost > budget] = np.inf
+
+        # Sell one lot of each asset
+        sell_var = -2 * grad * delta_w + sigma_diag * delta_w ** 2
+        sell_cost = order_cost(q - lots) - costs
+        sell_gain = np.sqrt(np.clip(var + sell_var, 0, None)) - te + cost_aversion * sell_cost / budget
+        sell_gain[q < lots] = np.inf
+
+        i_buy, i_sell = int(np.argmin(buy_gain)), int(np.argmin(sell_gain))
+        best = min(buy_gain[i_buy], sell_gain[i_sell])
+        if not best < -1e-15:
+            break
+
+        if buy_gain[i_buy] <= sell_gain[i_sell]:
+            i, step = i_buy, 1.0
+            var += buy_var[i]
+        else:
+            i, step = i_sell, -1.0
+            var += sell_var[i]
+
+        q[i] += step * lots[i]
+        grad += sigma[:, i] * step * delta_w[i]
+        new_cost = rate * abs(q[i] - held[i]) * p[i] + fee_per_order * (q[i] != held[i])
+        spent += step * lot_value[i] + new_cost - costs[i]
+        costs[i] = new_cost
+
+    w_final = q * p / budget
+    active = w_final - w_star
+    orders = pd.DataFrame({
+        "Price": p,
+        "Lot Size": lots.astype(int),
+        "Held Shares": held.astype(int),
+        "Target Shares": q.astype(int),
+        "Trade Shares": (q - held).astype(int),
+        "Trade Value": (q - held) * p,
+        "Est. Cost": costs,
+        "Target Weight (%)": w_star * 100,
+        "Final Weight (%)": w_final * 100,
+    }, index=tickers)
+
+    summary = {
+        "budget": budget,
+        "invested": float(q @ p),
+        "total_cost": float(costs.sum()),
+        "cash_left": float(budget - q @ p - costs.sum()),
+        "tracking_error": float(np.sqrt(max(active @ sigma @ active, 0.0))),
+        "orders": int((q != held).sum()),
+    }
+    return orders, summary
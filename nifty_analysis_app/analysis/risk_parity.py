@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.spatial.distance import squareform
+
+
+def risk_parity_weights(cov, max_iter=500, tol=1e-10):
+    """
+    Equal Risk Contribution (ERC) weights: every asset contributes the same
+    share of total portfolio variance.
+
+    Solved with cyclical coordinate descent on
+        min 0.5 * x'Σx - (1/n) * sum(log x)
+    whose solution, rescaled to sum to 1, is the ERC portfolio.
+    Each coordinate step has a closed form, so no QP solver is needed.
+
+    cov: Covariance matrix (DataFrame, tickers on both axes).
+    Returns a pd.Series of weights (long-only, summing to 1).
+    """
+    tickers = cov.index
+    sigma = np.asarray(cov, dtype=float)
+    n = sigma.shape[0]
+    if n == 0:
+        return pd.Series(dtype=float)
+    if n == 1:
+        return pd.Series([1.0], index=tickers)
+
+    diag = np.diag(sigma).copy()
+    # Guard against zero-variance assets (e.g. stale prices)
+    diag[diag <= 0] = 1e-12
+    budget = 1.0 / n
+
+    # Start from inverse volatility, already close to ERC for low correlations
+    x = 1.0 / np.sqrt(diag)
+    sigma_x = sigma @ x
+
+    for _ in range(max_iter):
+        x_prev = x.copy()
+        for i in range(n):
+            # Cross term: (Σx)_i without the asset's own contribution
+            c = sigma_x[i] - diag[i] * x[i]
+            new_xi = (-c + np.sqrt(c * c + 4 * diag[i] * budget)) / (2 * diag[i])
+            # Keep Σx in sync with a rank-1 update instead of a full matvec
+            sigma_x += sigma[:, i] * (new_xi - x[i])
+            x[i] = new_xi
+        if np.max(np.abs(x - x_prev)) < tol * np.max(x):
+            break
+
+    weights = x / x.sum()
+    return pd.Series(weights, index=tickers)
+
+
+def hrp_weights(cov, corr=None):
+    """
+    Hierarchical Risk Parity (Lopez de Prado, 2016).
+
+    1. Tree clustering: single-linkage on the correlation distance sqrt((1 - rho) / 2).
+    2. Quasi-diagonalization: reorder assets by the dendrogram leaves.
+    3. Recursive bisection: split capital between the two halves of every
+       cluster in inverse proportion to their (inverse-variance) cluster variance.
+
+    Needs no matrix inversion or optimizer, so it stays fast and stable for
+    hundreds of assets even when the covariance matrix is near singular.
+
+    cov: Covariance matrix (DataFrame).
+    corr: Optional correlation matrix; derived from cov if not supplied.
+    Returns a pd.Series of weights (long-only, summing to 1).
+    """
+    tickers = cov.index
+    sigma = np.asarray(cov, dtype=float)
+    n = sigma.shape[0]
+    if n == 0:
+        return pd.Series(dtype=float)
+    if n == 1:
+        return pd.Series([1.0], index=tickers)
+
+    if corr is None:
+        std = np.sqrt(np.clip(np.diag(sigma), 1e-12, None))
+        rho = sigma / np.outer(std, std)
+    else:
+        rho = np.asarray(corr.loc[tickers, tickers], dtype=float)
+    rho = np.clip(np.nan_to_num(rho), -1.0, 1.0)
+
+    # 1. Tree Clustering
+    dist = np.sqrt(0.5 * (1.0 - rho))
+    np.fill_diagonal(dist, 0.0)
+    link = linkage(squareform(dist, checks=False), method="single")
+
+    # 2. Quasi-Diagonalization
+    order = leaves_list(link)
+
+    # 3. Recursive Bisection
+    diag = np.clip(np.diag(sigma), 1e-12, None)
+    weights = np.ones(n)
+    clusters = [order]
+    while clusters:
+        next_clusters = []
+        for cluster in clusters:
+            if len(cluster) <= 1:
+                continue
+            half = len(cluster) // 2
+            left, right = cluster[:half], cluster[half:]
+            var_left = _cluster_variance(sigma, diag, left)
+            var_right = _cluster_variance(sigma, diag, right)
+            alpha = 1.0 - var_left / (var_left + var_right)
+            weights[left] *= alpha
+            weights[right] *= 1.0 - alpha
+            next_clusters.extend([left, right])
+        clusters = next_clusters
+
+    return pd.Series(weights / weights.sum(), index=tickers)
+
+
+def _cluster_variance(sigma, diag, idx):
+    """Variance of the inverse-variance portfolio of a cluster."""
+    ivp = 1.0 / diag[idx]
+    ivp /= ivp.sum()
+    sub = sigma[np.ix_(idx, idx)]
+    return float(ivp @ sub @ ivp)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Rolling windows (trading days) offered in the Portfolio Study tab: ~quarter, ~half-year, ~year
+ROLLING_WINDOWS = [60, 120, 250]
+
+# Exact recompute interval for the running sums, bounding floating point drift of the rank-1 updates
+_RESYNC_EVERY = 500
+
+
+def rolling_correlation(returns, window, step=1):
+    """
+    Rolling-window correlation matrices computed with an incremental covariance update.
+
+    Instead of calling .corr() on every window (O(T * w * N^2)), a running sum of
+    returns and of their outer products is kept. Each day adds the new return
+    vector and drops the one leaving the window (two rank-1 updates, O(N^2)),
+    so the whole history costs O(T * N^2).
+
+    returns: DataFrame of daily returns (dates x assets), no NaNs.
+    window: Window length in rows.
+    step: Emit a matrix every `step` rows (e.g. 5 for weekly frames); the last row is always emitted.
+    Returns (dates: DatetimeIndex, corr: ndarray of shape (K, N, N)).
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    t_len, n = x.shape
+    if window < 2 or t_len < window:
+        return returns.index[:0], np.empty((0, n, n))
+
+    # Demean with the full-period mean: covariance is shift-invariant and the
+    # running sums stay small, which keeps the add/drop updates accurate.
+    x = x - x.mean(axis=0)
+
+    ends = np.arange(window - 1, t_len, step)
+    if ends[-1] != t_len - 1:
+        ends = np.append(ends, t_len - 1)
+    emit = np.zeros(t_len, dtype=bool)
+    emit[ends] = True
+
+    out = np.empty((len(ends), n, n))
+    k = 0
+
+    s1 = x[:window].sum(axis=0)
+    s2 = x[:window].T @ x[:window]
+
+    for end in range(window - 1, t_len):
+        if end >= window:
+            if (end - window) % _RESYNC_EVERY == 0:
+                block = x[end - window + 1:end + 1]
+                s1 = block.sum(axis=0)
+                s2 = block.T @ block
+            else:
+                new, old = x[end], x[end - window]
+                s1 += new - old
+                s2 += np.outer(new, new) - np.outer(old, old)
+
+        if emit[end]:
+            cov = (s2 - np.outer(s1, s1) / window) / (window - 1)
+            std = np.sqrt(np.clip(np.diag(cov), 1e-18, None))
+            out[k] = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+            k += 1
+
+    return returns.index[ends], out
+
+
+def correlation_regimes(dates, corr):
+    """
+    Summarizes a stack of correlation matrices into a diversification time series.
+
+    Avg Correlation: Mean off-diagonal correlation.
+    Absorption Ratio: Share of total variance explained by the first principal component.
+        High values mean one common factor drives everything (little diversification).
+    Effective Bets: (sum eigenvalues)^2 / sum(eigenvalues^2), i.e. how many independent
+        assets the basket behaves like (1 = one asset, N = fully diversified).
+    Regime: Tercile of Avg Correlation over the period:
+        'Diversified', 'Normal', 'High Correlation'.
+    """
+    if len(corr) == 0:
+        return pd.DataFrame(columns=["Avg Correlation", "Absorption Ratio", "Effective Bets", "Regime"])
+
+    n = corr.shape[1]
+    off_diag_sum = corr.sum(axis=(1, 2)) - n
+    avg_corr = off_diag_sum / (n * (n - 1)) if n > 1 else np.zeros(len(corr))
+
+    # Batched symmetric eigen-decomposition of all frames at once
+    eig = np.clip(np.linalg.eigvalsh(corr), 0, None)
+    absorption = eig[:, -1] / eig.sum(axis=1)
+    effective_bets = eig.sum(axis=1) ** 2 / (eig ** 2).sum(axis=1)
+
+    df = pd.DataFrame({
+        "Avg Correlation": avg_corr,
+        "Absorption Ratio": absorption,
+        "Effective Bets": effective_bets,
+    }, index=dates)
+
+    lo, hi = np.nanquantile(avg_corr, [1 / 3, 2 / 3])
+    df["Regime"] = np.select(
+        [avg_corr <= lo, avg_corr >= hi],
+        ["Diversified", "High Correlation"],
+        default="Normal"
+    )
+    return df
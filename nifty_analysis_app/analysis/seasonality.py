@@ -1,5 +1,6 @@
 import pandas as pd
-import calendar
+import numpy as np
+from analysis.calendar_features import add_calendar_codes, month_names, month_number, MONTH_NAMES
 
 def analyze_seasonality_advanced(df):
     """
@@ -20,56 +21,34 @@ def analyze_seasonality_advanced(df):
     # Simple percentage change
     monthly_returns = monthly_prices.pct_change()
     
-    # Create a DataFrame for processing
-    m_df = pd.DataFrame(monthly_returns).rename(columns={'Close': 'Return'})
-    m_df['Year'] = m_df.index.year
-    m_df['Month'] = m_df.index.month
+    # Create a DataFrame for processing (integer calendar codes)
+    m_df = add_calendar_codes(pd.DataFrame(monthly_returns).rename(columns={'Close': 'Return'}))
     
     # Filter out the first row (NaN from pct_change)
-    m_df = m_df.dropna()
+    m_df = m_df.dropna(subset=['Return'])
 
     # --- 1. PIVOT TABLE (for Heatmap) ---
     pivot_table = m_df.pivot(index='Month', columns='Year', values='Return')
     
-    # Sort index reverse (Dec at bottom? User asked Jan at top, Dec at bottom. 
-    # Standard pivot puts 1 at top. So that's correct.)
-    
-    # Transform index to Month Names
-    month_names = {i: calendar.month_name[i] for i in range(1, 13)}
-    pivot_table.index = pivot_table.index.map(month_names)
-    
-    # Ensure all 12 months are present in order
-    ordered_months = list(calendar.month_name)[1:]
-    pivot_table = pivot_table.reindex(ordered_months)
+    # Jan at top, Dec at bottom; all 12 months present, named for display
+    pivot_table = month_names(pivot_table)
 
     # --- 2. STATISTICS TABLE ---
-    stats = []
-    
-    for month_num in range(1, 13):
-        month_name = calendar.month_name[month_num]
-        month_data = m_df[m_df['Month'] == month_num]['Return']
-        
-        count = len(month_data)
-        if count == 0:
-            stats.append({'Month': month_name, 'Pos': 0, 'Neg': 0, 'Win Rate': 0, 'Avg %': 0, 'Total %': 0})
-            continue
-            
-        pos_count = (month_data > 0).sum()
-        neg_count = (month_data < 0).sum()
-        win_rate = pos_count / count
-        avg_ret = month_data.mean()
-        total_ret = month_data.sum()
-        
-        stats.append({
-            'Month': month_name, 
-            'Pos': pos_count, 
-            'Neg': neg_count, 
-            'Win Rate': win_rate, 
-            'Avg %': avg_ret, 
-            'Total %': total_ret
-        })
-    
-    stats_df = pd.DataFrame(stats).set_index('Month')
+    # One groupby on the integer month key instead of a loop over 12 boolean filters
+    ret = m_df['Return']
+    grouped = pd.DataFrame({
+        'Pos': (ret > 0).astype(int),
+        'Neg': (ret < 0).astype(int),
+        'Win Rate': ret > 0,
+        'Avg %': ret,
+        'Total %': ret,
+    }).groupby(m_df['Month'])
+    stats_df = grouped.agg({'Pos': 'sum', 'Neg': 'sum', 'Win Rate': 'mean', 'Avg %': 'mean', 'Total %': 'sum'})
+    
+    # Months without data report zeros
+    stats_df = month_names(stats_df).fillna(0)
+    stats_df[['Pos', 'Neg']] = stats_df[['Pos', 'Neg']].astype(int)
+    stats_df.index.name = 'Month'
     
     return pivot_table, stats_df
 
@@ -88,24 +67,11 @@ def prepare_weekly_data(df):
     Week 3: Days 15-21
     Week 4: Days 22-28
     Week 5: Days 29-End
+    Returns integer-keyed rows: Year, Month (1-12), Week (1-5), Return.
     """
     if df.empty: return pd.DataFrame()
     
-    w_df = df.copy()
-    w_df['Day'] = w_df.index.day
-    w_df['Month'] = w_df.index.month
-    w_df['Year'] = w_df.index.year
-    w_df['Month_Name'] = w_df.index.strftime('%B')
-    
-    # Week of Month Logic
-    def get_week_of_month(day):
-        if day <= 7: return 1
-        elif day <= 14: return 2
-        elif day <= 21: return 3
-        elif day <= 28: return 4
-        else: return 5
-        
-    w_df['Week'] = w_df['Day'].apply(get_week_of_month)
+    w_df = add_calendar_codes(df[['Close']])
     w_df['Return'] = w_df['Close'].pct_change()
     
     # Filter out the very first row NaN from pct_change
@@ -114,76 +80,180 @@ def prepare_weekly_data(df):
     # Use Sum of returns for the week/month/year grouping?
     # Actually for "Week of Month Analysis" usually users want to see "How does the market perform in Week 1 of Jan?"
     # So we group by Month+Week across all years.
-    weekly = w_df.groupby(['Year', 'Month', 'Month_Name', 'Week'])['Return'].sum().reset_index()
+    weekly = w_df.groupby(['Year', 'Month', 'Week'])['Return'].sum().reset_index()
     
     return weekly
 
 def analyze_daily_seasonality(df):
     """
-    Analyzes seasonality by specific Day of Month (1-31).
-    Returns a Pivot Table (Month x Day) and Heatmap Data.
+    Analyzes seasonality by specific Day of Month (1-31), over sessions where every column
+    of df is present. Returns a Pivot Table (Month x Day) and Heatmap Data.
     """
     if df.empty: return pd.DataFrame()
     
-    d_df = df.copy()
-    d_df['Day'] = d_df.index.day
-    d_df['Month_Name'] = d_df.index.strftime('%B')
+    d_df = add_calendar_codes(df[['Close']])
     d_df['Return'] = d_df['Close'].pct_change()
-    d_df = d_df.dropna()
+    # Rows with any missing input column are dropped too (e.g. the warm-up rows of
+    # SMA/RSI columns), so only sessions with complete data are averaged
+    d_df = d_df[d_df['Return'].notna() & df.notna().all(axis=1).values]
     
     # Group by Month + Day (Average Daily Return for that specific day across all years)
     # e.g. Average return of "Jan 1st" across 10 years.
-    daily_stats = d_df.groupby(['Month_Name', 'Day'])['Return'].mean().reset_index()
-    
-    # Pivot: Index=Month_Name, Columns=Day (1-31), Values=Avg Return
-    pivot = daily_stats.pivot(index='Month_Name', columns='Day', values='Return')
+    daily_stats = d_df.groupby(['Month', 'Day'])['Return'].mean()
     
-    # Sort Months
-    ordered_months = list(calendar.month_name)[1:]
-    pivot = pivot.reindex(ordered_months)
+    # Pivot: Index=Month, Columns=Day (1-31), Values=Avg Return; months named for display
+    pivot = month_names(daily_stats.unstack('Day'))
     
     return pivot
 
-def get_yearly_drilldown(weekly_df, selected_year):
+class WeeklyCube:
     """
-    Filters for year. Returns Pivot (Month x Week) and Monthly Totals.
+    Weekly returns of one symbol as a dense (year x month x week) array, built once from
+    prepare_weekly_data output. Drilldowns are slices of it, so switching the selected
+    year or month never re-filters or re-pivots the weekly frame.
     """
-    if weekly_df.empty: return pd.DataFrame(), pd.DataFrame()
-    
-    data = weekly_df[weekly_df['Year'] == selected_year]
-    
-    # Pivot: Index=Month_Name, Columns=Week, Values=Return
-    pivot = data.pivot(index='Month_Name', columns='Week', values='Return')
+    def __init__(self, years, values):
+        self.years = np.asarray(years)
+        self.values = values
+        self._year_pos = {int(y): i for i, y in enumerate(self.years)}
+
+    @classmethod
+    def from_weekly(cls, weekly_df):
+        if weekly_df.empty:
+            return cls([], np.empty((0, 12, 5)))
+        years = np.arange(weekly_df['Year'].min(), weekly_df['Year'].max() + 1)
+        values = np.full((len(years), 12, 5), np.nan)
+        values[weekly_df['Year'].values - years[0], weekly_df['Month'].values - 1, weekly_df['Week'].values - 1] = weekly_df['Return'].values
+        return cls(years, values)
+
+    @property
+    def empty(self):
+        return self.values.size == 0
+
+    def year_slice(self, year):
+        """(12 x 5) months x weeks for one year, or None if the year is not covered."""
+        i = self._year_pos.get(int(year))
+        return None if i is None else self.values[i]
+
+    def month_slice(self, month):
+        """(years x 5) for one calendar month (1-12)."""
+        return self.values[:, month - 1, :]
+
+def _as_cube(weekly):
+    return weekly if isinstance(weekly, WeeklyCube) else WeeklyCube.from_weekly(weekly)
+
+def _nan_sum(values, axis):
+    """Sum that stays NaN where every value is NaN (no data), like a groupby over missing rows."""
+    has_data = ~np.all(np.isnan(values), axis=axis)
+    return np.where(has_data, np.nansum(values, axis=axis), np.nan)
+
+def get_yearly_drilldown(weekly, selected_year):
+    """
+    Slices one year. Returns Pivot (Month x Week) and Monthly Totals.
+    weekly: WeeklyCube (or prepare_weekly_data output, converted on the fly).
+    """
+    cube = _as_cube(weekly)
+    block = None if cube.empty else cube.year_slice(selected_year)
+    if block is None: return pd.DataFrame(), pd.DataFrame()
     
-    # Sort Months
-    ordered_months = list(calendar.month_name)[1:]
-    pivot = pivot.reindex(ordered_months)
+    # Pivot: Index=Month, Columns=Week (weeks that occurred that year), Values=Return
+    pivot = pd.DataFrame(block, index=MONTH_NAMES, columns=pd.Index(range(1, 6), name='Week'))
+    pivot = pivot.loc[:, pivot.notna().any()]
+    pivot.index.name = 'Month'
     
     # Stats: Total Return per Month
-    stats = data.groupby('Month_Name')['Return'].sum().reindex(ordered_months)
+    stats = pd.Series(_nan_sum(block, axis=1), index=MONTH_NAMES, name='Return')
+    stats.index.name = 'Month'
     
     return pivot, stats
 
-def get_monthly_drilldown(weekly_df, selected_month_name):
+def get_monthly_drilldown(weekly, selected_month_name):
     """
-    Filters for month. Returns Pivot (Year x Week) and Week Stats.
+    Slices one calendar month. Returns Pivot (Year x Week) and Week Stats.
+    weekly: WeeklyCube (or prepare_weekly_data output, converted on the fly).
     """
-    if weekly_df.empty: return pd.DataFrame(), pd.DataFrame()
+    cube = _as_cube(weekly)
+    if cube.empty: return pd.DataFrame(), pd.DataFrame()
     
-    data = weekly_df[weekly_df['Month_Name'] == selected_month_name]
+    block = cube.month_slice(month_number(selected_month_name))
     
-    # Pivot: Index=Year, Columns=Week, Values=Return
-    pivot = data.pivot(index='Year', columns='Week', values='Return')
+    # Pivot: Index=Year, Columns=Week, Values=Return (years/weeks without data dropped)
+    pivot = pd.DataFrame(block, index=pd.Index(cube.years, name='Year'), columns=pd.Index(range(1, 6), name='Week'))
+    pivot = pivot.loc[pivot.notna().any(axis=1), pivot.notna().any()]
     
-    # Stats per Week (Across all years)
-    week_stats = []
-    for w in range(1, 6):
-        if w in pivot.columns:
-            vals = pivot[w]
-            win_rate = (vals > 0).mean()
-            avg_ret = vals.mean()
-            week_stats.append({'Week': w, 'Win Rate': win_rate, 'Avg Return': avg_ret})
-        else:
-             week_stats.append({'Week': w, 'Win Rate': 0, 'Avg Return': 0})
+    # Stats per Week (Across all years); weeks with no data report zeros.
+    # Win Rate is over every year with data for the month, so a year where the week did
+    # not occur (e.g. Week 5 of February) counts as a non-win; Avg Return is over the
+    # years where it did.
+    count = np.sum(~np.isnan(block), axis=0)
+    years_with_data = len(pivot)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        week_stats = pd.DataFrame({
+            'Win Rate': np.sum(block > 0, axis=0) / years_with_data,
+            'Avg Return': np.nansum(block, axis=0) / count
+        }, index=pd.Index(range(1, 6), name='Week')).fillna(0)
              
-    return pivot, pd.DataFrame(week_stats).set_index('Week')
+    return pivot, week_stats
+
+def _session_returns(df, cal_index):
+    """
+    Daily returns joined to the shared trading-calendar features by integer position.
+    Sessions newer than the calendar trigger a calendar refresh instead of being dropped.
+    """
+    from data_mcp.trading_calendar import session_positions, ensure_sessions, calendar_index
+    returns = df['Close'].pct_change()
+    dates = pd.DatetimeIndex(df.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    if len(dates) and len(cal_index) and dates.max().normalize() > cal_index.index[-1]:
+        # Sessions traded after the calendar was loaded: refresh it rather than dropping them
+        ensure_sessions(dates)
+        cal_index = calendar_index()
+    pos = session_positions(df.index, cal_index.index)
+    keep = (pos >= 0) & returns.notna().values
+    out = cal_index.iloc[pos[keep]].copy()
+    out['Return'] = returns.values[keep]
+    out['Month'] = out.index.month
+    return out
+
+def analyze_trading_day_seasonality(df, cal_index=None):
+    """
+    Seasonality keyed on the N-th trading session of the month (exchange calendar),
+    so weekends and holidays do not split the same session across calendar days.
+    Returns a Pivot Table (Month x Trading Day) of average returns.
+    """
+    if df.empty: return pd.DataFrame()
+    if cal_index is None:
+        from data_mcp.trading_calendar import calendar_index
+        cal_index = calendar_index()
+    
+    s_df = _session_returns(df, cal_index)
+    daily_stats = s_df.groupby(['Month', 'Trading_Day'])['Return'].mean()
+    return month_names(daily_stats.unstack('Trading_Day'))
+
+def analyze_expiry_seasonality(df, cal_index=None, window=10):
+    """
+    Returns around the monthly F&O expiry, keyed on sessions from expiry (0 = expiry day).
+    Returns:
+        pivot_table: DataFrame (Index=Month, Columns=Offset, Values=Avg Return)
+        stats_table: DataFrame (Index=Offset, Columns=[N, Win Rate, Avg %, Median %])
+    """
+    if df.empty: return pd.DataFrame(), pd.DataFrame()
+    if cal_index is None:
+        from data_mcp.trading_calendar import calendar_index
+        cal_index = calendar_index()
+    
+    s_df = _session_returns(df, cal_index)
+    s_df = s_df[s_df['Expiry_Offset'].abs() <= window]
+    
+    pivot = month_names(s_df.groupby(['Month', 'Expiry_Offset'])['Return'].mean().unstack('Expiry_Offset'))
+    
+    grouped = s_df.groupby('Expiry_Offset')['Return']
+    stats = pd.DataFrame({
+        'N': grouped.count(),
+        'Win Rate': (s_df['Return'] > 0).groupby(s_df['Expiry_Offset']).mean(),
+        'Avg %': grouped.mean(),
+        'Median %': grouped.median(),
+    })
+    stats.index.name = 'Offset'
+    return pivot, stats
@@ -0,0 +1,204 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from data_mcp.store import get_store_path
+from analysis.calendar_features import calendar_codes, MONTH_NAMES
+
+# Precomputed universe tables live here (see data_mcp/store.py)
+ENGINE_PATH = get_store_path("seasonality", "universe_seasonality.npz")
+PANEL_PATH = get_store_path("seasonality", "daily_panel.pkl")
+
+RANK_METRICS = ["Win Rate", "Avg %", "Median %", "Total %"]
+
+# Calendar day ranges for Week of Month 1-5 (same buckets as prepare_weekly_data)
+_WEEK_SLICES = [slice(0, 7), slice(7, 14), slice(14, 21), slice(21, 28), slice(28, 31)]
+
+
+def fetch_daily_panel(symbols, years=20, chunk_size=100):
+    """
+    Downloads adjusted daily closes for many symbols in batched yf.download calls.
+    Returns a DataFrame (dates x symbols). The result is cached to PANEL_PATH.
+    """
+    frames = []
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        try:
+            data = yf.download(chunk, period=f"{years}y", interval="1d", auto_adjust=True,
+                               threads=True, progress=False)
+            if data.empty:
+                continue
+            close = data['Close'] if isinstance(data.columns, pd.MultiIndex) else data[['Close']].rename(columns={'Close': chunk[0]})
+            frames.append(close)
+        except Exception as e:
+            print(f"Error downloading panel chunk {i // chunk_size}: {e}")
+
+    if not frames:
+        return pd.DataFrame()
+
+    panel = pd.concat(frames, axis=1).sort_index()
+    if panel.index.tz is not None:
+        panel.index = panel.index.tz_localize(None)
+    panel = panel.loc[:, ~panel.columns.duplicated()]
+    panel.to_pickle(PANEL_PATH)
+    return panel
+
+
+class SeasonalityEngine:
+    """
+    Batch seasonality for a whole universe, stored as compact calendar-indexed arrays.
+
+    daily:   float32 (symbols x years x 12 months x 31 days) - each trading day's return
+             placed at its calendar position, NaN where there was no session.
+    monthly: (symbols x years x 12) compounded monthly return.
+    weekly:  (symbols x years x 12 x 5) summed return per Week of Month (1-7, 8-14, ...).
+
+    Because every question reduces to slicing these arrays, queries such as
+    "best November win rate over the last 15 years across Nifty 500" are a single
+    vectorized reduction over one axis, with no per-ticker resampling.
+    """
+    def __init__(self, symbols, years, daily, monthly=None, weekly=None):
+        self.symbols = np.asarray(symbols)
+        self.years = np.asarray(years)
+        self.daily = daily
+        self.monthly = monthly if monthly is not None else self._compound_months(daily)
+        self.weekly = weekly if weekly is not None else self._sum_weeks(daily)
+        self._symbol_pos = {s: i for i, s in enumerate(self.symbols)}
+
+    # --- Construction ---
+
+    @classmethod
+    def from_panel(cls, panel):
+        """Builds the calendar arrays from a daily close panel (dates x symbols)."""
+        panel = panel.sort_index()
+        returns = panel.pct_change(fill_method=None).iloc[1:]
+        dates = returns.index
+
+        codes = calendar_codes(dates)
+        years = np.arange(codes['Year'].min(), codes['Year'].max() + 1)
+        year_idx = codes['Year'].values - years[0]
+        month_idx = codes['Month'].values - 1
+        day_idx = codes['Day'].values - 1
+
+        daily = np.full((len(panel.columns), len(years), 12, 31), np.nan, dtype=np.float32)
+        # One scatter of every (symbol, date) return into its calendar cell
+        daily[:, year_idx, month_idx, day_idx] = returns.values.T.astype(np.float32)
+
+        engine = cls(panel.columns, years, daily)
+        # A symbol's first month is partial (listing / start of history); drop it like the
+        # month-end pct_change in analyze_seasonality_advanced does.
+        flat = engine.monthly.reshape(len(engine.symbols), -1)
+        has_data = ~np.isnan(flat)
+        first = np.argmax(has_data, axis=1)
+        rows = np.flatnonzero(has_data.any(axis=1))
+        flat[rows, first[rows]] = np.nan
+        return engine
+
+    @classmethod
+    def build(cls, symbols, years=20):
+        """Downloads the universe panel and saves the precomputed tables. Intended for a nightly job."""
+        panel = fetch_daily_panel(symbols, years=years)
+        if panel.empty:
+            return None
+        engine = cls.from_panel(panel)
+        engine.save()
+        return engine
+
+    @staticmethod
+    def _compound_months(daily):
+        growth = np.nanprod(1.0 + daily.astype(np.float64), axis=-1) - 1.0
+        has_data = ~np.all(np.isnan(daily), axis=-1)
+        return np.where(has_data, growth, np.nan).astype(np.float32)
+
+    @staticmethod
+    def _sum_weeks(daily):
+        weeks = []
+        for sl in _WEEK_SLICES:
+            block = daily[..., sl]
+            has_data = ~np.all(np.isnan(block), axis=-1)
+            weeks.append(np.where(has_data, np.nansum(block, axis=-1), np.nan))
+        return np.stack(weeks, axis=-1).astype(np.float32)
+
+    # --- Persistence ---
+
+    def save(self, path=ENGINE_PATH):
+        np.savez_compressed(path, symbols=self.symbols.astype(str), years=self.years,
+                            daily=self.daily, monthly=self.monthly, weekly=self.weekly)
+
+    @classmethod
+    def load(cls, path=ENGINE_PATH):
+        """Loads the precomputed tables, or returns None if they have not been built yet."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f["symbols"], f["years"], f["daily"], f["monthly"], f["weekly"])
+
+    # --- Queries ---
+
+    def _year_slice(self, lookback_years):
+        if not lookback_years:
+            return slice(None)
+        return slice(max(0, len(self.years) - int(lookback_years)), None)
+
+    @staticmethod
+    def _stats(values):
+        """Reduces the last axis (years) of values into the standard stats columns."""
+        count = np.sum(~np.isnan(values), axis=-1)
+        wins = np.sum(values > 0, axis=-1)
+        # All-NaN rows (symbol not listed yet) legitimately produce NaN stats
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return {
+                "Win Rate": np.where(count > 0, wins / np.maximum(count, 1), np.nan),
+                "Avg %": np.nanmean(values, axis=-1),
+                "Median %": np.nanmedian(values, axis=-1),
+                "Total %": np.nansum(values, axis=-1),
+                "Years": count,
+            }
+
+    def month_stats(self, month, lookback_years=None):
+        """Stats for one calendar month (1-12) for every symbol. Returns DataFrame indexed by symbol."""
+        vals = self.monthly[:, self._year_slice(lookback_years), month - 1]
+        return pd.DataFrame(self._stats(vals), index=self.symbols)
+
+    def week_stats(self, month, week, lookback_years=None):
+        """Stats for Week of Month (1-5) within a month for every symbol."""
+        vals = self.weekly[:, self._year_slice(lookback_years), month - 1, week - 1]
+        return pd.DataFrame(self._stats(vals), index=self.symbols)
+
+    def day_stats(self, month, day, lookback_years=None):
+        """Stats for a calendar day of month (1-31) within a month for every symbol."""
+        vals = self.daily[:, self._year_slice(lookback_years), month - 1, day - 1].astype(np.float64)
+        return pd.DataFrame(self._stats(vals), index=self.symbols)
+
+    def rank(self, month, metric="Win Rate", lookback_years=15, top=25, min_years=None, week=None):
+        """
+        Top symbols for a month (or a Week of Month within it) by a metric.
+        min_years: Minimum number of observed years (defaults to 80% of the lookback).
+        """
+        stats = self.week_stats(month, week, lookback_years) if week else self.month_stats(month, lookback_years)
+        if min_years is None and lookback_years:
+            min_years = int(0.8 * min(lookback_years, len(self.years)))
+        if min_years:
+            stats = stats[stats["Years"] >= min_years]
+        return stats.sort_values([metric, "Avg %"], ascending=False).head(top)
+
+    def symbol_month_table(self, symbol, lookback_years=None):
+        """12-month stats table for one symbol (same shape as analyze_seasonality_advanced's stats)."""
+        i = self._symbol_pos.get(symbol)
+        if i is None:
+            return pd.DataFrame()
+        vals = self.monthly[i, self._year_slice(lookback_years), :].T.astype(np.float64)
+        df = pd.DataFrame(self._stats(vals), index=MONTH_NAMES)
+        df.index.name = "Month"
+        return df
+
+
+if __name__ == "__main__":
+    # Nightly refresh: python -m analysis.seasonality_engine (run from the app folder)
+    from data_mcp.tools import get_nifty500
+    universe = get_nifty500()['Symbol'].tolist()
+    print(f"Building seasonality tables for {len(universe)} symbols...")
+    built = SeasonalityEngine.build(universe)
+    print(f"Saved to {ENGINE_PATH}" if built is not None else "Build failed: no data downloaded.")
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+from analysis.calendar_features import month_names
+
+DEFAULT_RESAMPLES = 5000
+DEFAULT_SEED = 42
+
+
+def _one_hot(codes, n_cells):
+    """(N x cells) indicator matrix so group sums become a single matrix product."""
+    hot = np.zeros((len(codes), n_cells))
+    hot[np.arange(len(codes)), codes] = 1.0
+    return hot
+
+
+def benjamini_hochberg(p_values):
+    """
+    False discovery rate adjusted p-values (q-values).
+    With 12 months (or 60 month-week cells) a few raw p < 0.05 are expected by chance alone.
+    """
+    p = np.asarray(p_values, dtype=float)
+    n = len(p)
+    if n == 0:
+        return p
+    order = np.argsort(p)
+    ranked = p[order] * n / np.arange(1, n + 1)
+    # Enforce monotonicity from the largest p-value down
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    q = np.empty(n)
+    q[order] = np.clip(ranked, 0, 1)
+    return q
+
+
+def cell_significance(returns, labels, n_resamples=DEFAULT_RESAMPLES, ci=0.95, seed=DEFAULT_SEED):
+    """
+    Permutation p-values and bootstrap confidence intervals for every calendar cell at once.
+
+    returns: 1-D array of period returns (e.g. one per year-month).
+    labels: Same-length array of cell keys (e.g. month numbers), or a MultiIndex such as (Month, Week).
+
+    Permutation test: cell labels are shuffled across all observations n_resamples times
+    (one row per resample), and each cell's mean and win rate are recomputed with one
+    (resamples x N) @ (N x cells) matrix product. A cell is significant when its observed
+    value sits further from the all-period average than the shuffled values usually do,
+    i.e. "this month is different from a random month".
+
+    Bootstrap: each cell's returns are resampled with replacement inside a padded
+    (cells x resamples x max_n) array, giving percentile CIs for Avg Return and Win Rate.
+
+    Returns a DataFrame indexed by cell key with columns:
+    N, Avg Return, Avg CI Low, Avg CI High, Avg p-value, Win Rate, Win CI Low, Win CI High,
+    Win p-value, q-value (FDR-adjusted Avg p-value).
+    """
+    returns = np.asarray(returns, dtype=float)
+    valid = ~np.isnan(returns)
+    returns, labels = returns[valid], labels[valid]
+    if len(returns) < 2:
+        return pd.DataFrame()
+
+    codes, keys = pd.factorize(labels, sort=True)
+    n_cells = len(keys)
+    hot = _one_hot(codes, n_cells)
+    sizes = np.bincount(codes, minlength=n_cells)
+    counts = sizes.astype(float)
+    wins = (returns > 0).astype(float)
+
+    obs_mean = returns @ hot / counts
+    obs_win = wins @ hot / counts
+    grand_mean = returns.mean()
+    grand_win = wins.mean()
+
+    rng = np.random.default_rng(seed)
+
+    # --- Permutation test: shuffle which cell each observation belongs to ---
+    perm = rng.permuted(np.tile(np.arange(len(returns)), (n_resamples, 1)), axis=1)
+    null_mean = returns[perm] @ hot / counts
+    null_win = wins[perm] @ hot / counts
+    # Two-sided, with the +1 correction so p is never exactly zero
+    p_mean = (np.sum(np.abs(null_mean - grand_mean) >= np.abs(obs_mean - grand_mean) - 1e-12, axis=0) + 1) / (n_resamples + 1)
+    p_win = (np.sum(np.abs(null_win - grand_win) >= np.abs(obs_win - grand_win) - 1e-12, axis=0) + 1) / (n_resamples + 1)
+
+    # --- Bootstrap CIs: resample each cell's own history with replacement ---
+    max_n = int(sizes.max())
+    padded = np.full((n_cells, max_n), np.nan)
+    order = np.argsort(codes, kind="stable")
+    pos = np.arange(len(codes)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    padded[codes[order], pos] = returns[order]
+
+    draw = (rng.random((n_cells, n_resamples, max_n)) * counts[:, None, None]).astype(np.intp)
+    sample = np.take_along_axis(padded[:, None, :], draw, axis=2)
+    in_cell = np.arange(max_n)[None, None, :] < counts[:, None, None]
+    boot_mean = np.where(in_cell, sample, 0.0).sum(axis=2) / counts[:, None]
+    boot_win = np.where(in_cell, sample > 0, False).sum(axis=2) / counts[:, None]
+
+    alpha = (1 - ci) / 2
+    mean_lo, mean_hi = np.quantile(boot_mean, [alpha, 1 - alpha], axis=1)
+    win_lo, win_hi = np.quantile(boot_win, [alpha, 1 - alpha], axis=1)
+
+    return pd.DataFrame({
+        "N": sizes,
+        "Avg Return": obs_mean,
+        "Avg CI Low": mean_lo,
+        "Avg CI High": mean_hi,
+        "Avg p-value": p_mean,
+        "Win Rate": obs_win,
+        "Win CI Low": win_lo,
+        "Win CI High": win_hi,
+        "Win p-value": p_win,
+        "q-value": benjamini_hochberg(p_mean),
+    }, index=keys)
+
+
+def month_significance(df, n_resamples=DEFAULT_RESAMPLES, ci=0.95, seed=DEFAULT_SEED):
+    """
+    Significance of each calendar month's return, from the same month-end returns
+    used by analyze_seasonality_advanced. Indexed January..December.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    monthly = df['Close'].resample('ME').last().pct_change().dropna()
+    if len(monthly) < 2:
+        return pd.DataFrame()
+    result = cell_significance(monthly.values, monthly.index.month.values, n_resamples, ci, seed)
+    if result.empty:
+        return result
+    result = month_names(result)
+    result.index.name = 'Month'
+    return result.dropna(subset=['N'])
+
+
+def week_significance(weekly_df, month=None, n_resamples=DEFAULT_RESAMPLES, ci=0.95, seed=DEFAULT_SEED):
+    """
+    Significance of each Week of Month cell, from prepare_weekly_data output.
+    month: Optional month number (1-12); the test then compares that month's weeks 1-5
+           against each other. Without it all 60 month-week cells are tested together.
+    """
+    if weekly_df.empty:
+        return pd.DataFrame()
+    if month is None:
+        labels = pd.MultiIndex.from_arrays([weekly_df['Month'].values, weekly_df['Week'].values])
+        result = cell_significance(weekly_df['Return'].values, labels, n_resamples, ci, seed)
+        if not result.empty:
+            result.index.names = ['Month', 'Week']
+        return result
+    data = weekly_df[weekly_df['Month'] == month]
+    result = cell_significance(data['Return'].values, data['Week'].values, n_resamples, ci, seed)
+    if not result.empty:
+        result.index.name = 'Week'
+    return result
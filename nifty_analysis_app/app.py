@@ -152,9 +152,9 @@ if not df.empty:
     # --- RENDER SELECTED VIEW ---
     
     if selected_view == "Charts":
-        render_charts(ticker, df)
-        # RSI Section
-        render_rsi(df)
+        zoom_window = render_charts(ticker, df)
+        # RSI Section (same zoom window as the price chart)
+        render_rsi(df, window=zoom_window)
     
     elif selected_view == "Comparison":
         st.subheader("Compare with another stock")
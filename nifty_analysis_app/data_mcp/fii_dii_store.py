@@ -0,0 +1,172 @@
+import os
+import glob
+import threading
+import numpy as np
+import pandas as pd
+from data_mcp.nse_session import nse_fetch
+from data_mcp.store import STORE_DIR, get_store_path
+
+# Daily provisional cash-market activity published by NSE after the close
+FII_DII_URL = "https://www.nseindia.com/api/fiidiiTradeReact"
+
+# Daily rows are the source of truth; each timeframe is a precomputed rollup
+DAILY_PATH = get_store_path("fii_dii", "daily.csv")
+ARCHIVE_DIR = os.path.join(STORE_DIR, "fii_dii", "archive")  # archived CSVs for backfill()
+TIMEFRAMES = {"Weekly": "W", "Monthly": "ME", "Yearly": "YE"}
+
+FLOW_COLUMNS = ["FII Buy", "FII Sell", "FII Net", "DII Buy", "DII Sell", "DII Net"]
+COLUMNS = ["Date"] + FLOW_COLUMNS + ["Nifty Price"]
+NIFTY_SYMBOL = "^NSEI"
+
+_write_lock = threading.Lock()
+
+
+def _rollup_path(timeframe):
+    return get_store_path("fii_dii", f"{timeframe.lower()}.pkl")
+
+
+def _number(values):
+    return pd.to_numeric(pd.Series(values).astype(str).str.replace(",", "", regex=False), errors="coerce")
+
+
+def parse_activity(records):
+    """
+    NSE's FII/DII records (long format: category, date, buyValue, sellValue, netValue; list of
+    dicts or DataFrame) -> one wide row per date with FLOW_COLUMNS (₹ Cr).
+    """
+    raw = pd.DataFrame(records)
+    if raw.empty:
+        return pd.DataFrame(columns=COLUMNS[:-1])
+    raw.columns = [c.strip() for c in raw.columns]
+    # "FII/FPI *" / "DII **" -> FII / DII
+    side = np.where(raw["category"].astype(str).str.upper().str.contains("FII|FPI"), "FII", "DII")
+    long = pd.DataFrame({
+        "Date": pd.to_datetime(raw["date"], format="mixed", dayfirst=True).dt.normalize(),
+        "Side": side,
+        "Buy": _number(raw["buyValue"]).values,
+        "Sell": _number(raw["sellValue"]).values,
+        "Net": _number(raw["netValue"]).values,
+    })
+    wide = long.pivot_table(index="Date", columns="Side", values=["Buy", "Sell", "Net"], aggfunc="last")
+    wide.columns = [f"{s} {v}" for v, s in wide.columns]
+    return wide.reindex(columns=FLOW_COLUMNS).reset_index()
+
+
+def parse_archive(df):
+    """
+    An archived file in either NSE's long format (category/date/...Value) or a wide
+    format with Date plus FII Net / DII Net (Buy/Sell optional).
+    """
+    df = df.rename(columns=lambda c: c.strip())
+    if "category" in df.columns:
+        return parse_activity(df)
+    out = pd.DataFrame({"Date": pd.to_datetime(df["Date"], format="mixed", dayfirst=True).dt.normalize()})
+    for col in FLOW_COLUMNS:
+        out[col] = _number(df[col]).values if col in df.columns else np.nan
+    for side in ("FII", "DII"):
+        # Net = Buy - Sell when only gross values were archived
+        missing = out[f"{side} Net"].isna()
+        out.loc[missing, f"{side} Net"] = out[f"{side} Buy"] - out[f"{side} Sell"]
+    return out
+
+
+def load_daily():
+    if not os.path.exists(DAILY_PATH):
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.read_csv(DAILY_PATH, parse_dates=["Date"])
+
+
+def _nifty_closes(start, end):
+    try:
+        import yfinance as yf
+        hist = yf.Ticker(NIFTY_SYMBOL).history(start=start, end=end + pd.Timedelta(days=1), interval="1d")
+        idx = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        return pd.Series(hist["Close"].values, index=idx.normalize())
+    except Exception as e:
+        print(f"Error fetching Nifty closes: {e}")
+        return pd.Series(dtype=float)
+
+
+def build_rollups(daily):
+    """Weekly / Monthly / Yearly sums of flows (Nifty Price = last close in the period), written to disk."""
+    indexed = daily.set_index("Date").sort_index()
+    rollups = {}
+    for timeframe, freq in TIMEFRAMES.items():
+        resampled = indexed.resample(freq)
+        # min_count=1: periods without gross buy/sell data stay NaN rather than 0
+        rolled = resampled[FLOW_COLUMNS].sum(min_count=1)
+        rolled["Nifty Price"] = resampled["Nifty Price"].last()
+        # Drop empty periods (e.g. data gaps) instead of showing zero flows
+        rolled = rolled[indexed["FII Net"].resample(freq).count() > 0].reset_index()
+        rolled.to_pickle(_rollup_path(timeframe))
+        rollups[timeframe] = rolled
+    daily.to_pickle(_rollup_path("Daily"))
+    rollups["Daily"] = daily
+    return rollups
+
+
+def upsert(rows):
+    """
+    Merges new daily rows into the store (later rows win per date), fills missing Nifty
+    closes, rewrites daily.csv and rebuilds the rollups. Returns the daily frame.
+    """
+    with _write_lock:
+        daily = pd.concat([load_daily(), rows], ignore_index=True)
+        daily["Date"] = pd.to_datetime(daily["Date"])
+        daily = daily.drop_duplicates("Date", keep="last").sort_values("Date").reset_index(drop=True)
+        daily = daily.reindex(columns=COLUMNS)
+        daily[COLUMNS[1:]] = daily[COLUMNS[1:]].astype(float)
+
+        missing = daily["Nifty Price"].isna()
+        if missing.any():
+            closes = _nifty_closes(daily.loc[missing, "Date"].min(), daily.loc[missing, "Date"].max())
+            daily.loc[missing, "Nifty Price"] = daily.loc[missing, "Date"].map(closes)
+
+        daily.to_csv(DAILY_PATH, index=False)
+        build_rollups(daily)
+    return daily
+
+
+def ingest_latest():
+    """Fetches NSE's latest FII/DII day and appends it to the store. Returns the new rows."""
+    rows = parse_activity(nse_fetch(FII_DII_URL))
+    if not rows.empty:
+        upsert(rows)
+    return rows
+
+
+def backfill(paths=None):
+    """
+    Loads archived FII/DII files (default: every CSV in store/fii_dii/archive/) into the store.
+    Returns the number of dates added or updated.
+    """
+    paths = paths or sorted(glob.glob(os.path.join(ARCHIVE_DIR, "*.csv")))
+    frames = []
+    for path in paths:
+        try:
+            frames.append(parse_archive(pd.read_csv(path)))
+        except Exception as e:
+            print(f"Error reading FII/DII archive {path}: {e}")
+    if not frames:
+        return 0
+    rows = pd.concat(frames, ignore_index=True).dropna(subset=["Date"])
+    upsert(rows)
+    return rows["Date"].nunique()
+
+
+def load_flows(timeframe="Daily"):
+    """Precomputed flows for a timeframe (Daily, Weekly, Monthly, Yearly): Date, FLOW_COLUMNS, Nifty Price."""
+    path = _rollup_path(timeframe)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.read_pickle(path)
+
+
+if __name__ == "__main__":
+    # Daily job after the close: python -m data_mcp.fii_dii_store [--backfill] (run from the app folder)
+    import sys
+    if "--backfill" in sys.argv:
+        files = [a for a in sys.argv[1:] if a != "--backfill"]
+        print(f"Backfilled {backfill(files or None)} dates")
+    rows = ingest_latest()
+    print(f"Ingested {len(rows)} day(s) into {DAILY_PATH}")
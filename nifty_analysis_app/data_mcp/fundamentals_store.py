@@ -0,0 +1,243 @@
+import os
+import time
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from data_mcp.client import YahooFinanceClient
+from data_mcp.rate_limiter import YAHOO_LIMITER
+from data_mcp.store import STORE_DIR, get_store_path
+
+# Per-symbol snapshots (info + the three statements) and one cross-sectional table
+STATEMENTS_DIR = os.path.join(STORE_DIR, "fundamentals", "statements")
+TABLE_PATH = get_store_path("fundamentals", "fundamentals_table.pkl")
+
+MAX_AGE = 7 * 86400      # Point lookups older than this are refetched live
+DEFAULT_WORKERS = 8
+
+# Scalar ticker.info fields kept in the cross-sectional table
+INFO_FIELDS = [
+    "longName", "sector", "industry", "marketCap", "currentPrice", "trailingPE", "forwardPE",
+    "pegRatio", "priceToBook", "trailingEps", "bookValue", "returnOnEquity", "returnOnAssets",
+    "debtToEquity", "revenueGrowth", "earningsGrowth", "profitMargins", "grossMargins",
+    "operatingMargins", "dividendYield", "beta", "currentRatio",
+]
+
+# (column, statement, line item, period): period -1 = latest reported, -2 = the one before
+STATEMENT_FIELDS = [
+    ("Revenue", "income_statement", "Total Revenue", -1),
+    ("Prev Revenue", "income_statement", "Total Revenue", -2),
+    ("Net Income", "income_statement", "Net Income", -1),
+    ("Prev Net Income", "income_statement", "Net Income", -2),
+    ("Gross Profit", "income_statement", "Gross Profit", -1),
+    ("Total Debt", "balance_sheet", "Total Debt", -1),
+    ("Stockholders Equity", "balance_sheet", "Stockholders Equity", -1),
+    ("Current Assets", "balance_sheet", "Current Assets", -1),
+    ("Current Liabilities", "balance_sheet", "Current Liabilities", -1),
+    ("Operating Cash Flow", "cash_flow", "Operating Cash Flow", -1),
+    ("Capital Expenditure", "cash_flow", "Capital Expenditure", -1),
+]
+
+_client = YahooFinanceClient()
+_table_lock = threading.Lock()
+
+
+def _symbol_key(symbol):
+    return symbol if symbol.endswith((".NS", ".BO")) or symbol.startswith("^") else f"{symbol}.NS"
+
+
+def _snapshot_path(symbol):
+    return get_store_path("fundamentals", "statements", f"{_symbol_key(symbol)}.pkl")
+
+
+def sort_statement(df):
+    """Statement columns parsed to dates and ordered oldest -> latest (parsed once, at storage time)."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.copy()
+    df.columns = pd.to_datetime(df.columns)
+    return df.sort_index(axis=1)
+
+
+def fetch_fundamentals(symbol):
+    """
+    Live fetch of ticker.info and the three statements (statements sorted by date).
+    Both calls go through YAHOO_LIMITER, shared by every worker in the process.
+    """
+    YAHOO_LIMITER.acquire()
+    info = _client.get_info(_symbol_key(symbol)) or {}
+    YAHOO_LIMITER.acquire()
+    financials = _client.get_financials(_symbol_key(symbol)) or {}
+    return info, {name: sort_statement(df) for name, df in financials.items()}
+
+
+def derive_row(info, financials):
+    """One cross-sectional row: the INFO_FIELDS scalars plus latest/previous statement line items."""
+    row = {field: info.get(field, np.nan) for field in INFO_FIELDS}
+    for column, statement, item, period in STATEMENT_FIELDS:
+        df = financials.get(statement, pd.DataFrame())
+        value = np.nan
+        if not df.empty and item in df.index and len(df.columns) >= -period:
+            value = df.loc[item].iloc[period]
+        row[column] = value
+    return row
+
+
+def is_complete(info, financials):
+    """False for failed/partial fetches (no info, or no statement with data) that shouldn't be stored."""
+    return bool(info) and any(df is not None and not df.empty for df in financials.values())
+
+
+def save_fundamentals(symbol, info, financials):
+    """
+    Writes the per-symbol snapshot. The cross-sectional table is only rebuilt by
+    refresh_universe(), so point lookups never rewrite it.
+    """
+    snapshot = {"fetched_at": time.time(), "info": info, "financials": financials}
+    with open(_snapshot_path(symbol), "wb") as f:
+        pickle.dump(snapshot, f)
+
+
+def load_snapshot(symbol):
+    path = _snapshot_path(symbol)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Error reading fundamentals snapshot for {symbol}: {e}")
+        return None
+
+
+def get_fundamentals(symbol, max_age=MAX_AGE):
+    """
+    Point lookup: (info, financials) from the local store, refetched live (and the snapshot
+    written back) when missing or older than max_age. An empty fetch keeps serving the older
+    snapshot. Statements come back already sorted by date.
+    """
+    snapshot = load_snapshot(symbol)
+    if snapshot and time.time() - snapshot["fetched_at"] <= max_age:
+        return snapshot["info"], snapshot["financials"]
+    try:
+        info, financials = fetch_fundamentals(symbol)
+        if not is_complete(info, financials):
+            # Likely throttled or delisted: don't replace good data with nothing
+            if snapshot:
+                return snapshot["info"], snapshot["financials"]
+            return info, financials
+        save_fundamentals(symbol, info, financials)
+        return info, financials
+    except Exception as e:
+        print(f"Error fetching fundamentals for {symbol}: {e}")
+        # A stale snapshot beats nothing
+        if snapshot:
+            return snapshot["info"], snapshot["financials"]
+        return {}, {}
+
+
+def load_table(columns=None, symbols=None):
+    """
+    Cross-sectional fundamentals (one row per symbol) from local storage, e.g.
+    load_table(["debtToEquity", "trailingEps", "returnOnEquity"]) for the whole universe.
+    """
+    if not os.path.exists(TABLE_PATH):
+        return pd.DataFrame()
+    table = pd.read_pickle(TABLE_PATH)
+    if symbols is not None:
+        table = table.reindex([_symbol_key(s) for s in symbols])
+    if columns is not None:
+        table = table.reindex(columns=columns)
+    return table
+
+
+def refresh_universe(symbols, max_workers=DEFAULT_WORKERS, progress=None):
+    """
+    Batch refresh (intended for a nightly job): fetches every symbol concurrently, writes
+    the per-symbol snapshots and rebuilds the cross-sectional table in one write (the only
+    place the table is written). Symbols whose fetch fails or comes back empty keep their
+    previous snapshot and row. Returns the table.
+    """
+    rows = {}
+    fetched_at = pd.Timestamp.now()
+
+    def _one(symbol):
+        info, financials = fetch_fundamentals(symbol)
+        if not is_complete(info, financials):
+            raise ValueError("empty response")
+        save_fundamentals(symbol, info, financials)
+        return derive_row(info, financials)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_one, s): s for s in symbols}
+        for i, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            try:
+                rows[_symbol_key(symbol)] = future.result()
+            except Exception as e:
+                print(f"Error refreshing fundamentals for {symbol}: {e}")
+            if progress:
+                progress(i, len(futures))
+
+    fresh = pd.DataFrame.from_dict(rows, orient="index")
+    fresh["Fetched At"] = fetched_at
+    with _table_lock:
+        # Keep previous rows for symbols that failed this time
+        table = load_table()
+        table = pd.concat([table.drop(index=fresh.index, errors="ignore"), fresh])
+        table.index.name = "Symbol"
+        table.to_pickle(TABLE_PATH)
+    return table
+
+
+_background = {"thread": None, "done": 0, "total": 0, "finished_at": None}
+
+
+def start_background_refresh(symbols, max_workers=DEFAULT_WORKERS):
+    """
+    Runs refresh_universe in a daemon thread (one at a time per process) so the UI does not
+    block on a full sweep. Returns False if a refresh is already running.
+    Progress is in refresh_status().
+    """
+    thread = _background["thread"]
+    if thread is not None and thread.is_alive():
+        return False
+
+    def _progress(done, total):
+        _background["done"], _background["total"] = done, total
+
+    def _run():
+        try:
+            refresh_universe(symbols, max_workers=max_workers, progress=_progress)
+        except Exception as e:
+            print(f"Error refreshing universe fundamentals: {e}")
+        _background["finished_at"] = time.time()
+
+    _background.update(done=0, total=len(symbols))
+    _background["thread"] = threading.Thread(target=_run, name="fundamentals-refresh", daemon=True)
+    _background["thread"].start()
+    return True
+
+
+def refresh_status():
+    """{'running', 'done', 'total', 'finished_at'} of the background refresh."""
+    thread = _background["thread"]
+    return {"running": thread is not None and thread.is_alive(), "done": _background["done"],
+            "total": _background["total"], "finished_at": _background["finished_at"]}
+
+
+def universe_symbols():
+    """Nifty 500 symbols (with .NS suffix), the default universe of the nightly refresh."""
+    universe = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "nifty500.csv"))["Symbol"]
+    return [f"{s.strip()}.NS" for s in universe.astype(str)]
+
+
+if __name__ == "__main__":
+    # Nightly refresh (e.g. from cron after the close), run from the app folder:
+    #   python -m data_mcp.fundamentals_store [SYMBOL ...]   (default: the Nifty 500)
+    import sys
+    symbols = [_symbol_key(s) for s in sys.argv[1:]] or universe_symbols()
+    print(f"Refreshing fundamentals for {len(symbols)} symbols...")
+    table = refresh_universe(symbols, progress=lambda done, total: print(f"{done}/{total}", end="\r"))
+    print(f"\nSaved {len(table)} rows to {TABLE_PATH}")
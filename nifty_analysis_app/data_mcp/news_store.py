@@ -0,0 +1,327 @@
+import os
+import re
+import hashlib
+import threading
+import time
+import numpy as np
+import pandas as pd
+from data_mcp.store import STORE_DIR, get_store_path
+
+# One pickle per ticker (the per-ticker index), rows sorted by publish date:
+#   store/news/<TICKER>.pkl
+DEFAULT_WATCHLIST = ["NIFTY 50"]
+DEFAULT_INTERVAL = 1800      # seconds between ingestion sweeps
+FETCH_LIMIT = 25             # articles requested per ticker per sweep
+DUP_THRESHOLD = 0.7          # title shingle Jaccard similarity at/above which articles are duplicates
+DUP_LOOKBACK_DAYS = 7        # near-duplicate titles are only checked against recent articles
+MAX_WATCHLIST = 20           # tickers swept besides the pinned defaults (least recently viewed dropped)
+WATCH_TTL_DAYS = 3           # tickers not viewed for this long stop being swept
+REQUEST_COOLDOWN = 300       # seconds before the same ticker can be queued by request() again
+SHINGLE_SIZE = 3
+
+ARTICLE_COLUMNS = ["Date", "Title", "Body", "Source", "URL", "URL Hash", "Title Hash",
+                   "Polarity", "Subjectivity", "Verdict", "Scorer", "Fetched At"]
+INGEST_SCORER = "textblob"   # Stored scores always come from this scorer (see rescore() for others)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_store_lock = threading.Lock()
+
+
+def _ticker_key(ticker):
+    return re.sub(r"[^A-Z0-9&_-]+", "_", ticker.replace(".NS", "").upper())
+
+
+def _store_path(ticker):
+    return get_store_path("news", f"{_ticker_key(ticker)}.pkl")
+
+
+def url_hash(url):
+    """Hash of a URL without scheme, query string, fragment or trailing slash."""
+    clean = re.sub(r"^https?://(www\.)?", "", (url or "").strip().lower())
+    clean = re.split(r"[?#]", clean)[0].rstrip("/")
+    return hashlib.sha1(clean.encode()).hexdigest()[:16]
+
+
+def title_shingles(title):
+    """Set of hashed word n-grams (SHINGLE_SIZE words) of a normalized title."""
+    words = _WORD.findall((title or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return {hash(" ".join(words))} if words else set()
+    return {hash(" ".join(words[i:i + SHINGLE_SIZE])) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def title_hash(title):
+    """Exact-duplicate key: hash of the normalized title words."""
+    return hashlib.sha1(" ".join(_WORD.findall((title or "").lower())).encode()).hexdigest()[:16]
+
+
+def _is_near_duplicate(shingles, seen):
+    for other in seen:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= DUP_THRESHOLD:
+            return True
+    return False
+
+
+def load_articles(ticker, days=None, strict=False):
+    """
+    Stored articles for ticker (newest first), optionally only the last `days` days.
+    An unreadable store returns an empty frame, or raises when strict (used before rewriting it).
+    """
+    path = _store_path(ticker)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=ARTICLE_COLUMNS)
+    try:
+        articles = pd.read_pickle(path).reindex(columns=ARTICLE_COLUMNS)
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Error reading news store for {ticker}: {e}")
+        return pd.DataFrame(columns=ARTICLE_COLUMNS)
+    if days is not None:
+        articles = articles[articles["Date"] >= pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)]
+    return articles.sort_values("Date", ascending=False)
+
+
+def to_frame(items):
+    """DuckDuckGo news results -> ARTICLE_COLUMNS frame (without sentiment)."""
+    raw = pd.DataFrame(items)
+    if raw.empty:
+        return pd.DataFrame(columns=ARTICLE_COLUMNS)
+    raw = raw.reindex(columns=["date", "title", "body", "source", "url"])
+    frame = pd.DataFrame({
+        "Date": pd.to_datetime(raw["date"], utc=True, errors="coerce"),
+        "Title": raw["title"].fillna("").astype(str),
+        "Body": raw["body"].fillna("").astype(str),
+        "Source": raw["source"].fillna("Unknown").astype(str),
+        "URL": raw["url"].fillna("").astype(str),
+    })
+    frame["Date"] = frame["Date"].fillna(pd.Timestamp.now(tz="UTC"))
+    frame["URL Hash"] = frame["URL"].map(url_hash)
+    frame["Title Hash"] = frame["Title"].map(title_hash)
+    return frame
+
+
+def deduplicate(fresh, existing):
+    """
+    Drops fresh articles already stored (same URL or exact title) or whose title shingles
+    overlap a recent stored/fresh title by DUP_THRESHOLD or more.
+    """
+    fresh = fresh.drop_duplicates("URL Hash").drop_duplicates("Title Hash")
+    fresh = fresh[~fresh["URL Hash"].isin(existing["URL Hash"]) & ~fresh["Title Hash"].isin(existing["Title Hash"])]
+    if fresh.empty:
+        return fresh
+
+    cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=DUP_LOOKBACK_DAYS)
+    seen = [title_shingles(t) for t in existing.loc[existing["Date"] >= cutoff, "Title"]]
+    keep = []
+    for title in fresh["Title"]:
+        shingles = title_shingles(title)
+        duplicate = bool(shingles) and _is_near_duplicate(shingles, seen)
+        keep.append(not duplicate)
+        if not duplicate:
+            seen.append(shingles)
+    return fresh[np.array(keep, dtype=bool)]
+
+
+def ingest_ticker(ticker, analyzer, limit=FETCH_LIMIT):
+    """
+    Fetches recent news for ticker, drops duplicates, scores the new articles (batched and
+    cached by NewsAnalyzer) and appends them to the ticker's store. Returns the number added.
+    Raises if the existing store can't be read, rather than replacing it with only the new
+    articles; the store is rewritten atomically so other processes never see a partial file.
+    """
+    fresh = to_frame(analyzer.fetch_news(ticker, limit=limit))
+    if fresh.empty:
+        return 0
+    with _store_lock:
+        existing = load_articles(ticker, strict=True)
+        fresh = deduplicate(fresh, existing)
+        if fresh.empty:
+            return 0
+        scores = analyzer.analyze_sentiment((fresh["Title"] + " " + fresh["Body"]).tolist())
+        fresh = fresh.assign(Polarity=scores["polarity"].values, Subjectivity=scores["subjectivity"].values,
+                             Verdict=scores["verdict"].values, Scorer=analyzer.scorer_key,
+                             **{"Fetched At": pd.Timestamp.now(tz="UTC")})
+        articles = pd.concat([existing, fresh], ignore_index=True)
+        articles["Date"] = pd.to_datetime(articles["Date"], utc=True)
+        articles[["Polarity", "Subjectivity"]] = articles[["Polarity", "Subjectivity"]].astype(float)
+        articles = articles.sort_values("Date")
+        path = _store_path(ticker)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        articles[ARTICLE_COLUMNS].reset_index(drop=True).to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    return len(fresh)
+
+
+def rescore(articles, analyzer):
+    """
+    Articles with Polarity/Subjectivity/Verdict from analyzer's scorer (for display with a
+    scorer other than the stored one). Scores are cached by NewsAnalyzer, so repeat views are cheap.
+    """
+    if articles.empty or (articles["Scorer"] == analyzer.scorer_key).all():
+        return articles
+    scores = analyzer.analyze_sentiment((articles["Title"] + " " + articles["Body"]).tolist())
+    return articles.assign(Polarity=scores["polarity"].values, Subjectivity=scores["subjectivity"].values,
+                           Verdict=scores["verdict"].values, Scorer=analyzer.scorer_key)
+
+
+def list_tickers():
+    """Tickers with stored news."""
+    folder = os.path.join(STORE_DIR, "news")
+    if not os.path.isdir(folder):
+        return []
+    return sorted(f[:-4] for f in os.listdir(folder) if f.endswith(".pkl"))
+
+
+def sentiment_timeseries(articles, freq="D"):
+    """
+    Sentiment over time from stored articles: Articles, Avg Polarity and Bullish/Bearish share
+    per period (freq: 'D' daily, 'W' weekly).
+    """
+    if articles.empty:
+        return pd.DataFrame(columns=["Articles", "Avg Polarity", "Bullish %", "Bearish %"])
+    df = articles.set_index("Date").sort_index()
+    resampled = df.resample(freq)
+    out = pd.DataFrame({
+        "Articles": resampled["Polarity"].count(),
+        "Avg Polarity": resampled["Polarity"].mean(),
+        "Bullish %": (df["Verdict"] == "Bullish").resample(freq).mean() * 100,
+        "Bearish %": (df["Verdict"] == "Bearish").resample(freq).mean() * 100,
+    })
+    return out[out["Articles"] > 0]
+
+
+class NewsIngestor:
+    """
+    Background thread that collects news for a watchlist on a fixed interval and stores
+    deduplicated, scored articles. One instance per server process.
+
+    The initial watchlist is always swept; tickers added with watch() are swept while viewed
+    within the last WATCH_TTL_DAYS, keeping at most MAX_WATCHLIST of the most recent.
+    """
+    def __init__(self, analyzer, watchlist=None, interval=DEFAULT_INTERVAL,
+                 max_watched=MAX_WATCHLIST, watch_ttl_days=WATCH_TTL_DAYS):
+        self.analyzer = analyzer
+        self.pinned = list(watchlist or DEFAULT_WATCHLIST)
+        self.interval = interval
+        self.max_watched = max_watched
+        self.watch_ttl = pd.Timedelta(days=watch_ttl_days)
+        self._watched = {}   # ticker -> last viewed (UTC), oldest first
+        self._watch_lock = threading.Lock()
+        self._pending = []   # tickers to ingest ahead of the next sweep (see request())
+        self._requested = {}  # ticker -> monotonic time of the last request()
+        self._wake = threading.Event()
+        self.last_run = None
+        self.added = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def watchlist(self):
+        """Tickers the next sweep covers: pinned ones plus recently viewed ones."""
+        cutoff = pd.Timestamp.now(tz="UTC") - self.watch_ttl
+        with self._watch_lock:
+            for ticker in [t for t, seen in self._watched.items() if seen < cutoff]:
+                del self._watched[ticker]
+            recent = list(self._watched)
+        return self.pinned + [t for t in recent if t not in self.pinned]
+
+    def watch(self, ticker):
+        """Marks ticker as viewed, evicting the least recently viewed beyond max_watched."""
+        if ticker in self.pinned:
+            return
+        with self._watch_lock:
+            self._watched.pop(ticker, None)
+            self._watched[ticker] = pd.Timestamp.now(tz="UTC")
+            while len(self._watched) > self.max_watched:
+                del self._watched[next(iter(self._watched))]
+
+    def request(self, ticker):
+        """
+        Watches ticker and queues it for ingestion right away (e.g. a ticker with no stored
+        news yet), without waiting for the next sweep. Returns immediately. Repeat requests
+        within REQUEST_COOLDOWN are ignored, so a ticker without any news isn't searched
+        on every render.
+        """
+        self.watch(ticker)
+        now = time.monotonic()
+        with self._watch_lock:
+            self._requested = {t: at for t, at in self._requested.items() if now - at < REQUEST_COOLDOWN}
+            if ticker in self._pending or ticker in self._requested:
+                return
+            self._requested[ticker] = now
+            self._pending.append(ticker)
+        self._wake.set()
+
+    def is_pending(self, ticker):
+        with self._watch_lock:
+            return ticker in self._pending
+
+    def _ingest_pending(self):
+        while True:
+            with self._watch_lock:
+                if not self._pending:
+                    return
+                ticker = self._pending[0]
+            try:
+                self.added += ingest_ticker(ticker, self.analyzer)
+            except Exception as e:
+                print(f"News ingestion error for {ticker}: {e}")
+            with self._watch_lock:
+                self._pending.remove(ticker)
+
+    def ingest_once(self):
+        """One sweep over the watchlist. Returns {ticker: articles added}."""
+        results = {}
+        for ticker in self.watchlist:
+            try:
+                results[ticker] = ingest_ticker(ticker, self.analyzer)
+                self.added += results[ticker]
+            except Exception as e:
+                print(f"News ingestion error for {ticker}: {e}")
+                results[ticker] = 0
+            # Space out search requests
+            time.sleep(2)
+        self.last_run = pd.Timestamp.now(tz="UTC")
+        return results
+
+    def _loop(self):
+        next_sweep = 0.0
+        while not self._stop.is_set():
+            self._ingest_pending()
+            if time.monotonic() >= next_sweep:
+                self.ingest_once()
+                next_sweep = time.monotonic() + self.interval
+            # Sleep until the next sweep, waking early for request()/stop()
+            self._wake.wait(max(next_sweep - time.monotonic(), 0))
+            self._wake.clear()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="news-ingestor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+if __name__ == "__main__":
+    # Standalone ingestion: python -m data_mcp.news_store RELIANCE TCS (run from the app folder)
+    import sys
+    from analysis.news_sentiment import NewsAnalyzer
+    ingestor = NewsIngestor(NewsAnalyzer(scorer=INGEST_SCORER), sys.argv[1:] or DEFAULT_WATCHLIST)
+    print(f"Ingesting news for {ingestor.watchlist} every {ingestor.interval}s. Ctrl+C to stop.")
+    ingestor.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        ingestor.stop()
@@ -1,6 +1,11 @@
-import nsepython as nse
 import pandas as pd
-import streamlit as st
+from data_mcp.nse_session import nse_fetch
+from data_mcp.ttl_cache import TTLCache
+
+# One parsed quote-equity payload per symbol, shared by all sessions and all derived views
+QUOTE_TTL = 300  # seconds
+_quote_cache = TTLCache(ttl=QUOTE_TTL, max_entries=1000)
+
 
 class NSEClient:
     """
@@ -8,41 +13,42 @@ class NSEClient:
     """
     
     @staticmethod
-    @st.cache_data(ttl=300) # Cache for 5 minutes
-    def get_quote(symbol):
-        """Fetches the full equity quote data for a symbol (e.g. RELIANCE)."""
+    def _fetch_quote(clean_symbol):
         try:
-            # Handle symbols with .NS suffix if passed
-            clean_symbol = symbol.replace('.NS', '')
             # Use direct fetch for better data (Delivery, Sector PE)
             url = f"https://www.nseindia.com/api/quote-equity?symbol={clean_symbol}"
-            return nse.nsefetch(url)
+            data = nse_fetch(url)
+            return data if isinstance(data, dict) else {}
         except Exception as e:
-            print(f"Error fetching NSE quote for {symbol}: {e}")
+            print(f"Error fetching NSE quote for {clean_symbol}: {e}")
             return {}
 
     @staticmethod
-    @st.cache_data(ttl=300)
+    def get_quote(symbol):
+        """
+        Fetches the full equity quote data for a symbol (e.g. RELIANCE).
+        Served from the shared quote cache (one entry per symbol, QUOTE_TTL seconds);
+        the returned dict is shared, so callers must not modify it.
+        """
+        # Handle symbols with .NS suffix if passed
+        clean_symbol = symbol.replace('.NS', '').upper()
+        return _quote_cache.get_or_fetch(clean_symbol, lambda: NSEClient._fetch_quote(clean_symbol))
+
+    @staticmethod
     def get_trade_info(symbol):
-        """Fetches trade info including delivery %."""
-        try:
-            data = NSEClient.get_quote(symbol)
-            return data.get('securityWiseTradeDetails', {})
-        except Exception as e:
-            print(f"Error fetching trade info for {symbol}: {e}")
-            return {}
+        """Trade info including delivery % (a view of the cached quote)."""
+        return NSEClient.get_quote(symbol).get('securityWiseTradeDetails', {})
             
     @staticmethod
-    @st.cache_data(ttl=900) # Cache for 15 minutes
     def get_industry_info(symbol):
-        """Fetches industry info and metadata."""
-        try:
-            data = NSEClient.get_quote(symbol)
-            return data.get('industryInfo', {})
-        except Exception as e:
-            print(f"Error fetching industry info for {symbol}: {e}")
-            return {}
-            
+        """Industry info (a view of the cached quote)."""
+        return NSEClient.get_quote(symbol).get('industryInfo', {})
+
+    @staticmethod
+    def get_metadata(symbol):
+        """Quote metadata such as sector PE and index (a view of the cached quote)."""
+        return NSEClient.get_quote(symbol).get('metadata', {})
+
     @staticmethod
     def get_delivery_metrics(symbol):
         """Returns delivery % and quantity."""
@@ -62,11 +68,10 @@ class NSEClient:
         """
         Gets peer data from metadata.
         """
-        data = NSEClient.get_quote(symbol)
-        if not data: return {}
+        if not NSEClient.get_quote(symbol): return {}
         
-        meta = data.get('metadata', {})
-        industry_info = data.get('industryInfo', {})
+        meta = NSEClient.get_metadata(symbol)
+        industry_info = NSEClient.get_industry_info(symbol)
         
         return {
             'sector_pe': meta.get('pdSectorPe', None),
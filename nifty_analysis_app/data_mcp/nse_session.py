@@ -0,0 +1,123 @@
+import os
+import json
+import queue
+import hashlib
+import threading
+import time
+import requests
+from data_mcp.rate_limiter import NSE_LIMITER
+from data_mcp.store import get_store_path
+
+NSE_HOME = "https://www.nseindia.com"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/124.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Referer": NSE_HOME + "/",
+    "Connection": "keep-alive",
+}
+
+POOL_SIZE = 4          # Concurrent NSE connections (scanner workers share these)
+COOKIE_TTL = 240       # seconds before a session re-visits the home page for fresh cookies
+TIMEOUT = 10
+
+# Replay stub: GREENCHIPS_NSE_REPLAY=record saves every NSE response under store/nse_replay/,
+# GREENCHIPS_NSE_REPLAY=replay serves them back without touching the network (offline tests/demos).
+REPLAY_MODE = os.environ.get("GREENCHIPS_NSE_REPLAY", "").lower()
+
+
+class NSESession:
+    """
+    One keep-alive requests.Session with NSE's browser-like headers. NSE's API rejects
+    requests without the cookies set by the home page, so the session visits it once
+    (warm) and again only when the cookies are older than COOKIE_TTL or NSE answers 401/403.
+    """
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.warmed_at = 0.0
+
+    def warm(self):
+        NSE_LIMITER.acquire()
+        self.session.cookies.clear()
+        self.session.get(NSE_HOME, timeout=TIMEOUT)
+        self.warmed_at = time.monotonic()
+
+    def fetch(self, url):
+        if time.monotonic() - self.warmed_at > COOKIE_TTL:
+            self.warm()
+        NSE_LIMITER.acquire()
+        response = self.session.get(url, timeout=TIMEOUT)
+        if response.status_code in (401, 403):
+            # Cookies expired server-side: re-warm once and retry
+            self.warm()
+            NSE_LIMITER.acquire()
+            response = self.session.get(url, timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+
+class NSESessionPool:
+    """
+    Fixed pool of warmed NSESessions shared by every NSE caller in the process.
+    Sessions are created lazily up to `size`; a caller borrows one for a single request,
+    so steady-state requests are one round trip on an open connection.
+    """
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _borrow(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return NSESession()
+        return self._idle.get()
+
+    def fetch(self, url):
+        session = self._borrow()
+        try:
+            return session.fetch(url)
+        except requests.RequestException:
+            # Drop the connection state; the next fetch on this session starts fresh
+            session.session.close()
+            session.session = requests.Session()
+            session.session.headers.update(HEADERS)
+            session.warmed_at = 0.0
+            raise
+        finally:
+            self._idle.put(session)
+
+
+_pool = NSESessionPool()
+
+
+def _replay_path(url):
+    return get_store_path("nse_replay", f"{hashlib.sha1(url.encode()).hexdigest()[:16]}.json")
+
+
+def nse_fetch(url):
+    """
+    GET an NSE API url and return the parsed JSON, through the shared session pool and
+    rate limiter (drop-in replacement for nsepython.nsefetch). Raises on failure.
+    """
+    if REPLAY_MODE == "replay":
+        path = _replay_path(url)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recorded NSE response for {url}")
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["data"]
+
+    data = _pool.fetch(url)
+    if REPLAY_MODE == "record":
+        with open(_replay_path(url), "w", encoding="utf-8") as f:
+            json.dump({"url": url, "recorded_at": time.time(), "data": data}, f)
+    return data
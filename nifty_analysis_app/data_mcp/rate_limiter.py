@@ -0,0 +1,40 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: at most `rate` calls per `per` seconds, with short bursts
+    up to `burst`. acquire() blocks the calling thread until a token is available, so
+    concurrent workers share one request budget.
+    """
+    def __init__(self, rate, per=1.0, burst=None):
+        self.rate = float(rate)
+        self.per = float(per)
+        self.capacity = float(burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.per / self.rate
+            time.sleep(wait)
+
+
+# Shared budget for every request to nseindia.com (NSE throttles/blocks bursts beyond ~3 req/s)
+NSE_LIMITER = RateLimiter(rate=3, per=1.0)
+
+# Shared budget for DuckDuckGo searches (news ingestion and social fan-out); bursts get rate-limited
+SEARCH_LIMITER = RateLimiter(rate=2, per=1.0, burst=4)
+
+# Shared budget for Yahoo Finance fundamentals (ticker.info + statements); a 500-symbol
+# sweep gets throttled quickly when its workers fire unpaced
+YAHOO_LIMITER = RateLimiter(rate=2, per=1.0, burst=4)
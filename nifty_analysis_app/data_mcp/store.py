@@ -0,0 +1,18 @@
+import os
+
+# Local on-disk store for precomputed / ingested datasets (not committed to git).
+# Override with GREENCHIPS_STORE_DIR to keep data outside the app folder.
+STORE_DIR = os.environ.get(
+    "GREENCHIPS_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "store")
+)
+
+
+def get_store_path(*parts):
+    """
+    Returns an absolute path inside the local data store, creating parent folders as needed.
+    e.g. get_store_path("seasonality", "nifty500.npz")
+    """
+    path = os.path.join(STORE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -1,5 +1,7 @@
 import streamlit as st
 from .client import YahooFinanceClient
+from . import fundamentals_store
+from .nse_session import nse_fetch
 import pandas as pd
 import os
 
@@ -27,6 +29,39 @@ def get_all_equities():
         st.error(f"Error reading all_equities.csv: {e}")
         return []
 
+@st.cache_data(ttl=3600)
+def get_nifty500():
+    """Reads nifty500.csv. Returns a DataFrame with Symbol (with .NS suffix), Company Name and Industry."""
+    try:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        csv_path = os.path.join(current_dir, "nifty500.csv")
+        
+        df = pd.read_csv(csv_path)
+        df.columns = [c.strip() for c in df.columns]
+        df['Symbol'] = df['Symbol'].astype(str).str.strip() + ".NS"
+        return df[['Symbol', 'Company Name', 'Industry']].drop_duplicates('Symbol').reset_index(drop=True)
+    except Exception as e:
+        print(f"Error reading nifty500.csv: {e}")
+        return pd.DataFrame(columns=['Symbol', 'Company Name', 'Industry'])
+
+@st.cache_data(ttl=3600)
+def get_market_lots():
+    """Reads MARKET LOT from all_equities.csv. Returns {symbol with .NS suffix: lot size}."""
+    try:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        csv_path = os.path.join(current_dir, "all_equities.csv")
+        
+        df = pd.read_csv(csv_path)
+        df.columns = [c.strip() for c in df.columns]
+        
+        if 'SYMBOL' in df.columns and 'MARKET LOT' in df.columns:
+            lots = pd.to_numeric(df['MARKET LOT'], errors='coerce').fillna(1).astype(int)
+            return {f"{s}.NS": lot for s, lot in zip(df['SYMBOL'], lots)}
+        return {}
+    except Exception as e:
+        print(f"Error reading market lots: {e}")
+        return {}
+
 @st.cache_data(ttl=3600)
 def get_stock_price_history(symbol, period="1y", interval="1d", start=None, end=None):
     """Fetches historical price data for a given symbol."""
@@ -34,10 +69,39 @@ def get_stock_price_history(symbol, period="1y", interval="1d", start=None, end=
 
 @st.cache_data(ttl=86400)
 def get_stock_fundamentals(symbol):
-    """Fetches fundamental info and financial statements."""
-    info = client.get_info(symbol)
-    financials = client.get_financials(symbol)
-    return info, financials
+    """
+    Fetches fundamental info and financial statements.
+    Served from the local fundamentals store (refreshed nightly), falling back to a live fetch.
+    """
+    return fundamentals_store.get_fundamentals(symbol)
+
+# Constituents of NSE's "SECURITIES IN F&O" index, i.e. the stock F&O underlyings
+FNO_LIST_URL = "https://www.nseindia.com/api/equity-stockIndices?index=SECURITIES%20IN%20F%26O"
+
+@st.cache_data(ttl=86400)
+def get_fno_symbols():
+    """
+    F&O underlyings (indices first, then stocks) as NSE symbols without suffix.
+    Uses the live NSE F&O list (through the shared NSE session pool and rate limiter),
+    falling back to the curated list in fno_stocks.csv.
+    """
+    indices = ["NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY"]
+    try:
+        data = nse_fetch(FNO_LIST_URL).get("data", [])
+        symbols = {row["symbol"] for row in data if row.get("symbol")} - set(indices)
+        # The index's own summary row carries the index name as its symbol
+        symbols.discard("SECURITIES IN F&O")
+        if symbols:
+            return indices + sorted(symbols)
+    except Exception as e:
+        print(f"Error fetching F&O list: {e}")
+    try:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        df = pd.read_csv(os.path.join(current_dir, "fno_stocks.csv"))
+        return indices + sorted(df['Symbol'].astype(str).str.strip())
+    except Exception as e:
+        print(f"Error reading fno_stocks.csv: {e}")
+        return indices
 
 def get_nifty_tickers():
     """Returns a list of Nifty 100 tickers."""
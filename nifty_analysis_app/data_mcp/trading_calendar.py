@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from data_mcp.store import get_store_path
+
+# NSE sessions, taken from the Nifty 50 index history (every day the index printed is a trading day)
+CALENDAR_PATH = get_store_path("calendar", "nse_trading_days.npy")
+CALENDAR_SYMBOL = "^NSEI"
+CALENDAR_MAX_AGE = 86400  # Refresh once a day
+REFRESH_COOLDOWN = 3600   # Minimum gap between forced refreshes for sessions missing from the calendar
+
+# Upcoming exchange holidays (the index history only knows past sessions), from NSE's holiday master
+HOLIDAYS_URL = "https://www.nseindia.com/api/holiday-master?type=trading"
+HOLIDAYS_PATH = get_store_path("calendar", "nse_holidays.json")
+
+# Monthly F&O contracts expired on the last Thursday of the month until NSE moved
+# them to the last Tuesday (SEBI expiry-day rationalisation, effective September 2025).
+# A holiday on that day moves expiry to the previous trading session.
+EXPIRY_WEEKDAY_CHANGES = [
+    (pd.Timestamp("1900-01-01"), 3),  # Thursday
+    (pd.Timestamp("2025-09-01"), 1),  # Tuesday
+]
+
+_calendar_cache = {}
+
+
+def _download_trading_days():
+    import yfinance as yf
+    hist = yf.Ticker(CALENDAR_SYMBOL).history(period="max", interval="1d")
+    if hist.empty:
+        raise ValueError(f"No history returned for {CALENDAR_SYMBOL}")
+    idx = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    return idx.normalize().unique().sort_values().values.astype("datetime64[D]")
+
+
+def load_trading_days(refresh=False):
+    """
+    Sorted NSE trading dates (numpy datetime64[D]), cached on disk and in memory.
+    Falls back to Mon-Fri business days if the calendar cannot be downloaded.
+    """
+    if (not refresh and "days" in _calendar_cache
+            and time.time() - _calendar_cache["loaded_at"] <= CALENDAR_MAX_AGE):
+        return _calendar_cache["days"]
+
+    stale = refresh or not os.path.exists(CALENDAR_PATH) or time.time() - os.path.getmtime(CALENDAR_PATH) > CALENDAR_MAX_AGE
+    days = None
+    if stale:
+        try:
+            days = _download_trading_days()
+            np.save(CALENDAR_PATH, days)
+        except Exception as e:
+            print(f"Error refreshing trading calendar: {e}")
+    if days is None and os.path.exists(CALENDAR_PATH):
+        days = np.load(CALENDAR_PATH)
+    if days is None:
+        days = pd.bdate_range("2000-01-01", pd.Timestamp.today().normalize()).values.astype("datetime64[D]")
+
+    _calendar_cache["days"] = days
+    _calendar_cache["loaded_at"] = time.time()
+    if refresh:
+        _calendar_cache["forced_at"] = time.time()
+    _calendar_cache.pop("index", None)
+    return days
+
+
+def ensure_sessions(dates):
+    """
+    Refreshes the default calendar when dates run past its last session (e.g. sessions traded
+    since the server started), at most once per REFRESH_COOLDOWN. Returns the trading days.
+    """
+    days = load_trading_days()
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) == 0:
+        return days
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    recently_forced = time.time() - _calendar_cache.get("forced_at", 0) < REFRESH_COOLDOWN
+    if len(days) and dates.normalize().max() > pd.Timestamp(days[-1]) and not recently_forced:
+        days = load_trading_days(refresh=True)
+    return days
+
+
+def _scheduled_expiry(month_end):
+    """Last expiry weekday of each month (before holiday adjustment), from month-end dates."""
+    month_end = pd.DatetimeIndex(month_end)
+    weekday = np.full(len(month_end), EXPIRY_WEEKDAY_CHANGES[0][1])
+    for start, wd in EXPIRY_WEEKDAY_CHANGES[1:]:
+        weekday[month_end >= start] = wd
+    # Last <weekday> of the month, from the month-end date by modular arithmetic
+    back = (month_end.dayofweek.values - weekday) % 7
+    return month_end - pd.to_timedelta(back, unit="D")
+
+
+def monthly_expiries(trading_days):
+    """
+    Monthly F&O expiry session for every month in the calendar: the last trading day on or
+    before the month's last expiry weekday (Thursday, or Tuesday from September 2025).
+    Returns a DatetimeIndex.
+    """
+    days = pd.DatetimeIndex(trading_days)
+    if len(days) == 0:
+        return days
+    month_end = days + pd.offsets.MonthEnd(0)
+    scheduled = _scheduled_expiry(month_end)
+
+    # Months whose scheduled expiry is past the end of the calendar have not expired yet
+    ok = (days <= scheduled) & (scheduled <= days[-1])
+    eligible = pd.Series(days[ok], index=month_end[ok])
+    return pd.DatetimeIndex(eligible.groupby(level=0).max().values)
+
+
+def calendar_index(trading_days=None):
+    """
+    Precomputed integer features for every trading session (shared by all symbols):
+      Trading_Day:   N-th session of the month (1-based), counted on the exchange calendar.
+      Sessions_Left: Sessions remaining in the month (0 on the last session).
+      Expiry_Offset: Sessions from the nearest monthly expiry (0 = expiry day,
+                     -3 = three sessions before, +2 = two sessions after).
+    Indexed by session date. Memoized for the default calendar (until it is refreshed).
+    """
+    use_default = trading_days is None
+    if use_default:
+        trading_days = load_trading_days()  # Drops the memoized index when the calendar is refreshed
+        if "index" in _calendar_cache:
+            return _calendar_cache["index"]
+    days = pd.DatetimeIndex(trading_days)
+
+    pos = np.arange(len(days))
+    key = days.year.values * 12 + days.month.values
+    new_month = np.r_[True, key[1:] != key[:-1]]
+    month_start = np.maximum.accumulate(np.where(new_month, pos, 0))
+    last_month = np.r_[key[1:] != key[:-1], True]
+    month_end = np.minimum.accumulate(np.where(last_month, pos, len(days))[::-1])[::-1]
+
+    expiry_pos = days.searchsorted(monthly_expiries(days))
+    # The upcoming (not yet listed) expiry, placed by counting business days past the calendar end
+    last = days[-1]
+    upcoming = _scheduled_expiry([last + pd.offsets.MonthEnd(0)])[0]
+    if upcoming <= last:
+        upcoming = _scheduled_expiry([last + pd.offsets.MonthEnd(1)])[0]
+    ahead = np.busday_count((last + pd.Timedelta(days=1)).date(), (upcoming + pd.Timedelta(days=1)).date())
+    expiry_pos = np.r_[expiry_pos, len(days) - 1 + ahead]
+    nxt = np.clip(np.searchsorted(expiry_pos, pos), 0, len(expiry_pos) - 1)
+    prv = np.clip(nxt - 1, 0, len(expiry_pos) - 1)
+    to_next = pos - expiry_pos[nxt]
+    from_prev = pos - expiry_pos[prv]
+    offset = np.where(np.abs(to_next) <= np.abs(from_prev), to_next, from_prev)
+
+    index = pd.DataFrame({
+        "Trading_Day": (pos - month_start + 1).astype(np.int16),
+        "Sessions_Left": (month_end - pos).astype(np.int16),
+        "Expiry_Offset": offset.astype(np.int16),
+    }, index=days)
+    if use_default:
+        _calendar_cache["index"] = index
+    return index
+
+
+def session_positions(dates, trading_days=None):
+    """
+    Integer positions of dates in the trading calendar (-1 where a date is not a session).
+    dates may be tz-aware or intraday; they are matched on the calendar date.
+    """
+    days = pd.DatetimeIndex(load_trading_days() if trading_days is None else trading_days)
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    dates = dates.normalize()
+    pos = days.searchsorted(dates)
+    found = (pos < len(days)) & (days[np.minimum(pos, len(days) - 1)] == dates)
+    return np.where(found, pos, -1)
+
+
+def _fetch_holidays():
+    from data_mcp.nse_session import nse_fetch
+    data = nse_fetch(HOLIDAYS_URL)
+    # Cash-market ("CM") holidays, e.g. {"tradingDate": "26-Jan-2026", ...}
+    dates = pd.to_datetime([h["tradingDate"] for h in data.get("CM", [])], format="%d-%b-%Y")
+    return sorted(dates.strftime("%Y-%m-%d"))
+
+
+def load_holidays():
+    """
+    NSE trading holidays (YYYY-MM-DD strings) of the current year, cached on disk and
+    refreshed once a day. Empty if they have never been fetched.
+    """
+    cached = _calendar_cache.get("holidays")
+    if cached is not None and time.time() - cached[0] <= CALENDAR_MAX_AGE:
+        return cached[1]
+
+    holidays = None
+    if not os.path.exists(HOLIDAYS_PATH) or time.time() - os.path.getmtime(HOLIDAYS_PATH) > CALENDAR_MAX_AGE:
+        try:
+            holidays = _fetch_holidays()
+            with open(HOLIDAYS_PATH, "w", encoding="utf-8") as f:
+                json.dump(holidays, f)
+        except Exception as e:
+            print(f"Error refreshing NSE holidays: {e}")
+    if holidays is None and os.path.exists(HOLIDAYS_PATH):
+        try:
+            with open(HOLIDAYS_PATH, encoding="utf-8") as f:
+                holidays = json.load(f)
+        except Exception as e:
+            print(f"Error reading NSE holidays: {e}")
+    holidays = set(holidays or [])
+    _calendar_cache["holidays"] = (time.time(), holidays)
+    return holidays
+
+
+def is_trading_day(date):
+    """
+    Whether NSE trades on date. Dates the calendar already covers are looked up in it;
+    later dates (e.g. today before the index prints) are weekdays not in the holiday list.
+    """
+    day = pd.Timestamp(date)
+    if day.tz is not None:
+        day = day.tz_localize(None)
+    day = day.normalize()
+    days = load_trading_days()
+    if len(days) and day <= pd.Timestamp(days[-1]):
+        return bool(session_positions([day], days)[0] >= 0)
+    return day.dayofweek < 5 and day.strftime("%Y-%m-%d") not in load_holidays()
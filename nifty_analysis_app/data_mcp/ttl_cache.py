@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache: one entry per key, expiring after `ttl` seconds, with the
+    least recently used entries evicted beyond `max_entries`. Module-level instances are
+    shared by every Streamlit session in the server process.
+
+    get_or_fetch() coalesces concurrent misses: while one thread fetches a key, other
+    threads asking for the same key wait for that result instead of fetching again.
+    """
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}             # key -> [lock, waiters] for in-flight fetches only
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Cached value, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Cached value for key, calling fetch() on a miss. Empty results ({}, [], None) are
+        returned but not stored, so a failed fetch is retried on the next call.
+        """
+        value = self.get(key)
+        if value is not None:
+            self._count(hit=True)
+            return value
+        with self._lock:
+            # [lock, waiters]: the per-key lock lives only while someone is fetching/waiting
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Another thread may have filled it while we waited
+                value = self.get(key)
+                if value is not None:
+                    self._count(hit=True)
+                    return value
+                self._count(hit=False)
+                value = fetch()
+                if value:
+                    self.set(key, value)
+                return value
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def invalidate(self, key=None):
+        """Drops one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,14 +1,34 @@
 import streamlit as st
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from analysis.downsampling import DEFAULT_MAX_POINTS, downsample_ohlc, downsample_series, slice_window
+
+def render_zoom_slider(index, key, max_points=DEFAULT_MAX_POINTS):
+    """
+    Server-side zoom for long histories.
+    Charts are downsampled to ~max_points before being sent to the browser, so zooming
+    inside Plotly only magnifies the reduced trace. Narrowing this range re-slices the
+    full-resolution data on the server and downsamples the smaller window again,
+    bringing back daily detail.
+    Returns a (start, end) date tuple, or None if the series is short enough to send in full.
+    """
+    if len(index) <= max_points:
+        return None
+    first, last = index[0].date(), index[-1].date()
+    # Bounds in the key so a new ticker/period starts un-zoomed instead of
+    # carrying over a range that may be outside the new data.
+    return st.slider("🔍 Zoom Range", min_value=first, max_value=last, value=(first, last),
+                     format="DD MMM YYYY", key=f"{key}_{first}_{last}")
 
 def render_charts(ticker, df):
     """
     Renders the main chart with optional indicators.
+    Returns the zoom window in use so companion panels (RSI) can stay aligned.
     """
     if df.empty:
         st.warning("No data to display.")
-        return
+        return None
 
     # Chart Type Selection
     chart_type = st.selectbox("Chart Type", ["Candlestick", "Line"], key="chart_type_select")
@@ -16,6 +36,12 @@ def render_charts(ticker, df):
     # Indicator Selection
     indicators = st.multiselect("Indicators", ["SMA 50", "SMA 200", "EMA 20", "Bollinger Bands"], key="indicators_select")
 
+    # Downsample to roughly screen resolution: candles are merged into wider bars
+    # (true high/low kept), so 'max' daily history doesn't ship every row to the browser.
+    window = render_zoom_slider(df.index, key="charts_zoom")
+    full_df = slice_window(df, window)
+    df = downsample_ohlc(full_df)
+
     # Create Subplots (Main + Volume? Or RSI?)
     # Let's add a separate row for RSI/MACD if we want, for now just Main Chart
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
@@ -28,7 +54,8 @@ def render_charts(ticker, df):
                                      open=df['Open'], high=df['High'],
                                      low=df['Low'], close=df['Close'], name="OHLC"), row=1, col=1)
     else:
-        fig.add_trace(go.Scatter(x=df.index, y=df['Close'], line=dict(color='blue', width=2), name="Close"), row=1, col=1)
+        close = downsample_series(full_df['Close'])
+        fig.add_trace(go.Scatter(x=close.index, y=close, line=dict(color='blue', width=2), name="Close"), row=1, col=1)
 
     # Add Indicators
     if "SMA 50" in indicators and 'SMA_50' in df.columns:
@@ -43,18 +70,21 @@ def render_charts(ticker, df):
         fig.add_trace(go.Scatter(x=df.index, y=df['BB_Low'], line=dict(color='gray', width=1, dash='dash'), name="BB Low", fill='tonexty'), row=1, col=1)
 
     # Volume Chart
-    colors = ['red' if row['Open'] - row['Close'] >= 0 else 'green' for index, row in df.iterrows()]
+    colors = np.where(df['Open'] - df['Close'] >= 0, 'red', 'green')
     fig.add_trace(go.Bar(x=df.index, y=df['Volume'], marker_color=colors, name="Volume"), row=2, col=1)
 
     fig.update_layout(xaxis_rangeslider_visible=False, height=600, margin=dict(l=0, r=0, t=30, b=0))
     st.plotly_chart(fig, use_container_width=True)
+    return window
 
-def render_rsi(df):
+def render_rsi(df, window=None):
     if 'RSI' not in df.columns:
         return
     
+    rsi = downsample_series(slice_window(df['RSI'], window))
+    
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df.index, y=df['RSI'], name="RSI", line=dict(color='purple')))
+    fig.add_trace(go.Scatter(x=rsi.index, y=rsi, name="RSI", line=dict(color='purple')))
     
     # Add 70/30 lines
     fig.add_hline(y=70, line_dash="dash", line_color="red")
@@ -3,20 +3,35 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from analysis.fii_dii import FIIDIIManager
+from analysis.fii_dii_analytics import (prepare_flows, flow_zscores, flow_summary, lagged_cross_correlation,
+                                        rolling_lagged_correlation, DEFAULT_LAGS)
+
+DAILY_LOOKBACK = pd.DateOffset(years=1)  # Daily bars shown; rollups cover the full store
+
+@st.cache_data(ttl=600)
+def cached_flows(timeframe):
+    return FIIDIIManager.get_historical_data(timeframe)
 
 def render_fii_dii_tab():
     st.header("🏦 Institutional Activity (FII/DII)")
     
     # 1. Timeframe Selection
-    timeframe = st.selectbox("Select Timeframe", ["Daily", "Weekly", "Monthly", "Yearly"], index=0)
+    c1, c2 = st.columns([3, 1])
+    timeframe = c1.selectbox("Select Timeframe", ["Daily", "Weekly", "Monthly", "Yearly"], index=0)
+    if c2.button("Fetch Latest from NSE"):
+        with st.spinner("Fetching today's FII/DII activity..."):
+            FIIDIIManager.fetch_daily_activity()
+        cached_flows.clear()
     
-    # Fetch Data
-    with st.spinner(f"Fetching {timeframe} Institutional Data..."):
-        df = FIIDIIManager.get_historical_data(timeframe)
+    # Load precomputed data from the local store
+    df = cached_flows(timeframe)
         
     if df.empty:
-        st.error("No data available.")
+        st.error("No FII/DII history stored yet. Fetch the latest day, or backfill archives with "
+                 "`python -m data_mcp.fii_dii_store --backfill` (CSV files in store/fii_dii/archive/).")
         return
+    if timeframe == "Daily":
+        df = df[df['Date'] >= df['Date'].max() - DAILY_LOOKBACK]
 
     # 2. Key Insights
     st.divider()
@@ -73,3 +88,39 @@ def render_fii_dii_tab():
             'DII Net': "{:,.2f}",
             'Nifty Price': "{:,.2f}"
         }), use_container_width=True)
+
+    # 5. Flow Analytics (always on the full daily history)
+    st.divider()
+    render_flow_analytics(cached_flows("Daily"))
+
+def render_flow_analytics(daily):
+    st.subheader("🔬 Flow Analytics")
+    if len(daily) < 30:
+        st.info("Flow analytics need at least 30 stored sessions.")
+        return
+    flows = prepare_flows(daily)
+
+    st.markdown("**Current positioning** (z-score vs trailing window, same-sign streaks)")
+    st.dataframe(flow_summary(flows).style.format("{:,.2f}"), use_container_width=True)
+
+    c1, c2 = st.columns(2)
+    flow_col = c1.selectbox("Flow", ["FII Net", "DII Net", "Total Net"], key="flow_analytics_series")
+    window = c2.selectbox("Z-score window (sessions)", [20, 60, 250], index=1, key="flow_analytics_window")
+
+    z = flow_zscores(flows, windows=(window,), columns=[flow_col])[f"{flow_col} Z{window}"]
+    fig_z = go.Figure(go.Bar(x=z.index, y=z, marker_color=['green' if v > 0 else 'red' for v in z.fillna(0)]))
+    fig_z.add_hline(y=2, line_dash="dash", line_color="gray")
+    fig_z.add_hline(y=-2, line_dash="dash", line_color="gray")
+    fig_z.update_layout(title=f"{flow_col} z-score ({window}d)", yaxis_title="Z", height=350)
+    st.plotly_chart(fig_z, use_container_width=True)
+
+    xcorr = lagged_cross_correlation(flows, flow_col, DEFAULT_LAGS)
+    fig_x = go.Figure(go.Bar(x=xcorr.index, y=xcorr.values, marker_color='purple'))
+    fig_x.update_layout(title=f"{flow_col} vs Nifty return: correlation by lag",
+                        xaxis_title="Lag (sessions; > 0 = flow leads returns)", yaxis_title="Correlation", height=350)
+    st.plotly_chart(fig_x, use_container_width=True)
+
+    if len(flows) > 300:
+        rolling = rolling_lagged_correlation(flows, flow_col, lags=[0, 1, 5], window=250)
+        st.line_chart(rolling.rename(columns=lambda lag: f"Lag {lag}"), height=250)
+        st.caption("Rolling 1-year correlation between flow and the same-day / next-day / 5-day-ahead Nifty return.")
@@ -1,6 +1,13 @@
 import streamlit as st
-from data_mcp.tools import get_stock_fundamentals
+from data_mcp.tools import get_stock_fundamentals, get_nifty500
+from data_mcp.fundamentals_store import load_table, start_background_refresh, refresh_status
 from analysis.fundamentals import generate_investment_memo
+from analysis.fundamental_screener import screen_universe, apply_screen, PILLARS
+
+@st.cache_data(ttl=3600)
+def cached_universe_screen():
+    """Pillar scores and industry percentiles for every stock in the local fundamentals table."""
+    return screen_universe(load_table(), get_nifty500())
 
 def render_fundamentals_tab(ticker):
     st.header(f"📊 Fundamental Analysis: {ticker}")
@@ -20,3 +27,48 @@ def render_fundamentals_tab(ticker):
                 st.write("Income Statement", financials.get('income_statement'))
                 st.write("Balance Sheet", financials.get('balance_sheet'))
                 st.write("Cash Flow", financials.get('cash_flow'))
+
+    st.divider()
+    render_universe_screener(ticker)
+
+def render_universe_screener(ticker):
+    st.subheader("🧮 Universe Screener (Nifty 500)")
+    st.caption("Memo pillar scores for every stock at once, with percentiles within each Industry.")
+
+    status = refresh_status()
+    if st.button("Refresh Universe Fundamentals", disabled=status["running"]):
+        start_background_refresh(get_nifty500()['Symbol'].tolist())
+        status = refresh_status()
+    if status["running"]:
+        st.info(f"Refreshing fundamentals in the background: {status['done']}/{status['total']} fetched. "
+                "Rerun the page to see progress; results appear when the sweep finishes.")
+    elif status["finished_at"] and st.session_state.get("fundamentals_refresh_seen") != status["finished_at"]:
+        # A background sweep finished since this session last rendered: rescore from the new table
+        st.session_state["fundamentals_refresh_seen"] = status["finished_at"]
+        cached_universe_screen.clear()
+
+    scores = cached_universe_screen()
+    if scores.empty:
+        st.info("No stored fundamentals yet. Refresh the universe (or run `python -m data_mcp.fundamentals_store` nightly).")
+        return
+
+    symbol = ticker if ticker.endswith(".NS") else f"{ticker}.NS"
+    if symbol in scores.index:
+        row = scores.loc[symbol]
+        cols = st.columns(len(PILLARS) + 1)
+        for col, pillar in zip(cols, PILLARS):
+            col.metric(pillar, f"{row[pillar]}/10")
+        cols[-1].metric("Industry Rank", f"{row['Total Score Pctl']:.0f} pctl", help=row['Industry'])
+
+    c1, c2, c3 = st.columns(3)
+    min_total = c1.slider("Min Total Score", 0, 40, 20)
+    min_pillar = c2.slider("Min score in every pillar", 0, 10, 0)
+    max_flags = c3.selectbox("Max Red Flags", [0, 1, 2, 3], index=3)
+    industries = st.multiselect("Industries", sorted(scores['Industry'].unique()))
+
+    screened = apply_screen(scores, {"Total Score": min_total, **{p: min_pillar for p in PILLARS}},
+                            max_red_flags=max_flags, industries=industries)
+    st.write(f"{len(screened)} of {len(scores)} stocks pass")
+    st.dataframe(screened[['Company Name', 'Industry'] + PILLARS +
+                          ['Total Score', 'Total Score Pctl', 'ROE Pctl', 'PE Pctl', 'Red Flags', 'Verdict']],
+                 use_container_width=True)
@@ -2,70 +2,110 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from analysis.news_sentiment import NewsAnalyzer
+from analysis.news_sentiment import NewsAnalyzer, SOCIAL_SITES
+from data_mcp import news_store
+
+SCORER_OPTIONS = {"TextBlob": "textblob", "Finance Lexicon (fast)": "lexicon"}
+
+@st.cache_resource
+def get_news_analyzer(scorer="textblob"):
+    return NewsAnalyzer(scorer=scorer)
+
+@st.cache_resource
+def get_news_ingestor():
+    """One background news ingestor per server process, shared by all sessions (fixed scorer)."""
+    return news_store.NewsIngestor(get_news_analyzer(news_store.INGEST_SCORER))
 
 def render_news_view(ticker):
     st.header(f"News & Sentiment Analysis: {ticker}")
     
-    analyzer = NewsAnalyzer()
+    scorer = st.radio("Sentiment Model", list(SCORER_OPTIONS), horizontal=True, key="news_sentiment_model")
+    analyzer = get_news_analyzer(SCORER_OPTIONS[scorer])
     
     # Tabs for different sections
     tab1, tab2 = st.tabs(["Market Pulse", "Social Buzz"])
     
     with tab1:
         st.subheader("Latest News")
-        with st.spinner("Fetching latest news..."):
-            news_items = analyzer.fetch_news(ticker)
+        ingestor = get_news_ingestor()
+        ingestor.watch(ticker)
+        c1, c2 = st.columns([3, 1])
+        c1.caption(f"Ingestor: {'🟢 running' if ingestor.running else '⚪ stopped'} | watching {', '.join(ingestor.watchlist)} "
+                   f"every {ingestor.interval // 60} min | {ingestor.added} articles added since server start")
+        if c2.button("Refresh Now", key="news_refresh"):
+            with st.spinner("Fetching latest news..."):
+                try:
+                    news_store.ingest_ticker(ticker, ingestor.analyzer)
+                except Exception as e:
+                    st.error(f"Could not update the news store: {e}")
+
+        articles = news_store.load_articles(ticker)
+        if articles.empty:
+            # Never block the render on a search: the ingestor fetches it in the background
+            ingestor.request(ticker)
+        # Stored scores come from the ingest scorer; show them with the selected model
+        articles = news_store.rescore(articles, analyzer)
+        # Keep collecting the watchlist in the background from now on
+        if not ingestor.running:
+            ingestor.start()
         
-        if news_items:
-            # Prepare text for analysis
-            news_texts = [item.get('title', '') + " " + item.get('body', '') for item in news_items]
-            
-            # Sentiment Analysis
-            df_sentiment = analyzer.analyze_sentiment(news_texts)
-            
-            if not df_sentiment.empty:
-                avg_polarity = df_sentiment['polarity'].mean()
-                st.metric("Overall News Sentiment", f"{avg_polarity:.2f}", 
-                         delta="Bullish" if avg_polarity > 0.05 else "Bearish" if avg_polarity < -0.05 else "Neutral")
+        if not articles.empty:
+            recent = articles[articles['Date'] >= articles['Date'].max() - pd.Timedelta(days=7)]
+            avg_polarity = recent['Polarity'].mean()
+            st.metric("Overall News Sentiment (7d)", f"{avg_polarity:.2f}", 
+                     delta="Bullish" if avg_polarity > 0.05 else "Bearish" if avg_polarity < -0.05 else "Neutral")
+
+            # Sentiment history from every stored article
+            series = news_store.sentiment_timeseries(articles, freq="W" if len(articles) > 200 else "D")
+            if len(series) > 1:
+                st.line_chart(series[['Avg Polarity']], height=200)
+                st.caption(f"{len(articles)} stored articles since {articles['Date'].min():%d-%b-%Y}")
             
             # Display News Cards
-            for item in news_items:
-                with st.expander(item.get('title', 'No Title')):
-                    st.write(item.get('body', ''))
-                    st.caption(f"Source: {item.get('source', 'Unknown')} | [Read More]({item.get('url', '#')})")
+            for _, item in recent.head(20).iterrows():
+                with st.expander(f"{item['Title']} ({item['Verdict']})"):
+                    st.write(item['Body'])
+                    st.caption(f"{item['Date']:%d-%b-%Y %H:%M} | Source: {item['Source']} | [Read More]({item['URL'] or '#'})")
             
             # Word Cloud
             st.subheader("News Word Cloud")
-            wc = analyzer.generate_wordcloud(news_texts)
+            wc = analyzer.generate_wordcloud((recent['Title'] + " " + recent['Body']).tolist())
             if wc:
                 fig, ax = plt.subplots(figsize=(10, 5))
                 ax.imshow(wc, interpolation='bilinear')
                 ax.axis("off")
                 st.pyplot(fig)
+        elif ingestor.is_pending(ticker):
+            st.info(f"Fetching news for {ticker} in the background. Rerun in a few seconds to see it.")
         else:
             st.info("No recent news found.")
 
     with tab2:
         st.subheader("Social Media Aggregation")
-        platform = st.selectbox("Select Platform", ["twitter", "youtube", "reddit", "facebook", "instagram", "linkedin"])
-        
-        with st.spinner(f"Searching {platform}..."):
-            social_items = analyzer.fetch_social(ticker, platform)
-            
-        if social_items:
-             # Prepare text for analysis
-            social_texts = [item.get('title', '') + " " + item.get('body', '') for item in social_items]
-            
-            # Sentiment
-            df_social_sent = analyzer.analyze_sentiment(social_texts)
-            if not df_social_sent.empty:
-                avg_social_pol = df_social_sent['polarity'].mean()
-                st.metric(f"{platform.capitalize()} Sentiment", f"{avg_social_pol:.2f}")
+        with st.spinner("Searching all platforms..."):
+            # Cached per platform inside fetch_social_all (failed/empty searches are retried)
+            feed = analyzer.fetch_social_all(ticker)
+
+        if feed:
+            feed_df = pd.DataFrame(feed)
+            feed_df['text'] = feed_df['title'].fillna('') + " " + feed_df['body'].fillna('')
+            sentiment = analyzer.analyze_sentiment(feed_df['text'].tolist())
+            feed_df['polarity'] = feed_df['text'].map(dict(zip(sentiment['text'], sentiment['polarity'])))
+
+            by_platform = feed_df.groupby('platform').agg(Posts=('text', 'size'), Sentiment=('polarity', 'mean'))
+            st.dataframe(by_platform.style.format({'Sentiment': "{:.2f}"}), use_container_width=True)
 
-            for item in social_items:
-                st.markdown(f"**[{item.get('title', 'Post')}]({item.get('href', '#')})**")
-                st.write(item.get('body', ''))
-                st.divider()
+            # Switching platform only filters the merged feed
+            platform = st.selectbox("Select Platform", ["all"] + list(SOCIAL_SITES))
+            items = feed_df if platform == "all" else feed_df[feed_df['platform'] == platform]
+            if not items.empty:
+                label = "All Platforms" if platform == "all" else platform.capitalize()
+                st.metric(f"{label} Sentiment", f"{items['polarity'].mean():.2f}")
+                for _, item in items.iterrows():
+                    st.markdown(f"**[{item.get('title') or 'Post'}]({item.get('href') or '#'})** · {item['platform']}")
+                    st.write(item.get('body') or '')
+                    st.divider()
+            else:
+                st.info(f"No recent buzz found on {platform}.")
         else:
-            st.info(f"No recent buzz found on {platform}.")
+            st.info("No recent social buzz found.")
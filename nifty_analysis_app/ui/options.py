@@ -2,26 +2,59 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from analysis.option_chain import OptionChainAnalyzer
+from analysis.option_greeks import chain_greeks, iv_smile, iv_term_structure, time_to_expiry
+from analysis import option_snapshots
+from analysis.fno_scanner import scan_fno
+from analysis.option_strategy import STRATEGY_TEMPLATES, INDEX_LOT_SIZES, build_strategy, expiry_payoff, pnl_grid, strategy_metrics
+from data_mcp.tools import get_fno_symbols
+from data_mcp.ttl_cache import TTLCache
+
+@st.cache_resource
+def get_snapshot_recorder():
+    """One background snapshot recorder per server process, shared by all sessions."""
+    return option_snapshots.SnapshotRecorder()
+
+# Scans per universe, shared across sessions; kept out of st.cache_data so the progress
+# bar below is drawn on every real scan and never replayed from the cache
+_scan_cache = TTLCache(ttl=900, max_entries=8)
+
+def cached_fno_scan(symbols):
+    scan = _scan_cache.get(symbols)
+    if scan is None:
+        progress = st.progress(0.0, text="Scanning option chains...")
+        # scan_fno reports progress from this (the script) thread as futures complete
+        scan = scan_fno(list(symbols), progress=lambda done, total: progress.progress(done / total, text=f"Scanned {done}/{total} underlyings"))
+        progress.empty()
+        if not scan.empty:
+            _scan_cache.set(symbols, scan)
+    return scan
 
 def render_options_tab():
     st.header("🎲 Option Chain Analytics")
     
+    mode = st.radio("Mode", ["Single Instrument", "F&O Scanner 🔎"], horizontal=True, label_visibility="collapsed", key="options_mode")
+    if mode == "F&O Scanner 🔎":
+        render_fno_scanner()
+        return
+    
     # 1. Inputs
     col1, col2 = st.columns([1, 2])
     with col1:
-        instrument = st.selectbox("Select Instrument", ["NIFTY", "BANKNIFTY", "FINNIFTY", "RELIANCE.NS", "INFY.NS", "HDFCBANK.NS", "TCS.NS"])
+        instrument = st.selectbox("Select Instrument", get_fno_symbols())
     
     # Fetch Data
     with st.spinner(f"Fetching Option Chain for {instrument}..."):
-        payload = OptionChainAnalyzer.fetch_option_chain(instrument)
+        # Parsed once per refresh for all expiries; switching expiry only slices this frame
+        chain = OptionChainAnalyzer.fetch_chain_frame(instrument)
         
-        if not payload:
+        if chain.empty:
             st.error("Failed to fetch option chain data. Please try again later.")
             return
 
         # Expiry Selection
-        expiry_dates = OptionChainAnalyzer.get_expiry_dates(payload)
+        expiry_dates = OptionChainAnalyzer.get_expiry_dates(chain)
         if not expiry_dates:
              st.error("No expiry dates found.")
              return
@@ -29,7 +62,7 @@ def render_options_tab():
         selected_expiry = st.selectbox("Select Expiry Date", expiry_dates)
     
     # Process Data
-    df, pcr, total_ce, total_pe, max_pain, spot_price = OptionChainAnalyzer.process_option_chain(payload, selected_expiry)
+    df, pcr, total_ce, total_pe, max_pain, spot_price = OptionChainAnalyzer.process_option_chain(chain, selected_expiry)
     
     if df.empty:
         st.warning("No data found for this expiry.")
@@ -74,7 +107,197 @@ def render_options_tab():
     fig_change.update_layout(title="Change in OI vs Strike", barmode='group', xaxis_title="Strike Price", yaxis_title="OI Change")
     st.plotly_chart(fig_change, use_container_width=True)
     
+    # Max Pain Curve
+    st.subheader("🎯 Option Writer Payout by Settlement Price")
+    pain = OptionChainAnalyzer.writer_pain(df['Strike'].values, df['CE OI'].values, df['PE OI'].values)
+    fig_pain = go.Figure()
+    fig_pain.add_trace(go.Scatter(x=plot_df['Strike'], y=pain[plot_df.index], mode='lines+markers', name='Writer Payout', line=dict(color='orange')))
+    fig_pain.add_vline(x=max_pain, line_dash="dash", line_color="gray", annotation_text="Max Pain")
+    fig_pain.update_layout(title="Total Writer Payout if Expiry Settles at Strike", xaxis_title="Strike Price", yaxis_title="Payout (OI x Points)")
+    st.plotly_chart(fig_pain, use_container_width=True)
+    
+    # Implied Volatility & Greeks (all expiries solved together)
+    st.subheader("🧮 Implied Volatility & Greeks")
+    greeks_df = chain_greeks(chain)
+    if greeks_df.empty or greeks_df['IV'].isna().all():
+        st.info("Implied volatility could not be solved for this chain (no traded prices).")
+    else:
+        g1, g2 = st.columns(2)
+        with g1:
+            smile = iv_smile(greeks_df, selected_expiry)
+            smile = smile[(smile.index >= plot_df['Strike'].min()) & (smile.index <= plot_df['Strike'].max())]
+            fig_smile = go.Figure()
+            fig_smile.add_trace(go.Scatter(x=smile.index, y=smile['Smile IV'] * 100, mode='lines+markers', name='OTM IV'))
+            fig_smile.add_trace(go.Scatter(x=smile.index, y=smile['Call IV'] * 100, mode='markers', name='Call IV', marker=dict(color='red', size=5)))
+            fig_smile.add_trace(go.Scatter(x=smile.index, y=smile['Put IV'] * 100, mode='markers', name='Put IV', marker=dict(color='green', size=5)))
+            fig_smile.add_vline(x=spot_price, line_dash="dot", line_color="gray", annotation_text="Spot")
+            fig_smile.update_layout(title=f"IV Smile - {selected_expiry}", xaxis_title="Strike Price", yaxis_title="Implied Volatility (%)")
+            st.plotly_chart(fig_smile, use_container_width=True)
+        with g2:
+            term = iv_term_structure(greeks_df)
+            fig_term = go.Figure()
+            fig_term.add_trace(go.Scatter(x=term['Days'], y=term['ATM IV'] * 100, mode='lines+markers+text', text=term.index, textposition="top center", name='ATM IV'))
+            fig_term.update_layout(title="ATM IV Term Structure", xaxis_title="Days to Expiry", yaxis_title="Implied Volatility (%)")
+            st.plotly_chart(fig_term, use_container_width=True)
+        
+        with st.expander("View Greeks (strikes near spot)"):
+            near = greeks_df[(greeks_df['Expiry'] == selected_expiry) & greeks_df['Strike'].isin(plot_df['Strike'])]
+            greeks_table = near.pivot_table(index='Strike', columns='Type', values=['IV', 'Delta', 'Gamma', 'Vega', 'Theta'])
+            greeks_table.columns = [f"{side} {name}" for name, side in greeks_table.columns]
+            st.dataframe(greeks_table.style.format("{:.4f}"), use_container_width=True)
+    
+    render_strategy_builder(instrument, df, spot_price, selected_expiry)
+    
+    render_snapshot_history(instrument, selected_expiry)
+    
     # 4. Data Table
     with st.expander("View Option Chain Data"):
-        display_df = df[['CE OI', 'CE Change OI', 'CE LTP', 'Strike', 'PE LTP', 'PE Change OI', 'PE OI']]
+        display_df = df[['CE OI', 'CE Change OI', 'CE LTP', 'Strike', 'PE LTP', 'PE Change OI', 'PE OI', 'Strike PCR']]
         st.dataframe(display_df.style.background_gradient(subset=['CE OI', 'PE OI'], cmap="Blues"), use_container_width=True)
+
+
+def render_snapshot_history(instrument, selected_expiry):
+    """Intraday OI / PCR / Max Pain evolution from recorded snapshots (no extra NSE requests)."""
+    with st.expander("⏱️ Intraday Buildup (Recorded Snapshots)"):
+        recorder = get_snapshot_recorder()
+        c1, c2, c3 = st.columns([2, 1, 1])
+        c1.caption(f"Recorder polls {', '.join(recorder.symbols)} every {recorder.interval // 60} min during market hours "
+                   f"and stores a snapshot only when the chain changed. "
+                   f"Status: {'🟢 running' if recorder.running else '⚪ stopped'} | saved {recorder.saved}, unchanged/failed {recorder.skipped}")
+        if not recorder.running and c2.button("Start Recorder", key="start_recorder"):
+            if instrument not in recorder.symbols:
+                recorder.symbols.append(instrument)
+            recorder.start()
+            st.rerun()
+        if recorder.running and c2.button("Stop Recorder", key="stop_recorder"):
+            recorder.stop()
+            st.rerun()
+        if c3.button("Snapshot Now", key="snapshot_now"):
+            saved = option_snapshots.record_snapshot(instrument)
+            st.toast("Snapshot saved." if saved else "No new data (unchanged or fetch failed).")
+
+        sessions = option_snapshots.list_sessions(instrument)
+        if not sessions:
+            st.info(f"No snapshots recorded for {instrument} yet.")
+            return
+        session = st.selectbox("Session", sessions, key="snapshot_session")
+        snapshots = option_snapshots.load_snapshots(instrument, session)
+        expiries = list(snapshots['Expiry'].unique()) if not snapshots.empty else []
+        expiry = selected_expiry if selected_expiry in expiries else None
+        series = option_snapshots.chain_timeseries(snapshots, expiry)
+        if series.empty:
+            st.info("No snapshots for this expiry in the selected session.")
+            return
+
+        st.caption(f"{len(series)} distinct snapshots for {expiry or 'the nearest expiry'}.")
+        fig_oi = go.Figure()
+        fig_oi.add_trace(go.Scatter(x=series.index, y=series['Total CE OI'], name='Call OI', line=dict(color='red')))
+        fig_oi.add_trace(go.Scatter(x=series.index, y=series['Total PE OI'], name='Put OI', line=dict(color='green')))
+        fig_oi.update_layout(title="Total OI Through the Session", xaxis_title="Time", yaxis_title="Open Interest")
+        st.plotly_chart(fig_oi, use_container_width=True)
+
+        fig_pcr = go.Figure()
+        fig_pcr.add_trace(go.Scatter(x=series.index, y=series['PCR'], name='PCR', line=dict(color='purple')))
+        fig_pcr.add_trace(go.Scatter(x=series.index, y=series['Max Pain'], name='Max Pain', yaxis='y2', line=dict(color='orange', dash='dash')))
+        fig_pcr.add_trace(go.Scatter(x=series.index, y=series['Spot'], name='Spot', yaxis='y2', line=dict(color='gray')))
+        fig_pcr.update_layout(title="PCR, Max Pain and Spot", xaxis_title="Time", yaxis_title="PCR",
+                              yaxis2=dict(title="Price", overlaying='y', side='right'))
+        st.plotly_chart(fig_pcr, use_container_width=True)
+
+
+def render_fno_scanner():
+    """PCR, max pain and IV for every F&O underlying in one sortable table."""
+    st.subheader("🔎 F&O Scanner")
+    symbols = get_fno_symbols()
+    st.caption(f"Scans the nearest expiry of {len(symbols)} F&O underlyings concurrently, within NSE's request rate limit "
+               "(about a minute for the full list). Results are cached for 15 minutes. "
+               "IV Percentile compares today's ATM IV with the symbol's stored daily readings and appears after 20 days of scans.")
+    
+    c1, c2 = st.columns([3, 1])
+    scope = c1.radio("Universe", ["Indices Only", "All F&O"], horizontal=True, key="fno_scope")
+    run = c2.button("Run Scan", key="run_fno_scan")
+    
+    if not run and "fno_scan" not in st.session_state:
+        return
+    if run:
+        universe = symbols[:4] if scope == "Indices Only" else symbols
+        st.session_state["fno_scan"] = cached_fno_scan(tuple(universe))
+    
+    scan = st.session_state["fno_scan"]
+    if scan.empty:
+        st.warning("No option chains could be fetched. NSE may be rate limiting; try again shortly.")
+        return
+    
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Underlyings Scanned", len(scan))
+    m2.metric("Median PCR", f"{scan['PCR'].median():.2f}")
+    m3.metric("Median ATM IV", f"{scan['ATM IV'].median():.1%}")
+    
+    st.dataframe(
+        scan,
+        column_config={
+            "PCR": st.column_config.NumberColumn(format="%.2f"),
+            "Max Pain Dist %": st.column_config.NumberColumn(format="%.2f%%"),
+            "ATM IV": st.column_config.NumberColumn(format="%.3f"),
+            "IV Percentile": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f"),
+            "IV Rank (Universe)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f"),
+        },
+        hide_index=True, use_container_width=True
+    )
+    
+    fig = px.scatter(scan, x="PCR", y="Max Pain Dist %", size="Total OI", color="ATM IV", hover_name="Symbol",
+                     color_continuous_scale="RdYlGn_r", title="PCR vs Max Pain Distance (bubble size = Total OI)")
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def render_strategy_builder(instrument, df, spot_price, selected_expiry):
+    """Multi-leg payoff at expiry plus Black-Scholes P&L over price x time x volatility."""
+    with st.expander("🧩 Strategy Builder (Payoff & P&L Grid)"):
+        c1, c2, c3, c4 = st.columns(4)
+        template = c1.selectbox("Strategy", list(STRATEGY_TEMPLATES.keys()), index=list(STRATEGY_TEMPLATES).index("Iron Condor"), key="strategy_template")
+        width = c2.number_input("Strike Steps", min_value=1, max_value=20, value=2, key="strategy_width")
+        lots = c3.number_input("Lots", min_value=1, max_value=100, value=1, key="strategy_lots")
+        lot_size = c4.number_input("Lot Size", min_value=1, value=INDEX_LOT_SIZES.get(instrument, 1), key=f"lot_size_{instrument}")
+        
+        legs = build_strategy(template, df, spot_price, width=width, expiry=selected_expiry)
+        st.caption("Edit legs freely: Qty is in lots (+ buy / - sell), Premium defaults to LTP, IV is solved from it.")
+        legs = st.data_editor(legs, num_rows="dynamic", key=f"legs_{instrument}_{selected_expiry}_{template}_{width}",
+                              column_config={"Type": st.column_config.SelectboxColumn(options=["CE", "PE"]),
+                                             "IV": st.column_config.NumberColumn(format="%.3f")})
+        legs = legs.dropna()
+        if legs.empty:
+            return
+        
+        multiplier = lot_size * lots
+        prices = np.linspace(spot_price * 0.85, spot_price * 1.15, 200)
+        days_to_expiry = float(time_to_expiry([selected_expiry])[0] * 365)
+        metrics = strategy_metrics(legs, prices, multiplier)
+        
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Net Premium", f"₹{metrics['net_premium']:,.0f}", help="Positive = credit received")
+        m2.metric("Max Profit", "Unlimited" if metrics['unbounded_profit'] else f"₹{metrics['max_profit']:,.0f}")
+        m3.metric("Max Loss", "Unlimited" if metrics['unbounded_loss'] else f"₹{metrics['max_loss']:,.0f}")
+        m4.metric("Breakevens", ", ".join(f"{b:,.0f}" for b in metrics['breakevens']) or "-")
+        
+        # Full grid in one broadcast; the views below are slices of it
+        days_forward = np.linspace(0, max(days_to_expiry, 0.01), 30)
+        vol_shifts = np.linspace(-0.10, 0.10, 11)
+        grid = pnl_grid(legs, prices, days_forward, vol_shifts, days_to_expiry, lot_size=multiplier)
+        
+        vol_idx = st.select_slider("IV Shift (vol points)", options=list(range(len(vol_shifts))), value=5,
+                                   format_func=lambda i: f"{vol_shifts[i] * 100:+.0f}", key="strategy_vol_shift")
+        
+        fig_payoff = go.Figure()
+        fig_payoff.add_trace(go.Scatter(x=prices, y=expiry_payoff(legs, prices, multiplier), name="At Expiry", line=dict(color="black")))
+        fig_payoff.add_trace(go.Scatter(x=prices, y=grid[:, 0, vol_idx], name="Today (model)", line=dict(color="royalblue", dash="dash")))
+        mid = len(days_forward) // 2
+        fig_payoff.add_trace(go.Scatter(x=prices, y=grid[:, mid, vol_idx], name=f"In {days_forward[mid]:.1f} days", line=dict(color="orange", dash="dot")))
+        fig_payoff.add_hline(y=0, line_color="gray")
+        fig_payoff.add_vline(x=spot_price, line_dash="dot", line_color="gray", annotation_text="Spot")
+        fig_payoff.update_layout(title=f"{template} Payoff", xaxis_title="Underlying Price", yaxis_title="P&L (₹)")
+        st.plotly_chart(fig_payoff, use_container_width=True)
+        
+        fig_heat = go.Figure(go.Heatmap(z=grid[:, :, vol_idx].T, x=prices, y=days_forward, colorscale="RdYlGn", zmid=0,
+                                        colorbar=dict(title="P&L (₹)")))
+        fig_heat.update_layout(title="P&L by Price and Days Forward", xaxis_title="Underlying Price", yaxis_title="Days Forward")
+        st.plotly_chart(fig_heat, use_container_width=True)
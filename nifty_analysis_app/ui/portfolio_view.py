@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from analysis.portfolio_manager import PortfolioManager
-from data_mcp.tools import get_all_equities
+from analysis.portfolio_manager import PortfolioManager, ALLOCATION_METHODS
+from analysis.rolling_correlation import ROLLING_WINDOWS
+from data_mcp.tools import get_all_equities, get_market_lots
+from analysis.rebalancer import load_holdings, DEFAULT_COST_BPS
+from ui.charts import render_zoom_slider
 
 def render_portfolio_tab():
     st.header("📊 Market Portfolio Study")
@@ -91,6 +94,15 @@ def render_portfolio_tab():
                 index=1,
                 help="Conservative: Minimize Volatility. Aggressive: Maximize Sharpe/Return."
             )
+            
+            # User Input: Allocation Method
+            allocation_method = st.selectbox(
+                "Allocation Method",
+                ALLOCATION_METHODS,
+                index=0,
+                help="Mean-Variance uses the Risk Profile. Risk Parity equalizes each asset's risk contribution. "
+                     "Hierarchical Risk Parity clusters correlated assets first and scales to large baskets."
+            )
         
         if st.button("Analyze & Optimize Portfolio", type="primary"):
             if not tickers:
@@ -131,7 +143,7 @@ def render_portfolio_tab():
                     st.success(f"Analysis Period: {start_date.date()} to {end_date.date()} ({effective_years:.1f} years)")
                 
                 # 2. Allocation
-                allocation = pm.allocate_capital(capital, risk_profile)
+                allocation = pm.allocate_capital(capital, risk_profile, method=allocation_method)
                 
                 # Store in session state to persist across reruns if needed (or just render directly)
                 st.session_state['portfolio_metrics'] = risk_metrics
@@ -142,6 +154,9 @@ def render_portfolio_tab():
                 st.session_state['effective_years'] = effective_years
                 st.session_state['start_date'] = start_date
                 st.session_state['end_date'] = end_date
+                # The settings that produced this allocation (the selectors may change later)
+                st.session_state['portfolio_allocation_method'] = allocation_method
+                st.session_state['portfolio_risk_profile'] = risk_profile
     
     # Render Output if available
     if 'portfolio_manager' in st.session_state:
@@ -150,6 +165,8 @@ def render_portfolio_tab():
         allocation = st.session_state.get('portfolio_allocation', {})
         current_map = st.session_state.get('ticker_map', {})
         effective_years = st.session_state.get('effective_years', 0)
+        result_method = st.session_state.get('portfolio_allocation_method', "Mean-Variance")
+        result_profile = st.session_state.get('portfolio_risk_profile', risk_profile)
         
         with col2:
             st.subheader("Asset Performance Metrics")
@@ -160,7 +177,10 @@ def render_portfolio_tab():
             
             st.dataframe(display_metrics.style.highlight_max(axis=0, color='lightgreen').highlight_min(axis=0, color='lightcoral'))
             
-            st.subheader(f"Optimized Allocation ({risk_profile})")
+            if result_method == "Mean-Variance":
+                st.subheader(f"Optimized Allocation ({result_profile})")
+            else:
+                st.subheader(f"Optimized Allocation ({result_method})")
             
             # Display Allocation Table
             alloc_df = pd.DataFrame(list(allocation.items()), columns=['Asset', 'Allocation'])
@@ -229,12 +249,62 @@ def render_portfolio_tab():
             st.metric("Total Projected Value", f"₹{total_projected:,.2f}", 
                       delta=f"₹{total_profit:,.2f} (Abs: {portfolio_abs_return_pct:.1f}%, CAGR: {portfolio_cagr_pct:.1f}%)")
             
+            # Whole-Share Orders (lot sizes, existing holdings, trading costs)
+            with st.expander("🧮 Whole-Share Orders & Rebalancing", expanded=False):
+                st.caption("Converts the allocation into whole shares at the latest price, respecting NSE market lots. "
+                           "Upload current holdings (CSV with Symbol, Shares) to get rebalancing trades; "
+                           "the Total Capital above is treated as additional cash.")
+                holdings_file = st.file_uploader("Current Holdings (optional)", type=["csv"], key="portfolio_holdings")
+                oc1, oc2 = st.columns(2)
+                cost_bps = oc1.number_input("Trading Cost (bps of traded value)", min_value=0.0, value=DEFAULT_COST_BPS, step=1.0)
+                fee_per_order = oc2.number_input("Brokerage per Order (INR)", min_value=0.0, value=0.0, step=5.0)
+                
+                holdings = None
+                if holdings_file is not None:
+                    try:
+                        holdings = load_holdings(holdings_file)
+                    except Exception as e:
+                        st.error(f"Could not read holdings file: {e}")
+                
+                try:
+                    orders, summary = pm.allocate_shares(
+                        allocation, capital, holdings=holdings, lot_sizes=get_market_lots(),
+                        cost_bps=cost_bps, fee_per_order=fee_per_order
+                    )
+                except ValueError as e:
+                    st.error(f"Could not build orders: {e}")
+                    orders, summary = pd.DataFrame(), {}
+                if not orders.empty:
+                    orders.index = [current_map.get(t, t) for t in orders.index]
+                    st.dataframe(orders.style.format({
+                        'Price': '₹{:,.2f}',
+                        'Trade Value': '₹{:,.2f}',
+                        'Est. Cost': '₹{:,.2f}',
+                        'Target Weight (%)': '{:.2f}%',
+                        'Final Weight (%)': '{:.2f}%'
+                    }))
+                    s1, s2, s3 = st.columns(3)
+                    s1.metric("Invested", f"₹{summary['invested']:,.2f}")
+                    s2.metric("Cash Left", f"₹{summary['cash_left']:,.2f}")
+                    s3.metric("Est. Costs", f"₹{summary['total_cost']:,.2f}",
+                              delta=f"TE {summary['tracking_error']:.2%}", delta_color="off")
+            
             # Correlation Matrix
             st.divider()
             fig_corr = pm.plot_correlation_matrix(ticker_map=current_map)
             if fig_corr:
                 st.plotly_chart(fig_corr, use_container_width=True)
             
+            # Rolling Correlation & Diversification Regimes
+            with st.expander("🔄 Rolling Correlation & Regimes", expanded=False):
+                corr_window = st.selectbox("Rolling Window (Trading Days)", ROLLING_WINDOWS, index=1)
+                fig_regime, fig_anim = pm.plot_rolling_correlation(window=corr_window, ticker_map=current_map)
+                if fig_regime:
+                    st.plotly_chart(fig_regime, use_container_width=True)
+                    st.plotly_chart(fig_anim, use_container_width=True)
+                else:
+                    st.info(f"Need at least two assets and more than {corr_window} trading days of history.")
+            
         st.divider()
         
         # Charts
@@ -250,8 +320,11 @@ def render_portfolio_tab():
         with c2:
             st.plotly_chart(fig_bar, use_container_width=True)
             
+        # Zoom applies to all time-series charts below (only shown for long histories)
+        zoom_window = render_zoom_slider(pm.data.index, key="portfolio_zoom")
+        
         # Line Charts (Normalized & Raw)
-        fig_norm, fig_raw = pm.plot_performance_charts(ticker_map=current_map)
+        fig_norm, fig_raw = pm.plot_performance_charts(ticker_map=current_map, window=zoom_window)
         
         if fig_norm:
             st.plotly_chart(fig_norm, use_container_width=True)
@@ -260,6 +333,6 @@ def render_portfolio_tab():
             st.plotly_chart(fig_raw, use_container_width=True)
             
         # Drawdown Chart
-        fig_dd = pm.plot_drawdown_chart(ticker_map=current_map)
+        fig_dd = pm.plot_drawdown_chart(ticker_map=current_map, window=zoom_window)
         if fig_dd:
             st.plotly_chart(fig_dd, use_container_width=True)
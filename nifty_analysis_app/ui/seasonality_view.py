@@ -3,6 +3,55 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
 from analysis.seasonality import analyze_seasonality
+from analysis.seasonality_engine import SeasonalityEngine, RANK_METRICS
+from analysis.calendar_features import MONTH_NAMES, month_number
+from analysis.seasonality_significance import month_significance, week_significance
+from data_mcp.tools import get_nifty500
+from data_mcp.trading_calendar import calendar_index
+
+@st.cache_resource
+def load_seasonality_engine():
+    """Precomputed universe tables, loaded once per server process and shared by all sessions."""
+    return SeasonalityEngine.load()
+
+def load_calendar_index():
+    """
+    NSE trading-calendar features (session of month, expiry offsets), shared by every symbol.
+    Memoized in-process by trading_calendar and rebuilt when the calendar refreshes (daily).
+    """
+    return calendar_index()
+
+@st.cache_data(ttl=3600)
+def cached_weekly_data(df):
+    """Weekly returns and their (year x month x week) cube, built once per symbol/history."""
+    from analysis.seasonality import prepare_weekly_data, WeeklyCube
+    w_df = prepare_weekly_data(df)
+    return w_df, WeeklyCube.from_weekly(w_df)
+
+@st.cache_data(ttl=3600)
+def cached_month_significance(df, n_resamples):
+    return month_significance(df, n_resamples=n_resamples)
+
+@st.cache_data(ttl=3600)
+def cached_week_significance(weekly_df, month, n_resamples):
+    return week_significance(weekly_df, month=month, n_resamples=n_resamples)
+
+def render_significance_table(sig):
+    """Formats a seasonality_significance result and flags cells that survive the FDR correction."""
+    if sig.empty:
+        st.warning("Not enough data for significance tests.")
+        return
+    disp = pd.DataFrame(index=sig.index)
+    disp['Years'] = sig['N']
+    disp['Avg Return'] = sig['Avg Return'].apply(lambda x: f"{x:.2%}")
+    disp['Avg 95% CI'] = [f"{lo:.2%} to {hi:.2%}" for lo, hi in zip(sig['Avg CI Low'], sig['Avg CI High'])]
+    disp['p (Avg)'] = sig['Avg p-value'].round(3)
+    disp['Win Rate'] = sig['Win Rate'].apply(lambda x: f"{x:.0%}")
+    disp['Win 95% CI'] = [f"{lo:.0%} to {hi:.0%}" for lo, hi in zip(sig['Win CI Low'], sig['Win CI High'])]
+    disp['p (Win)'] = sig['Win p-value'].round(3)
+    disp['q-value'] = sig['q-value'].round(3)
+    disp['Significant'] = (sig['q-value'] < 0.05).map({True: "✅", False: ""})
+    st.dataframe(disp)
 
 def render_seasonality_tab(df):
     st.subheader("Seasonality Analysis: Monthly Returns")
@@ -61,13 +110,19 @@ def render_seasonality_tab(df):
     - **Worst Month:** {worst_month} (Avg: {worst_avg:.2%})
     """)
 
+    with st.expander("📐 Is it real? Statistical Significance (Permutation & Bootstrap)"):
+        st.caption("p-values come from shuffling month labels across all history (is this month different from a random month?). "
+                   "95% CIs come from resampling each month's own years. q-value corrects for testing 12 months at once.")
+        n_resamples = st.select_slider("Resamples", options=[1000, 2000, 5000, 10000], value=5000, key="season_resamples")
+        render_significance_table(cached_month_significance(df, n_resamples))
+
     st.divider()
     st.subheader("🔍 Deep Dive: Granular Seasonality")
     
-    from analysis.seasonality import prepare_weekly_data, get_yearly_drilldown, get_monthly_drilldown, analyze_daily_seasonality
-    import calendar
+    from analysis.seasonality import get_yearly_drilldown, get_monthly_drilldown, analyze_daily_seasonality
+    from analysis.seasonality import analyze_trading_day_seasonality, analyze_expiry_seasonality
     
-    drill_type = st.radio("Select Drill-Down View", ["Day-wise Analysis (1-31) 📅", "Weekly Seasonality (1-5)", "Yearly Overview"], horizontal=True)
+    drill_type = st.radio("Select Drill-Down View", ["Day-wise Analysis (1-31) 📅", "Trading Session of Month 🗓️", "F&O Expiry Cycle ⏳", "Weekly Seasonality (1-5)", "Yearly Overview", "Universe Ranking (Nifty 500) 🌐"], horizontal=True)
     
     if drill_type == "Day-wise Analysis (1-31) 📅":
         st.markdown("##### 📅 Day of Month Performance (Average Return)")
@@ -96,12 +151,58 @@ def render_seasonality_tab(df):
         else:
             st.warning("Not enough data for daily analysis.")
 
+    elif drill_type == "Trading Session of Month 🗓️":
+        st.markdown("##### 🗓️ N-th Trading Session of the Month (Average Return)")
+        st.caption("Keyed on the exchange calendar: session 1 is the first trading day of the month, whatever its date. "
+                   "Weekends and holidays no longer split the same session across calendar days.")
+        
+        session_pivot = analyze_trading_day_seasonality(df, load_calendar_index())
+        
+        if not session_pivot.empty:
+            fig, ax = plt.subplots(figsize=(max(10, len(session_pivot.columns) * 0.45), 8))
+            sns.heatmap(session_pivot, ax=ax, cmap="RdYlGn", center=0, annot=False,
+                        cbar_kws={'label': 'Avg Daily Return'}, linewidths=.1, linecolor='lightgray')
+            ax.set_title("Trading Session of Month Seasonality (Avg Return)")
+            ax.set_xlabel("Trading Session of Month")
+            ax.set_ylabel("Month")
+            st.pyplot(fig)
+        else:
+            st.warning("Not enough data for trading session analysis.")
+
+    elif drill_type == "F&O Expiry Cycle ⏳":
+        st.markdown("##### ⏳ Returns Around Monthly F&O Expiry")
+        st.caption("Session 0 is the monthly expiry: the last Thursday, or the last Tuesday from September 2025, "
+                   "moved earlier when that day is a holiday. Negative numbers are sessions before expiry.")
+        window = st.slider("Sessions around expiry", min_value=3, max_value=15, value=10, key="expiry_window")
+        
+        expiry_pivot, expiry_stats = analyze_expiry_seasonality(df, load_calendar_index(), window=window)
+        
+        if not expiry_pivot.empty:
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                fig, ax = plt.subplots(figsize=(max(10, len(expiry_pivot.columns) * 0.5), 8))
+                sns.heatmap(expiry_pivot, ax=ax, cmap="RdYlGn", center=0, annot=False,
+                            cbar_kws={'label': 'Avg Daily Return'}, linewidths=.1, linecolor='lightgray')
+                ax.set_title("Expiry Cycle Seasonality (Avg Return)")
+                ax.set_xlabel("Sessions from Expiry")
+                ax.set_ylabel("Month")
+                st.pyplot(fig)
+            with c2:
+                st.write("**All Months**")
+                disp_stats = expiry_stats.copy()
+                disp_stats['Win Rate'] = disp_stats['Win Rate'].apply(lambda x: f"{x:.0%}")
+                disp_stats['Avg %'] = disp_stats['Avg %'].apply(lambda x: f"{x:.2%}")
+                disp_stats['Median %'] = disp_stats['Median %'].apply(lambda x: f"{x:.2%}")
+                st.dataframe(disp_stats, height=600)
+        else:
+            st.warning("Not enough data for expiry cycle analysis.")
+
     elif drill_type == "Weekly Seasonality (1-5)":
-        w_df = prepare_weekly_data(df)
-        months = list(calendar.month_name)[1:]
+        w_df, cube = cached_weekly_data(df)
+        months = MONTH_NAMES
         sel_month = st.selectbox("Select Month", months)
         
-        pivot, stats = get_monthly_drilldown(w_df, sel_month)
+        pivot, stats = get_monthly_drilldown(cube, sel_month)
         
         c1, c2 = st.columns([3, 1])
         with c1:
@@ -123,13 +224,16 @@ def render_seasonality_tab(df):
             disp_stats['Win Rate'] = disp_stats['Win Rate'].apply(lambda x: f"{x:.0%}")
             disp_stats['Avg Return'] = disp_stats['Avg Return'].apply(lambda x: f"{x:.2%}")
             st.dataframe(disp_stats)
+        
+        st.markdown(f"**Week Significance - {sel_month}** (weeks compared against each other)")
+        render_significance_table(cached_week_significance(w_df, month_number(sel_month), 5000))
             
     elif drill_type == "Yearly Overview":
-        w_df = prepare_weekly_data(df)
+        w_df, cube = cached_weekly_data(df)
         years = sorted(w_df['Year'].unique(), reverse=True)
         sel_year = st.selectbox("Select Year", years)
         
-        pivot, stats = get_yearly_drilldown(w_df, sel_year)
+        pivot, stats = get_yearly_drilldown(cube, sel_year)
         
         c1, c2 = st.columns([3, 1])
         with c1:
@@ -145,3 +249,52 @@ def render_seasonality_tab(df):
         with c2:
             st.write("**Monthly Totals**")
             st.dataframe(stats.apply(lambda x: f"{x:.2%}"), height=400)
+
+    elif drill_type == "Universe Ranking (Nifty 500) 🌐":
+        render_universe_ranking()
+
+def render_universe_ranking():
+    st.markdown("##### 🌐 Best Seasonal Stocks Across the Universe")
+    st.caption("Ranks every Nifty 500 stock for a calendar month (or a week within it) from precomputed tables.")
+    
+    engine = load_seasonality_engine()
+    
+    if engine is None:
+        st.info("Universe seasonality tables have not been built yet. Building downloads ~20 years of daily data for 500 stocks (a few minutes).")
+        if st.button("Build Universe Tables"):
+            with st.spinner("Downloading universe history and precomputing calendar tables..."):
+                built = SeasonalityEngine.build(get_nifty500()['Symbol'].tolist())
+            load_seasonality_engine.clear()
+            if built is None:
+                st.error("Could not download universe data.")
+            else:
+                st.rerun()
+        return
+    
+    c1, c2, c3, c4 = st.columns(4)
+    months = MONTH_NAMES
+    sel_month = c1.selectbox("Month", months, index=10, key="universe_month")
+    week_opt = c2.selectbox("Week of Month", ["Whole Month", 1, 2, 3, 4, 5], key="universe_week")
+    metric = c3.selectbox("Rank By", RANK_METRICS, key="universe_metric")
+    max_years = len(engine.years)
+    if max_years > 3:
+        lookback = c4.slider("Lookback (Years)", min_value=3, max_value=max_years, value=min(15, max_years), key="universe_lookback")
+    else:
+        # A slider needs min < max: short panels just use every year they have
+        lookback = max_years
+        c4.info(f"Lookback: all {max_years} year(s) in the panel.")
+    
+    week = None if week_opt == "Whole Month" else week_opt
+    ranked = engine.rank(month_number(sel_month), metric=metric, lookback_years=lookback, week=week)
+    
+    names = get_nifty500().set_index('Symbol')
+    ranked.insert(0, 'Company', names['Company Name'].reindex(ranked.index).fillna(''))
+    ranked.insert(1, 'Industry', names['Industry'].reindex(ranked.index).fillna(''))
+    
+    st.dataframe(ranked.style.format({
+        'Win Rate': '{:.0%}',
+        'Avg %': '{:.2%}',
+        'Median %': '{:.2%}',
+        'Total %': '{:.2%}'
+    }), use_container_width=True)
+    st.caption(f"Data: {engine.years[0]}–{engine.years[-1]}, {len(engine.symbols)} symbols. Stocks need ≥80% of the lookback years to qualify.")